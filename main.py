@@ -1,19 +1,35 @@
+import asyncio
+import contextlib
 import os
-from typing import Union
+from typing import AsyncIterator, List, Union
 from beanie import init_beanie
 from beanie.odm.operators.update.general import Set
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+import pandas as pd
 
+from stock_analysis.config import settings
+from stock_analysis.data_retrieve import DataRetrieve
+from stock_analysis.executors.backend import (
+    ExecutorBackend,
+    shutdown_worker_pool,
+    start_worker_pool,
+)
 from stock_analysis.indicator import Indicator
 from stock_analysis.momentum_strategy import MomentumStrategy
+from stock_analysis.providers.base import ProviderError
 from stock_analysis.schema.api import *
 from stock_analysis.schema.db import AsyncNiftyIndex, AsyncNiftySector
+from stock_analysis.storage.shared_store import SharedPriceStore
+from stock_analysis.utils.logger import set_logger
 
 load_dotenv()
 client = AsyncIOMotorClient(os.environ["MONGODB_CONNECTION_STRING"])
 __version__ = "2.2"
+logger = set_logger()
 
 # FastAPI app init
 app = FastAPI(
@@ -21,23 +37,60 @@ app = FastAPI(
     description="An helping hand to identify & analyze stocks/company to invest",
     version=__version__,
 )
+# NOTE - every strategy call submits its tasks to warm worker pool started with the app, instead
+# of starting (& importing everything in) a new pool per request
+backend = ExecutorBackend("pool")
+
+
+@app.on_event("startup")
+def _start_worker_pool():
+    """Start warm worker pool shared by all requests"""
+    start_worker_pool(settings.executor_workers)
+
+
+@app.on_event("shutdown")
+def _shutdown_worker_pool():
+    """Shut down warm worker pool"""
+    shutdown_worker_pool()
+
+
+@contextlib.asynccontextmanager
+async def prefetched(company: List[str]) -> AsyncIterator[SharedPriceStore]:
+    """Fetch price history & quotes of all companies concurrently (without blocking the event
+    loop) before running a strategy. Price history is loaded in shared memory, so that workers of
+    warm pool attach to it by name instead of receiving records along with every chunk."""
+    symbols = [f"{symbol}.NS" for symbol in company]
+    try:
+        await DataRetrieve.many_companies_quote_async(symbols)
+    except ProviderError:
+        logger.warning("Cannot prefetch quotes, moving on company wise")
+    async with DataRetrieve.ashared(symbols) as store:
+        yield store
+
+
 # REST API for heal check
 @app.get("/")
 def _index():
     """Health check"""
-    return {"message": "OK", "version": __version__}
+    return {
+        "message": "OK",
+        "version": __version__,
+        "requests": DataRetrieve.request_stats(),
+    }
 
 
 # REST API for running algo strategy
 @app.post("/api/momentum/relative-momentum/")
-def relative_momentum(input_response: RelativeMomentum):
+async def relative_momentum(input_response: RelativeMomentum):
     """REST API for running relative-momentum algo strategy"""
-    ms = MomentumStrategy(company_name=input_response.company)
-    result = ms.relative_momentum(
-        end_date=input_response.end_date,
-        top_company_count=input_response.top_company_count,
-        save=False,
-    )
+    ms = MomentumStrategy(company_name=input_response.company, backend=backend)
+    async with prefetched(input_response.company):
+        result = await run_in_threadpool(
+            ms.relative_momentum,
+            end_date=input_response.end_date,
+            top_company_count=input_response.top_company_count,
+            save=False,
+        )
     # NOTE - by default result is return as dataframe's index as keys so changing it to symbol
     result = result.set_index(
         "symbol"
@@ -45,16 +98,55 @@ def relative_momentum(input_response: RelativeMomentum):
     return result
 
 
+@app.post("/api/momentum/relative-momentum/stream/")
+async def relative_momentum_stream(input_response: RelativeMomentum):
+    """REST API for running relative-momentum algo strategy, streaming provisional leaderboard
+    (one json per line, same layout as `relative-momentum`) while companies are being scanned &
+    the final result as last line"""
+    ms = MomentumStrategy(company_name=input_response.company, backend=backend)
+    loop = asyncio.get_running_loop()
+    leaderboards: asyncio.Queue = asyncio.Queue()
+
+    def publish(leaderboard: pd.DataFrame):
+        # NOTE - called from the strategy's thread, so handed over to the event loop
+        loop.call_soon_threadsafe(leaderboards.put_nowait, leaderboard)
+
+    async def scan():
+        try:
+            async with prefetched(input_response.company):
+                result = await run_in_threadpool(
+                    ms.relative_momentum,
+                    end_date=input_response.end_date,
+                    top_company_count=input_response.top_company_count,
+                    save=False,
+                    on_progress=publish,
+                )
+            leaderboards.put_nowait(result)
+        finally:
+            leaderboards.put_nowait(None)
+
+    async def stream() -> AsyncIterator[str]:
+        task = asyncio.create_task(scan())
+        while (leaderboard := await leaderboards.get()) is not None:
+            if not leaderboard.empty:
+                yield leaderboard.set_index("symbol").T.to_json() + "\n"
+        await task
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @app.post("/api/momentum/relative-momentum-ema/")
-def relative_momentum_ema(input_response: RelativeMomentumEMA):
+async def relative_momentum_ema(input_response: RelativeMomentumEMA):
     """REST API for running relative-momentum-ema algo strategy"""
-    ms = MomentumStrategy(company_name=input_response.company)
-    result = ms.relative_momentum_with_ema(
-        end_date=input_response.end_date,
-        top_company_count=input_response.top_company_count,
-        ema_canditate=input_response.ema_candidate,
-        save=False,
-    )
+    ms = MomentumStrategy(company_name=input_response.company, backend=backend)
+    async with prefetched(input_response.company):
+        result = await run_in_threadpool(
+            ms.relative_momentum_with_ema,
+            end_date=input_response.end_date,
+            top_company_count=input_response.top_company_count,
+            ema_canditate=input_response.ema_candidate,
+            save=False,
+        )
     # NOTE - by default result is return as dataframe's index as keys so changing it to symbol
     result = result.set_index(
         "symbol"
@@ -63,15 +155,17 @@ def relative_momentum_ema(input_response: RelativeMomentumEMA):
 
 
 @app.post("/api/momentum/absolute-momentum-dma/")
-def absolute_momentum_dma(input_response: AbsoluteMomentumDMA):
+async def absolute_momentum_dma(input_response: AbsoluteMomentumDMA):
     """REST API for running absolute-momentum-dma algo strategy"""
-    ms = MomentumStrategy(company_name=input_response.company)
-    result = ms.absolute_momentum_with_dma(
-        end_date=input_response.end_date,
-        period=input_response.period,
-        cutoff=input_response.cutoff,
-        save=False,
-    )
+    ms = MomentumStrategy(company_name=input_response.company, backend=backend)
+    async with prefetched(input_response.company):
+        result = await run_in_threadpool(
+            ms.absolute_momentum_with_dma,
+            end_date=input_response.end_date,
+            period=input_response.period,
+            cutoff=input_response.cutoff,
+            save=False,
+        )
     # NOTE - by default result is return as dataframe's index as keys so changing it to symbol
     result = result.set_index(
         "symbol"
@@ -80,10 +174,15 @@ def absolute_momentum_dma(input_response: AbsoluteMomentumDMA):
 
 
 @app.post("/api/indicator/volume-n-days/")
-def volume_n_days(input_response: VolumeNDaysIndicator):
+async def volume_n_days(input_response: VolumeNDaysIndicator):
     """REST API for running volume-n-days algo strategy"""
-    ind = Indicator(company_name=input_response.company)
-    result = ind.volume_n_days_indicator(duration=input_response.duration, save=False)
+    ind = Indicator(company_name=input_response.company, backend=backend)
+    async with prefetched(input_response.company):
+        result = await run_in_threadpool(
+            ind.volume_n_days_indicator,
+            duration=input_response.duration,
+            save=False,
+        )
     # NOTE - by default result is return as dataframe's index as keys so changing it to symbol
     result = result.set_index(
         "symbol"
@@ -92,14 +191,16 @@ def volume_n_days(input_response: VolumeNDaysIndicator):
 
 
 @app.post("/api/indicator/ema-indicator-short/")
-def ema_indicator_short(input_response: EMAIndicator):
+async def ema_indicator_short(input_response: EMAIndicator):
     """REST API for running ema-indicator-short algo strategy"""
-    ind = Indicator(company_name=input_response.company)
-    result = ind.ema_indicator(
-        ema_canditate=input_response.ema_candidate,
-        cutoff_date=input_response.cutoff_date,
-        save=False,
-    )
+    ind = Indicator(company_name=input_response.company, backend=backend)
+    async with prefetched(input_response.company):
+        result = await run_in_threadpool(
+            ind.ema_indicator,
+            ema_canditate=input_response.ema_candidate,
+            cutoff_date=input_response.cutoff_date,
+            save=False,
+        )
     # NOTE - by default result is return as dataframe's index as keys so changing it to symbol
     result = result.set_index(
         "symbol"
@@ -108,14 +209,16 @@ def ema_indicator_short(input_response: EMAIndicator):
 
 
 @app.post("/api/indicator/ema-indicator-detail/")
-def ema_indicator_detail(input_response: EMAIndicator):
+async def ema_indicator_detail(input_response: EMAIndicator):
     """REST API for running ema-indicator-detail algo strategy"""
-    ind = Indicator(company_name=input_response.company)
-    result = ind.ema_detail_indicator(
-        ema_canditate=input_response.ema_candidate,
-        cutoff_date=input_response.cutoff_date,
-        save=False,
-    )
+    ind = Indicator(company_name=input_response.company, backend=backend)
+    async with prefetched(input_response.company):
+        result = await run_in_threadpool(
+            ind.ema_detail_indicator,
+            ema_canditate=input_response.ema_candidate,
+            cutoff_date=input_response.cutoff_date,
+            save=False,
+        )
     # NOTE - by default result is return as dataframe's index as keys so changing it to symbol
     result = result.set_index(
         "symbol"
@@ -124,12 +227,15 @@ def ema_indicator_detail(input_response: EMAIndicator):
 
 
 @app.post("/api/indicator/ema-crossover-indicator/")
-def ema_crossover_indicator(input_response: EMACrossoverIndicator):
+async def ema_crossover_indicator(input_response: EMACrossoverIndicator):
     """REST API for running ema-crossover-indicator algo strategy"""
-    ind = Indicator(company_name=input_response.company)
-    result = ind.ema_crossover_detail_indicator(
-        ema_canditate=input_response.ema_candidate, save=False
-    )
+    ind = Indicator(company_name=input_response.company, backend=backend)
+    async with prefetched(input_response.company):
+        result = await run_in_threadpool(
+            ind.ema_crossover_detail_indicator,
+            ema_canditate=input_response.ema_candidate,
+            save=False,
+        )
     # NOTE - by default result is return as dataframe's index as keys so changing it to symbol
     result = result.set_index(
         "symbol"
@@ -42,9 +42,13 @@ def momentum_strategy_sub_app():
                 """
             )
             if st.button("Continue"):
+                # NOTE - provisional leaderboard is shown while companies are being scanned
+                leaderboard = st.empty()
                 with st.spinner("Running the query"):
-                    result = sa.relative_momentum(save=False)
-                st.dataframe(result)
+                    result = sa.relative_momentum(
+                        save=False, on_progress=leaderboard.dataframe
+                    )
+                leaderboard.dataframe(result)
                 st.download_button(
                     "Download result",
                     data=result.to_csv(index=False).encode("utf-8"),
@@ -78,14 +82,16 @@ def momentum_strategy_sub_app():
                     """
                 )
                 if st.button("Continue"):
+                    leaderboard = st.empty()
                     with st.spinner("Running the query"):
                         result = sa.relative_momentum(
                             end_date=sub_task_para_date,
                             top_company_count=int(sub_task_para_count),
                             save=False,
                             verbosity=int(sub_task_para_verbosity),
+                            on_progress=leaderboard.dataframe,
                         )
-                    st.dataframe(result)
+                    leaderboard.dataframe(result)
                     st.download_button(
                         "Download result",
                         data=result.to_csv(index=False).encode("utf-8"),
@@ -0,0 +1,124 @@
+"""Packs all the runtime configuration. Every setting can be overridden with an
+environment variable prefixed by `STOCK_ANALYSIS_`, e.g. `STOCK_ANALYSIS_STORE_PATH`.
+"""
+from typing import Optional
+
+from pydantic import BaseSettings, Field
+
+
+class Settings(BaseSettings):
+    """Runtime settings of stock analysis"""
+
+    provider: str = Field(
+        "yahoo",
+        description="Market data provider to use, either 'yahoo', 'yahoo-async' or 'replay'",
+    )
+
+    replay_path: Optional[str] = Field(
+        None, description="Folder having fixtures to be used by 'replay' provider"
+    )
+
+    store_path: Optional[str] = Field(
+        None,
+        description="Root folder of local OHLCV store, if not given data is always downloaded",
+    )
+
+    download_batch_size: int = Field(
+        50, description="No. of symbols downloaded together in a single bulk request"
+    )
+
+    mmap_store_path: Optional[str] = Field(
+        None,
+        description="Folder of memory mapped price store (see `MmapPriceStore`) to read data from",
+    )
+
+    quote_cache_path: Optional[str] = Field(
+        None,
+        description="Folder to persist quote cache, if not given quotes are cached only in memory",
+    )
+
+    quote_cache_ttl: int = Field(
+        3600, description="Time (in seconds) after which a cached quote expires"
+    )
+
+    ema_state_path: Optional[str] = Field(
+        None,
+        description="Folder to persist EMA state, if given daily EMA refresh folds only the new "
+        "records into stored EMA instead of recomputing it",
+    )
+
+    executor_backend: str = Field(
+        "multiprocessing",
+        description="Executor of unit tasks of batch methods, either 'sequential', 'thread', "
+        "'process', 'multiprocessing' or 'async' (see `ExecutorBackend`)",
+    )
+
+    executor_workers: int = Field(
+        -1,
+        description="Max no. of workers of executor backend, negative counts back from no. of "
+        "cores i.e. -1 is all cores",
+    )
+
+    stream_batch_size: int = Field(
+        50,
+        description="No. of companies dispatched together by streaming batch methods, "
+        "provisional result is updated every time a batch finishes",
+    )
+
+    max_in_flight: int = Field(
+        32, description="Max no. of concurrent requests made by 'yahoo-async' provider"
+    )
+
+    http_timeout: float = Field(
+        30,
+        description="Timeout (in seconds) of each request made by 'yahoo-async' provider",
+    )
+
+    request_rate: float = Field(
+        5, description="Max no. of requests per second made to market data provider"
+    )
+
+    request_burst: int = Field(
+        10, description="Max no. of requests allowed in a burst above the request rate"
+    )
+
+    retry_budget: int = Field(
+        3, description="Max no. of retries per symbol within retry budget window"
+    )
+
+    retry_budget_window: float = Field(
+        3600,
+        description="Time (in seconds) after which retry budget of a symbol refills",
+    )
+
+    retry_base_delay: float = Field(
+        1, description="Delay (in seconds) before first retry, doubled on every retry"
+    )
+
+    retry_max_delay: float = Field(
+        30, description="Max delay (in seconds) between two retries"
+    )
+
+    compact_dtypes: bool = Field(
+        False,
+        description="Hold prices as float32, volume as uint32 & labels as categorical to "
+        "reduce memory used by price panels & strategy results",
+    )
+
+    jit: bool = Field(
+        True,
+        description="Use Numba compiled kernels for indicator recurrences when numba is "
+        "installed, else NumPy kernels are used",
+    )
+
+    jit_cache_path: Optional[str] = Field(
+        None,
+        description="Folder to cache compiled kernels in, if not given they are cached next to "
+        "the package source",
+    )
+
+    class Config:
+        env_prefix = "STOCK_ANALYSIS_"
+
+
+settings = Settings()
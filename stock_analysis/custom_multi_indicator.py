@@ -1,12 +1,15 @@
 import datetime
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Union
 
 import pandas as pd
 import yaml
-from joblib import Parallel, delayed, parallel_backend
+from joblib import delayed
 
+from stock_analysis.executors.backend import ExecutorBackend
+from stock_analysis.executors.indicator_graph import IndicatorGraph
 from stock_analysis.executors.parallel import UnitExecutor
+from stock_analysis.utils.dtypes import maybe_compact_frame
 from stock_analysis.utils.helpers import new_folder
 from stock_analysis.utils.logger import set_logger
 
@@ -24,6 +27,13 @@ class CustomMultiIndicator(UnitExecutor):
         path ([str, optional]): Path to company yaml/json. Either path or company_name can be used.
         company_name ([List, optional]): List of company name. If path is used then this is obsolete
         as 'path' preside over 'company_name'
+        prefetch ([Union[bool, str], optional]): Bulk download data of all companies before running
+        a batch method instead of downloading one company at a time, "shared" loads it once in
+        shared memory for all workers (see `DataRetrieve.shared`), not supported by `process`
+        backend. Default to False.
+        backend ([Union[str, ExecutorBackend], optional]): Executor of unit tasks of batch methods,
+        either a mode (see `ExecutorBackend`) or a backend with its no. of workers. Default to None
+        i.e. configured backend.
 
     Example:
     ```python
@@ -34,6 +44,8 @@ class CustomMultiIndicator(UnitExecutor):
 
     path: Optional[str] = None
     company_name: Optional[List] = None
+    prefetch: Union[bool, str] = False
+    backend: Optional[Union[str, ExecutorBackend]] = None
 
     def __post_init__(self):
         if self.path is not None:
@@ -49,7 +61,8 @@ class CustomMultiIndicator(UnitExecutor):
         export_path: str = ".",
         verbosity: int = 1,
     ) -> Optional[pd.DataFrame]:
-        """Apply indicator based on user selected indicator
+        """Apply indicator based on user selected indicator. Action of an indicator is given only if
+        turnover, i.e. mean volume of the last `period` records times the indicator, is above 1 cr.
 
         Args:
             indicators (List[str]): list of all the indicators that must be applied
@@ -58,6 +71,9 @@ class CustomMultiIndicator(UnitExecutor):
             Defaults to ".".
             verbosity (int, optional): level of detailed to be logged. Defaults to 1.
 
+        Raises:
+            ValueError: If an indicator is not one of `INDICATORS` of `IndicatorGraph`
+
         Example:
         ```python
         from stock_analysis.custom_multi_indicator import CustomMultiIndicator
@@ -67,10 +83,14 @@ class CustomMultiIndicator(UnitExecutor):
         Returns:
             Optional[pd.DataFrame]: compiled results of all selected indicators
         """
-        with parallel_backend(n_jobs=-1, backend="multiprocessing"):
-            result = Parallel()(
-                delayed(self.unit_custom_indicator)(indicators, company)
-                for company in self.data["company"]
+        # NOTE - graph is built once & run once per company, so every company is retrieved
+        # once whatever the no. of selected indicators
+        graph = IndicatorGraph.build(indicators)
+        self._prefetch_quote()
+        with self._prefetch(start_date=graph.start_date):
+            result = self._backend().run(
+                (delayed(graph.run)(company) for company in self.data["company"]),
+                companies=self.data["company"],
             )
 
         multi_choice_df = pd.DataFrame(result)
@@ -93,4 +113,4 @@ class CustomMultiIndicator(UnitExecutor):
                     f"Save at {export_path}/multi_choice_indicator_{now_strting}.csv"
                 )
         else:
-            return multi_choice_df
+            return maybe_compact_frame(multi_choice_df)
@@ -1,17 +1,83 @@
+import asyncio
+import contextlib
 import datetime
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import pandas as pd
-import yfinance as yf
-from pandas_datareader import data as pdr
 
-yf.pdr_override()
+from stock_analysis.config import settings
+from stock_analysis.providers.base import (
+    MarketDataProvider,
+    ProviderError,
+    get_provider,
+)
+from stock_analysis.providers.scheduler import RequestScheduler, scheduler
+from stock_analysis.storage.mmap_store import MmapPriceStore
+from stock_analysis.storage.ohlcv_store import OHLCVStore
+from stock_analysis.storage.quote_cache import QuoteCache
+from stock_analysis.storage.shared_store import SharedPriceStore
+from stock_analysis.utils.dtypes import maybe_compact_ohlcv
+from stock_analysis.utils.helpers import create_chunks
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+T = TypeVar("T")
 
 
 class DataRetrieve:
     """
-    Import Stock data using Yahoo Finance Api
+    Import Stock data using market data provider, which is Yahoo Finance Api by default. Provider
+    is resolved at runtime either with `STOCK_ANALYSIS_PROVIDER` env variable or
+    `DataRetrieve.use_provider`. If a local store is configured (either with
+    `STOCK_ANALYSIS_STORE_PATH` env variable or `DataRetrieve.use_store`) then data is read from
+    the store first & only the records after last stored date are downloaded. If a memory mapped
+    store is configured (either with `STOCK_ANALYSIS_MMAP_STORE_PATH` env variable or
+    `DataRetrieve.use_mmap_store`) then data of symbols present in it is served from it as is,
+    without any refresh, i.e. records after the store was built are missing till it is rebuilt.
+    Data held in memory (prefetched, shared or memory mapped) is served without copying its
+    values, so callers must not write into them. If compact dtypes are enabled (with
+    `STOCK_ANALYSIS_COMPACT_DTYPES` env variable) then data is returned with float32 prices &
+    uint32 volume. Every download goes through the request scheduler, which paces requests under
+    upstream rate limit & retries throttled ones with backoff. Data loaded with
+    `DataRetrieve.shared` is served from shared memory, by worker processes too.
     """
 
+    provider: Optional[MarketDataProvider] = None
+    scheduler: RequestScheduler = scheduler
+
+    store: Optional[OHLCVStore] = (
+        OHLCVStore(settings.store_path) if settings.store_path is not None else None
+    )
+    mmap_store: Optional[MmapPriceStore] = (
+        MmapPriceStore(settings.mmap_store_path)
+        if settings.mmap_store_path is not None
+        else None
+    )
+    quote_cache: QuoteCache = QuoteCache(
+        settings.quote_cache_path, ttl=settings.quote_cache_ttl
+    )
+    # NOTE - prefetched data is kept at class level (and not on strategy object), so that forked
+    # workers inherit it instead of receiving it pickled along with every task
+    _prefetched: Dict[
+        str,
+        Tuple[Optional[datetime.datetime], Optional[datetime.datetime], pd.DataFrame],
+    ] = {}
+    _shared: Optional[
+        Tuple[
+            Optional[datetime.datetime], Optional[datetime.datetime], SharedPriceStore
+        ]
+    ] = None
+
     # def __init__(self, path: str):
     #     """
     #     Update or create new csv using Yahoo Finance Api
@@ -22,6 +88,118 @@ class DataRetrieve:
     #         path of older csv to be updated or to save new csv
     #     """
     #     self.path = path
+    @classmethod
+    def use_provider(cls, provider: Union[str, MarketDataProvider, None]):
+        """Set market data provider to be used by all retrieval
+
+        Args:
+            provider (Union[str, MarketDataProvider, None]): either provider instance or its name
+            (see `get_provider`), None resets it to `STOCK_ANALYSIS_PROVIDER`
+        """
+        cls.provider = get_provider(provider) if isinstance(provider, str) else provider
+
+    @classmethod
+    def _provider(cls) -> MarketDataProvider:
+        if cls.provider is None:
+            cls.provider = get_provider(settings.provider)
+        return cls.provider
+
+    @classmethod
+    def _scheduled(
+        cls, symbols: List[str], request: Callable[[], T], tokens: int = 1
+    ) -> T:
+        """Run request through scheduler, unless provider schedules its requests itself"""
+        if getattr(cls._provider(), "self_scheduled", False):
+            return request()
+        return cls.scheduler.run(symbols, request, tokens=tokens)
+
+    @classmethod
+    def request_stats(cls) -> Dict[str, int]:
+        """No. of requests made, throttled by upstream, retried & failed after retries"""
+        return cls.scheduler.stats()
+
+    @classmethod
+    def _download(
+        cls,
+        company_name: str,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> pd.DataFrame:
+        provider = cls._provider()
+        return cls._scheduled(
+            [company_name],
+            lambda: provider.history([company_name], start_date, end_date)[
+                company_name
+            ],
+        )
+
+    @classmethod
+    def use_store(cls, path: Optional[str]):
+        """Set local OHLCV store to be used by all retrieval, None disables the store
+
+        Args:
+            path (Optional[str]): root folder of the store
+        """
+        cls.store = OHLCVStore(path) if path is not None else None
+
+    @classmethod
+    def use_mmap_store(cls, path: Optional[str]):
+        """Set memory mapped price store to serve data from, None disables it. Data of symbols
+        present in it is served as is & the local store is not refreshed for them, so it is as
+        recent as the last `MmapPriceStore.build`.
+
+        Args:
+            path (Optional[str]): folder of the store (see `MmapPriceStore.build`)
+        """
+        cls.mmap_store = MmapPriceStore(path) if path is not None else None
+
+    @classmethod
+    def _from_mmap_store(
+        cls,
+        company_name: str,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Data of company from memory mapped store (read only & not refreshed, see
+        `use_mmap_store`), None if store is not used or company is not present in it"""
+        if cls.mmap_store is None:
+            return None
+        return cls.mmap_store.frame(company_name, start_date, end_date)
+
+    @classmethod
+    def _refresh_store(
+        cls, company_name: str, end_date: Optional[datetime.datetime] = None
+    ) -> pd.DataFrame:
+        """Bring stored record of company up to date (or till end date) by downloading only
+        the missing tail, complete history is downloaded only if company is not present in store
+
+        Args:
+            company_name (str): name of company
+            end_date (Optional[datetime.datetime], optional): date till which record is needed.
+            Defaults to None i.e. today.
+
+        Returns:
+            pd.DataFrame: complete stored record of company
+        """
+        last_date = cls.store.last_date(company_name)
+        if last_date is None:
+            data = cls._download(company_name)
+            if data.empty:
+                return data
+            return cls.store.append(company_name, data)
+
+        stored = cls.store.read(company_name)
+        # NOTE - end date is exclusive, so nothing to download if it is within stored record
+        if end_date is not None and pd.Timestamp(end_date) <= last_date + pd.Timedelta(
+            days=1
+        ):
+            return stored
+        # NOTE - last stored record can be of incomplete trading session so it is downloaded again
+        tail = cls._download(company_name, start_date=last_date)
+        if tail.empty:
+            return stored
+        return cls.store.append(company_name, tail)
+
     @classmethod
     def single_company_specific(
         cls,
@@ -46,16 +224,28 @@ class DataRetrieve:
         Returns
         -------
         pd.DataFrame
-            Data from Yahoo finance
+            Data from market data provider
 
         Raises
         ------
         ValueError
             [description]
         """
-        data = pdr.get_data_yahoo(
-            company_name, start=start_date, end=end_date, progress=False
-        )
+        prefetched = cls._from_held(company_name, start_date, end_date)
+        if prefetched is None:
+            prefetched = cls._from_mmap_store(company_name, start_date, end_date)
+        if prefetched is not None:
+            data = prefetched
+        elif cls.store is not None:
+            data = cls._refresh_store(company_name, end_date=end_date)
+            if not data.empty:
+                data = data[
+                    (data.index >= pd.Timestamp(start_date))
+                    & (data.index < pd.Timestamp(end_date))
+                ]
+        else:
+            data = cls._download(company_name, start_date=start_date, end_date=end_date)
+        data = maybe_compact_ohlcv(data)
 
         if save is True:
             data.to_csv(f"{export_path}/{company_name}.csv")
@@ -80,16 +270,512 @@ class DataRetrieve:
         Returns
         -------
         pd.DataFrame
-            Data from Yahoo finance
+            Data from market data provider
         """
 
-        data = pdr.get_data_yahoo(company_name, progress=False)
+        prefetched = cls._from_held(company_name)
+        if prefetched is None:
+            prefetched = cls._from_mmap_store(company_name)
+        if prefetched is not None:
+            data = prefetched
+        elif cls.store is not None:
+            data = cls._refresh_store(company_name)
+        else:
+            data = cls._download(company_name)
+        data = maybe_compact_ohlcv(data)
 
         if save is True:
             data.to_csv(f"{export_path}/{company_name}.csv")
 
         return data
 
+    @classmethod
+    def _download_many(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Download all given symbols in a single request"""
+        provider = cls._provider()
+        # NOTE - upstream counts every symbol of a bulk request, so it costs one token per symbol
+        return cls._scheduled(
+            symbols,
+            lambda: provider.history(symbols, start_date, end_date),
+            tokens=len(symbols),
+        )
+
+    @classmethod
+    def _refresh_store_many(
+        cls, symbols: List[str], end_date: Optional[datetime.datetime] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Bulk version of `_refresh_store`. Symbols missing from store are downloaded
+        together with complete history & stale symbols are downloaded together from the oldest
+        of their last stored dates.
+        """
+        last_dates = {symbol: cls.store.last_date(symbol) for symbol in symbols}
+        missing = [symbol for symbol, date in last_dates.items() if date is None]
+        stale = [
+            symbol
+            for symbol, date in last_dates.items()
+            if date is not None
+            and (
+                end_date is None or pd.Timestamp(end_date) > date + pd.Timedelta(days=1)
+            )
+        ]
+        panel = {
+            symbol: cls.store.read(symbol)
+            for symbol in symbols
+            if symbol not in missing and symbol not in stale
+        }
+        if missing:
+            for symbol, data in cls._download_many(missing).items():
+                panel[symbol] = data if data.empty else cls.store.append(symbol, data)
+        if stale:
+            start_date = min(last_dates[symbol] for symbol in stale)
+            for symbol, data in cls._download_many(
+                stale, start_date=start_date
+            ).items():
+                panel[symbol] = (
+                    cls.store.read(symbol)
+                    if data.empty
+                    else cls.store.append(symbol, data)
+                )
+        return panel
+
+    @classmethod
+    def many_companies(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Retrive data of many companies, downloading them in batches instead of one request
+        per company
+
+        Args:
+            symbols (List[str]): name of desired companies
+            start_date (Optional[datetime.datetime], optional): Start date. Defaults to None i.e.
+            since IPO.
+            end_date (Optional[datetime.datetime], optional): End date (exclusive). Defaults to
+            None i.e. till today.
+            batch_size (Optional[int], optional): No. of companies per request. Defaults to None
+            i.e. `STOCK_ANALYSIS_DOWNLOAD_BATCH_SIZE`.
+
+        Returns:
+            Dict[str, pd.DataFrame]: Data from market data provider keyed by company name. Company for
+            which no data is available has an empty dataframe. Companies of a batch which cannot be
+            retrieved (e.g. still throttled after retry budget is exhausted) are absent, so that
+            caller can retrieve them company wise.
+
+        Example:
+        ```python
+        from stock_analysis.data_retrieve import DataRetrieve
+        panel = DataRetrieve.many_companies(['TCS.NS', 'INFY.NS'])
+        tcs_df = panel['TCS.NS']
+        ```
+        """
+        batch_size = batch_size or settings.download_batch_size
+        symbols = list(dict.fromkeys(symbols))
+        # NOTE - symbols held in memory (e.g. by an outer fetch plan) or present in memory
+        # mapped store are not downloaded again
+        panel = {}
+        for symbol in symbols:
+            data = cls._from_held(symbol, start_date, end_date)
+            if data is None:
+                data = cls._from_mmap_store(symbol, start_date, end_date)
+            if data is not None:
+                panel[symbol] = data
+        missing = [symbol for symbol in symbols if symbol not in panel]
+        for batch in create_chunks(missing, batch_size):
+            try:
+                if cls.store is not None:
+                    batch_panel = cls._refresh_store_many(batch, end_date=end_date)
+                else:
+                    batch_panel = cls._download_many(
+                        batch, start_date=start_date, end_date=end_date
+                    )
+            except ProviderError as error:
+                # NOTE - one failed batch must not fail the rest, its companies are left out
+                logger.warning(f"Cannot retrive {batch} in bulk, moving on: {error}")
+                continue
+            for symbol, data in batch_panel.items():
+                if cls.store is not None and not data.empty:
+                    if start_date is not None:
+                        data = data[data.index >= pd.Timestamp(start_date)]
+                    if end_date is not None:
+                        data = data[data.index < pd.Timestamp(end_date)]
+                panel[symbol] = data
+        return {
+            symbol: maybe_compact_ohlcv(panel[symbol])
+            for symbol in symbols
+            if symbol in panel
+        }
+
+    @classmethod
+    async def many_companies_async(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Awaitable version of `many_companies`. If provider is async (e.g. `yahoo-async`) &
+        no local store is used then all symbols are fetched concurrently on provider's event loop,
+        else `many_companies` is run in a thread so that caller's event loop is never blocked.
+
+        Example:
+        ```python
+        from stock_analysis.data_retrieve import DataRetrieve
+        panel = await DataRetrieve.many_companies_async(['TCS.NS', 'INFY.NS'])
+        ```
+        """
+        provider = cls._provider()
+        if cls.store is None and hasattr(provider, "ahistory"):
+            panel = await provider.ahistory(
+                list(dict.fromkeys(symbols)), start_date, end_date
+            )
+            return {symbol: maybe_compact_ohlcv(data) for symbol, data in panel.items()}
+        return await asyncio.to_thread(
+            cls.many_companies, symbols, start_date, end_date, batch_size
+        )
+
+    @classmethod
+    def _hold_prefetched(
+        cls,
+        panel: Dict[str, pd.DataFrame],
+        start_date: Optional[datetime.datetime],
+        end_date: Optional[datetime.datetime],
+    ) -> Dict[str, Tuple]:
+        """Hold panel, returns entries it replaced so that nested holds can be released"""
+        previous = {
+            symbol: cls._prefetched[symbol]
+            for symbol in panel
+            if symbol in cls._prefetched
+        }
+        cls._prefetched.update(
+            {symbol: (start_date, end_date, data) for symbol, data in panel.items()}
+        )
+        return previous
+
+    @classmethod
+    def _release_prefetched(
+        cls, panel: Dict[str, pd.DataFrame], previous: Dict[str, Tuple]
+    ):
+        for symbol in panel:
+            cls._prefetched.pop(symbol, None)
+        cls._prefetched.update(previous)
+
+    @classmethod
+    @contextlib.contextmanager
+    def prefetched(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, pd.DataFrame]]:
+        """Bulk download given companies with `many_companies` & serve every `single_company_*`
+        call covered by given date range from memory till the context is open.
+
+        Example:
+        ```python
+        from stock_analysis.data_retrieve import DataRetrieve
+        with DataRetrieve.prefetched(['TCS.NS', 'INFY.NS']):
+            tcs_df = DataRetrieve.single_company_complete('TCS.NS')  # no download
+        ```
+        """
+        panel = cls.many_companies(symbols, start_date, end_date, batch_size)
+        previous = cls._hold_prefetched(panel, start_date, end_date)
+        try:
+            yield panel
+        finally:
+            cls._release_prefetched(panel, previous)
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def aprefetched(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, pd.DataFrame]]:
+        """Async version of `prefetched`, companies are retrieved with `many_companies_async`
+
+        Example:
+        ```python
+        from stock_analysis.data_retrieve import DataRetrieve
+        async with DataRetrieve.aprefetched(['TCS.NS', 'INFY.NS']):
+            tcs_df = DataRetrieve.single_company_complete('TCS.NS')  # no download
+        ```
+        """
+        panel = await cls.many_companies_async(
+            symbols, start_date, end_date, batch_size
+        )
+        previous = cls._hold_prefetched(panel, start_date, end_date)
+        try:
+            yield panel
+        finally:
+            cls._release_prefetched(panel, previous)
+
+    @classmethod
+    @contextlib.contextmanager
+    def shared(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[SharedPriceStore]:
+        """Same as `prefetched`, but companies are loaded once in shared memory (see
+        `SharedPriceStore`). Forked workers map the same memory & workers of warm pool attach to
+        it by name, so no worker receives or holds its own copy of the records.
+
+        Example:
+        ```python
+        from stock_analysis.data_retrieve import DataRetrieve
+        with DataRetrieve.shared(['TCS.NS', 'INFY.NS']):
+            ema_df = Indicator(company_name=['TCS', 'INFY']).ema_indicator()
+        ```
+        """
+        store = cls._held_shared(symbols, start_date, end_date)
+        if store is not None:
+            yield store
+            return
+        store = SharedPriceStore.create(
+            cls.many_companies(symbols, start_date, end_date, batch_size)
+        )
+        previous, cls._shared = cls._shared, (start_date, end_date, store)
+        try:
+            yield store
+        finally:
+            cls._shared = previous
+            store.unlink()
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def ashared(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[SharedPriceStore]:
+        """Async version of `shared`, companies are retrieved with `many_companies_async`
+
+        Example:
+        ```python
+        from stock_analysis.data_retrieve import DataRetrieve
+        async with DataRetrieve.ashared(['TCS.NS', 'INFY.NS']):
+            ema_df = await run_in_threadpool(Indicator(company_name=['TCS', 'INFY']).ema_indicator)
+        ```
+        """
+        store = cls._held_shared(symbols, start_date, end_date)
+        if store is not None:
+            yield store
+            return
+        panel = await cls.many_companies_async(
+            symbols, start_date, end_date, batch_size
+        )
+        store = await asyncio.to_thread(SharedPriceStore.create, panel)
+        previous, cls._shared = cls._shared, (start_date, end_date, store)
+        try:
+            yield store
+        finally:
+            cls._shared = previous
+            store.unlink()
+
+    @classmethod
+    def _held_shared(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Optional[SharedPriceStore]:
+        """Shared memory store already loaded (e.g. by an outer fetch plan) if it has all given
+        symbols over given date range, else None"""
+        if cls._shared is not None and all(
+            symbol in cls._shared[2].offsets
+            and cls._covers(cls._shared[0], cls._shared[1], start_date, end_date)
+            for symbol in symbols
+        ):
+            return cls._shared[2]
+        return None
+
+    @classmethod
+    def held(
+        cls, symbols: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, Tuple], pd.DataFrame, Optional[Tuple]]:
+        """Data held in memory by this process i.e. prefetched records, cached quotes & shared
+        memory store (only its block names), to be handed over to a long lived worker process
+        which was started before it was fetched
+
+        Args:
+            symbols (Optional[List[str]], optional): Hand over records & quotes of these symbols
+            only. Defaults to None i.e. all symbols.
+        """
+        prefetched = (
+            dict(cls._prefetched)
+            if symbols is None
+            else {
+                symbol: cls._prefetched[symbol]
+                for symbol in symbols
+                if symbol in cls._prefetched
+            }
+        )
+        return prefetched, cls.quote_cache.held(symbols), cls._shared
+
+    @classmethod
+    @contextlib.contextmanager
+    def holding(
+        cls, held: Tuple[Dict[str, Tuple], pd.DataFrame, Optional[Tuple]]
+    ) -> Iterator[None]:
+        """Serve data handed over by another process (see `held`) within the context. Data held
+        by this process before the context is restored on exit, so a long lived worker does not
+        keep handed over data after the context."""
+        prefetched, quotes, shared = held
+        previous = {
+            symbol: cls._prefetched[symbol]
+            for symbol in prefetched
+            if symbol in cls._prefetched
+        }
+        cls._prefetched.update(prefetched)
+        previous_shared, cls._shared = cls._shared, shared
+        try:
+            with cls.quote_cache.hold(quotes):
+                yield
+        finally:
+            for symbol in prefetched:
+                cls._prefetched.pop(symbol, None)
+            cls._prefetched.update(previous)
+            cls._shared = previous_shared
+            if shared is not None:
+                shared[2].close()
+
+    @staticmethod
+    def _covers(
+        held_start: Optional[datetime.datetime],
+        held_end: Optional[datetime.datetime],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> bool:
+        """Whether data held between given dates covers the desired date range"""
+        if held_start is not None and (
+            start_date is None or pd.Timestamp(start_date) < pd.Timestamp(held_start)
+        ):
+            return False
+        return held_end is None or (
+            end_date is not None and pd.Timestamp(end_date) <= pd.Timestamp(held_end)
+        )
+
+    @classmethod
+    def _from_held(
+        cls,
+        company_name: str,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Data of company held in memory (prefetched or shared) if it covers given date range,
+        else None"""
+        data = cls._from_prefetched(company_name, start_date, end_date)
+        if data is None:
+            data = cls._from_shared(company_name, start_date, end_date)
+        return data
+
+    @classmethod
+    def _from_shared(
+        cls,
+        company_name: str,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Data of company from shared memory store if it covers given date range, else None"""
+        if cls._shared is None:
+            return None
+        shared_start, shared_end, store = cls._shared
+        if not cls._covers(shared_start, shared_end, start_date, end_date):
+            return None
+        return store.frame(company_name, start_date, end_date)
+
+    @classmethod
+    def _from_prefetched(
+        cls,
+        company_name: str,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Prefetched data of company if it covers given date range, else None"""
+        if company_name not in cls._prefetched:
+            return None
+        prefetched_start, prefetched_end, data = cls._prefetched[company_name]
+        if not cls._covers(prefetched_start, prefetched_end, start_date, end_date):
+            return None
+        begin = 0 if start_date is None else data.index.searchsorted(start_date)
+        stop = len(data) if end_date is None else data.index.searchsorted(end_date)
+        # NOTE - every caller gets a frame of its own, so inplace `dropna` or `reset_index` do
+        # not touch the held frame, but its values are the held ones (not copied). Same as data
+        # served from memory mapped & shared store, values must not be written.
+        return data.iloc[begin:stop].copy(deep=False)
+
+    @classmethod
+    def many_companies_quote(
+        cls, company_names: List[str], batch_size: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Retrive quotes of many companies. Quotes are served from quote cache & only the
+        missing or expired ones are downloaded, in batches.
+
+        Args:
+            company_names (List[str]): name of desired companies
+            batch_size (Optional[int], optional): No. of companies per request. Defaults to None
+            i.e. `STOCK_ANALYSIS_DOWNLOAD_BATCH_SIZE`.
+
+        Returns:
+            pd.DataFrame: Quotes indexed by company name. Company for which quote is not available
+            is absent.
+
+        Example:
+        ```python
+        from stock_analysis.data_retrieve import DataRetrieve
+        quotes = DataRetrieve.many_companies_quote(['TCS.NS', 'INFY.NS'])
+        ```
+        """
+        batch_size = batch_size or settings.download_batch_size
+        _, missing = cls.quote_cache.get(company_names)
+        provider = cls._provider()
+        for batch in create_chunks(missing, batch_size):
+            cls.quote_cache.put(cls._scheduled(batch, lambda: provider.quote(batch)))
+        quotes, _ = cls.quote_cache.get(company_names)
+        return quotes
+
+    @classmethod
+    async def many_companies_quote_async(
+        cls, company_names: List[str], batch_size: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Awaitable version of `many_companies_quote`, missing quotes are fetched concurrently
+        if provider is async (e.g. `yahoo-async`)
+
+        Example:
+        ```python
+        from stock_analysis.data_retrieve import DataRetrieve
+        quotes = await DataRetrieve.many_companies_quote_async(['TCS.NS', 'INFY.NS'])
+        ```
+        """
+        provider = cls._provider()
+        if not hasattr(provider, "aquote"):
+            return await asyncio.to_thread(
+                cls.many_companies_quote, company_names, batch_size
+            )
+        _, missing = cls.quote_cache.get(company_names)
+        if missing:
+            cls.quote_cache.put(await provider.aquote(missing))
+        quotes, _ = cls.quote_cache.get(company_names)
+        return quotes
+
     @classmethod
     def single_company_quote(cls, company_name: str) -> pd.DataFrame:
-        return pdr.get_quote_yahoo(company_name)
+        quote = cls.many_companies_quote([company_name])
+        if quote.empty:
+            raise KeyError(f"Quote not available for {company_name}")
+        return quote
@@ -0,0 +1,255 @@
+"""Executor backend used by batch methods to run their unit tasks. Mode & no. of workers can be
+given per strategy object or read from config, so that fetch bound runs use threads, compute bound
+runs use processes & a single call does not take every core of a shared host.
+"""
+import asyncio
+import contextlib
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from joblib import Parallel, effective_n_jobs
+
+from stock_analysis.config import settings
+from stock_analysis.data_retrieve import DataRetrieve
+from stock_analysis.utils.helpers import create_chunks
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+
+# NOTE - joblib backend of every mode running on a worker pool
+JOBLIB_BACKENDS = {
+    "thread": "threading",
+    "process": "loky",
+    "multiprocessing": "multiprocessing",
+}
+MODES = ("sequential", "async", "pool", *JOBLIB_BACKENDS)
+
+Task = Tuple[Callable, tuple, dict]
+
+# NOTE - process wide warm pool, shared by every `pool` mode backend of the process
+_worker_pool: Optional[ProcessPoolExecutor] = None
+_worker_pool_size = 0
+
+
+def _warm_up():
+    """Import heavy modules, run in parent & in every worker of warm pool"""
+    # pylint: disable=import-outside-toplevel, unused-import
+    import stock_analysis.custom_multi_indicator  # noqa: F401
+    import stock_analysis.indicator  # noqa: F401
+    import stock_analysis.momentum_strategy  # noqa: F401
+
+
+def _ping(_: int) -> bool:
+    return True
+
+
+def start_worker_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Start process wide warm worker pool (if not running) used by `pool` mode backends. Heavy
+    modules are imported before workers are started, so a batch submitted to the pool pays
+    neither process start up nor import cost. Meant to be called once on app start up.
+
+    Args:
+        workers (Optional[int], optional): No. of worker processes, negative counts back from no.
+        of cores (-1 is all cores). Defaults to None i.e. `STOCK_ANALYSIS_EXECUTOR_WORKERS`.
+
+    Returns:
+        ProcessPoolExecutor: running pool
+
+    Example:
+    ```python
+    from stock_analysis.executors.backend import start_worker_pool, shutdown_worker_pool
+    start_worker_pool(8)
+    sa = MomentumStrategy(backend='pool')
+    ...
+    shutdown_worker_pool()
+    ```
+    """
+    global _worker_pool, _worker_pool_size  # pylint: disable=global-statement
+    if _worker_pool is None:
+        _warm_up()
+        _worker_pool_size = effective_n_jobs(
+            settings.executor_workers if workers is None else workers
+        )
+        _worker_pool = ProcessPoolExecutor(
+            max_workers=_worker_pool_size, initializer=_warm_up
+        )
+        # NOTE - workers are started on demand, so a task per worker starts all of them now
+        list(_worker_pool.map(_ping, range(_worker_pool_size)))
+        logger.debug(f"Started warm worker pool of {_worker_pool_size} workers")
+    return _worker_pool
+
+
+def shutdown_worker_pool():
+    """Shut down warm worker pool after running tasks are done, no-op if it is not running"""
+    global _worker_pool, _worker_pool_size  # pylint: disable=global-statement
+    if _worker_pool is not None:
+        _worker_pool.shutdown()
+        _worker_pool, _worker_pool_size = None, 0
+
+
+def _run_held(tasks: List[Task], held: tuple) -> List[Any]:
+    """Run chunk of tasks in a warm worker, with data held by the submitting process"""
+    with DataRetrieve.holding(held):
+        return [ExecutorBackend._call(task) for task in tasks]
+
+
+@dataclass
+class ExecutorBackend:
+    """Runs unit tasks (created with `joblib.delayed`) of a batch method & returns their results
+    in order of tasks.
+
+    Modes:
+    - `sequential`: one task after another in calling thread, e.g. for debugging
+    - `thread`: thread pool, for fetch bound runs
+    - `process`: process pool (loky), for compute bound runs. Workers are fresh processes, so data
+    prefetched by parent is not shared with them.
+    - `multiprocessing`: forked process pool, workers share data prefetched by parent
+    - `async`: every task in a worker thread of an event loop, at most `workers` at once
+    - `pool`: process wide warm pool (see `start_worker_pool`) shared by every call, e.g. for
+    API. Tasks are split in `workers` chunks & data prefetched by caller is sent with every chunk,
+    since workers were started before it was fetched. Only data of companies of the chunk is sent
+    if companies of tasks are given to `run`.
+
+    Args:
+        mode (Optional[str], optional): One of above modes. Defaults to None i.e.
+        `STOCK_ANALYSIS_EXECUTOR_BACKEND`.
+        workers (Optional[int], optional): Max no. of workers, negative counts back from no. of
+        cores (-1 is all cores). Defaults to None i.e. `STOCK_ANALYSIS_EXECUTOR_WORKERS`.
+
+    Raises:
+        ValueError: If mode is not one of above modes
+
+    Example:
+    ```python
+    from joblib import delayed
+    from stock_analysis.executors.backend import ExecutorBackend
+    backend = ExecutorBackend('thread', workers=8)
+    result = backend.run(delayed(pow)(idx, 2) for idx in range(10))
+    ```
+    """
+
+    mode: Optional[str] = None
+    workers: Optional[int] = None
+
+    def __post_init__(self):
+        self.mode = settings.executor_backend if self.mode is None else self.mode
+        self.workers = (
+            settings.executor_workers if self.workers is None else self.workers
+        )
+        if self.mode not in MODES:
+            raise ValueError(
+                f"Invalid executor backend {self.mode}, must be one of {MODES}"
+            )
+
+    @classmethod
+    def of(cls, backend: Optional[Union[str, "ExecutorBackend"]]) -> "ExecutorBackend":
+        """Backend as it is, of given mode (with configured workers) or configured backend"""
+        if isinstance(backend, ExecutorBackend):
+            return backend
+        return cls(mode=backend)
+
+    @property
+    def n_jobs(self) -> int:
+        """Actual no. of workers"""
+        if self.mode == "sequential":
+            return 1
+        if self.mode == "pool":
+            start_worker_pool()
+            return min(effective_n_jobs(self.workers), _worker_pool_size)
+        return effective_n_jobs(self.workers)
+
+    @staticmethod
+    def _call(task: Task) -> Any:
+        func, args, kwargs = task
+        return func(*args, **kwargs)
+
+    async def _gather(self, tasks: Iterable[Task]) -> List[Any]:
+        limit = asyncio.Semaphore(self.n_jobs)
+
+        async def run_task(task: Task) -> Any:
+            async with limit:
+                return await asyncio.to_thread(self._call, task)
+
+        return await asyncio.gather(*(run_task(task) for task in tasks))
+
+    @contextlib.contextmanager
+    def session(self) -> Iterator[Callable[..., List[Any]]]:
+        """Runner which keeps the worker pool alive for many batches of tasks, it takes same
+        arguments as `run`
+
+        Example:
+        ```python
+        with backend.session() as run:
+            for batch in batches:
+                result = run((delayed(func)(item) for item in batch), companies=batch)
+        ```
+        """
+        if self.mode in JOBLIB_BACKENDS:
+            with Parallel(
+                n_jobs=self.workers, backend=JOBLIB_BACKENDS[self.mode]
+            ) as parallel:
+
+                def run(  # pylint: disable=unused-argument
+                    tasks: Iterable[Task], companies: Optional[Sequence[str]] = None
+                ) -> List[Any]:
+                    # NOTE - companies are needed by `pool` mode only
+                    return parallel(tasks)
+
+                yield run
+        else:
+            yield self.run
+
+    def run(
+        self, tasks: Iterable[Task], companies: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Run all tasks
+
+        Args:
+            tasks (Iterable[Task]): tasks created with `joblib.delayed`
+            companies (Optional[Sequence[str]], optional): Company (without `.NS`) of every task,
+            in order of tasks. Used by `pool` mode to send a chunk only the data of its own
+            companies. Defaults to None i.e. every chunk is sent all data.
+
+        Returns:
+            List[Any]: result of every task, in order of tasks
+        """
+        if self.mode == "sequential":
+            return [self._call(task) for task in tasks]
+        if self.mode == "async":
+            # NOTE - strategies run in a thread of their own (e.g. API's thread pool), so a new
+            # event loop is started for the batch
+            return asyncio.run(self._gather(tasks))
+        if self.mode == "pool":
+            tasks = list(tasks)
+            if not tasks:
+                return []
+            pool = start_worker_pool()
+            size = math.ceil(len(tasks) / self.n_jobs)
+            chunks = list(create_chunks(tasks, size))
+            symbols = (
+                [None] * len(chunks)
+                if companies is None
+                else [
+                    [f"{company}.NS" for company in chunk]
+                    for chunk in create_chunks(list(companies), size)
+                ]
+            )
+            futures = [
+                pool.submit(_run_held, chunk, DataRetrieve.held(chunk_symbols))
+                for chunk, chunk_symbols in zip(chunks, symbols)
+            ]
+            return [result for future in futures for result in future.result()]
+        with self.session() as run:
+            return run(tasks)
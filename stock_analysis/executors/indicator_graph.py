@@ -0,0 +1,259 @@
+"""Dependency graph of indicators selected for a custom run. Every indicator is declared as steps
+over shared data inputs (records & quote of a company) & shared intermediates (e.g. mean volume &
+turnover), so a step needed by many indicators is computed once per company & selecting more
+indicators adds compute only, not network fetches.
+"""
+import datetime
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import dateutil
+import numpy as np
+import pandas as pd
+
+from stock_analysis.data_retrieve import DataRetrieve
+from stock_analysis.providers.base import ProviderError
+from stock_analysis.utils.fetch_planner import plan_ema_start_date
+from stock_analysis.utils.formula_helpers import exponential_moving_average
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+
+# NOTE - errors of a step mean record of company is not sufficient for the indicator
+STEP_ERRORS = (
+    KeyError,
+    IndexError,
+    ValueError,
+    TypeError,
+    ZeroDivisionError,
+    ProviderError,
+)
+
+
+@dataclass(frozen=True)
+class Step:
+    """Step of an indicator graph, i.e. function of outputs of its input steps & parameters.
+    Steps are compared by function, inputs & parameters, so the same step declared by many
+    indicators is a single node of the graph.
+
+    Args:
+        func (Callable[..., Any]): called with output of every input step & parameters
+        inputs (Tuple[Step, ...], optional): steps whose outputs are needed. Defaults to ().
+        params (Tuple[Tuple[str, Any], ...], optional): keyword parameters. Defaults to ().
+    """
+
+    func: Callable[..., Any]
+    inputs: Tuple["Step", ...] = ()
+    params: Tuple[Tuple[str, Any], ...] = ()
+
+
+def step(func: Callable[..., Any], *inputs: Step, **params: Any) -> Step:
+    """Declare a step, see `Step`"""
+    return Step(func, inputs, tuple(sorted(params.items())))
+
+
+def _symbol(company: str) -> str:
+    return company
+
+
+# NOTE - root of every graph, its output is the company the graph is run for
+SYMBOL = step(_symbol)
+
+
+def _records(
+    company: str,
+    start_date: datetime.datetime,
+    end_date: Optional[datetime.datetime] = None,
+) -> pd.DataFrame:
+    logger.info(f"Retriving data for {company}")
+    return DataRetrieve.single_company_specific(
+        company_name=f"{company}.NS",
+        start_date=start_date,
+        end_date=end_date or datetime.datetime.now(),
+    ).dropna(subset=["Close", "Volume"])
+
+
+def _long_name(company: str) -> str:
+    logger.info(f"Retriving Detail Quote data for {company}")
+    return DataRetrieve.single_company_quote(f"{company}.NS")["longName"].iloc[0]
+
+
+def _close(records: pd.DataFrame) -> pd.Series:
+    return records["Close"].astype(np.float64)
+
+
+def _volume(records: pd.DataFrame) -> pd.Series:
+    return records["Volume"].astype(np.float64)
+
+
+def _last(series: pd.Series) -> float:
+    return series.iloc[-1]
+
+
+def _last_date(series: pd.Series) -> str:
+    return series.index[-1].strftime("%d-%m-%Y")
+
+
+def _sma(close: pd.Series, period: int) -> float:
+    if len(close) < period:
+        raise ValueError(f"Less than {period} records")
+    return close.iloc[-period:].mean()
+
+
+def _ema(records: pd.DataFrame, period: int) -> float:
+    return exponential_moving_average(records, period, verbosity=0)
+
+
+def _mean_volume(volume: pd.Series, period: int) -> float:
+    # NOTE - mean of the last `period` records, same for dma & ema (see `unit_ema_absolute`)
+    if len(volume) < period:
+        raise ValueError(f"Less than {period} records")
+    return volume.iloc[-period:].mean()
+
+
+def _turnover(mean_volume: float, price: float) -> float:
+    # NOTE - turnover needs to be relative to 1 cr so dividing it by 1 cr
+    return mean_volume * price / 10000000
+
+
+def _action(price: float, average: float, turnover: float, cutoff: int) -> str:
+    buy = average + (average * (cutoff / 100))
+    sell = average - (average * (cutoff / 100))
+    if turnover > 1:
+        if buy < price:
+            return "buy"
+        if sell > price:
+            return "sell"
+        if sell < price < buy:
+            return "no action"
+    return "Invalid"
+
+
+def _dma_start_date() -> datetime.datetime:
+    return datetime.datetime.today() - dateutil.relativedelta.relativedelta(months=18)
+
+
+def _dma_outputs(
+    records: Step, close: Step, volume: Step, period: int = 200, cutoff: int = 5
+) -> Dict[str, Step]:
+    sma = step(_sma, close, period=period)
+    turnover = step(_turnover, step(_mean_volume, volume, period=period), sma)
+    return {
+        "dma": sma,
+        "dma action": step(_action, step(_last, close), sma, turnover, cutoff=cutoff),
+    }
+
+
+def _ema_start_date(period: int = 50) -> datetime.datetime:
+    return plan_ema_start_date((period,))
+
+
+def _ema_outputs(
+    records: Step, close: Step, volume: Step, period: int = 50, cutoff: int = 5
+) -> Dict[str, Step]:
+    ema = step(_ema, records, period=period)
+    turnover = step(_turnover, step(_mean_volume, volume, period=period), ema)
+    return {
+        "ema": ema,
+        "ema action": step(_action, step(_last, close), ema, turnover, cutoff=cutoff),
+    }
+
+
+# NOTE - start date of records every indicator needs & its output steps over shared inputs
+INDICATORS: Dict[str, Tuple[Callable[[], datetime.datetime], Callable]] = {
+    "daily moving average": (_dma_start_date, _dma_outputs),
+    "exponential moving average": (_ema_start_date, _ema_outputs),
+}
+
+
+@dataclass
+class IndicatorGraph:
+    """Graph of selected indicators, run once per company. Records of company are retrieved once
+    over the widest range any indicator needs & its quote is retrieved once.
+
+    Args:
+        outputs (Dict[str, Step]): Step giving every output column
+        start_date (datetime.datetime): Start date of records needed by all indicators
+
+    Example:
+    ```python
+    from stock_analysis.executors.indicator_graph import IndicatorGraph
+    graph = IndicatorGraph.build(["daily moving average", "exponential moving average"])
+    result = graph.run('TCS')
+    ```
+    """
+
+    outputs: Dict[str, Step]
+    start_date: datetime.datetime
+
+    @classmethod
+    def build(cls, indicators: Sequence[str]) -> "IndicatorGraph":
+        """Graph of given indicators over shared inputs
+
+        Args:
+            indicators (Sequence[str]): names of indicators, see `INDICATORS`
+
+        Returns:
+            IndicatorGraph: graph of all indicators
+
+        Raises:
+            ValueError: If an indicator is not one of `INDICATORS`
+        """
+        unknown = [indicator for indicator in indicators if indicator not in INDICATORS]
+        if unknown:
+            raise ValueError(
+                f"Invalid indicators {unknown}, must be one of {list(INDICATORS)}"
+            )
+        start_date = min(
+            (INDICATORS[indicator][0]() for indicator in indicators),
+            default=datetime.datetime.today(),
+        )
+        records = step(_records, SYMBOL, start_date=start_date)
+        close, volume = step(_close, records), step(_volume, records)
+        outputs = {"comany": step(_long_name, SYMBOL), "price": step(_last, close)}
+        for indicator in indicators:
+            outputs.update(INDICATORS[indicator][1](records, close, volume))
+        outputs["price date"] = step(_last_date, close)
+        return cls(outputs=outputs, start_date=start_date)
+
+    @staticmethod
+    def _evaluate(node: Step, cache: Dict[Step, Any]) -> Any:
+        """Output of step, computing it & its inputs only if not computed yet. Error of a step is
+        cached too, so it is raised to every dependent step without being retried."""
+        if node not in cache:
+            try:
+                cache[node] = node.func(
+                    *(IndicatorGraph._evaluate(item, cache) for item in node.inputs),
+                    **dict(node.params),
+                )
+            except STEP_ERRORS as error:
+                cache[node] = error
+        if isinstance(cache[node], Exception):
+            raise cache[node]
+        return cache[node]
+
+    def run(self, company: str) -> Dict[str, Any]:
+        """Output of every indicator for company, `pd.NA` for output which cannot be computed
+
+        Args:
+            company (str): company symbol without `.NS`
+
+        Returns:
+            Dict[str, Any]: symbol, company name, price (with its date) & indicator outputs
+        """
+        cache: Dict[Step, Any] = {SYMBOL: company}
+        result = {}
+        for name, node in self.outputs.items():
+            try:
+                result[name] = self._evaluate(node, cache)
+            except STEP_ERRORS:
+                result[name] = pd.NA
+        if any(value is pd.NA for value in result.values()):
+            logger.warning(f"{company} has less record than minimum required")
+        price_date = result.pop("price date")
+        return {
+            "symbol": company,
+            "comany": result.pop("comany"),
+            f"price ({price_date})": result.pop("price"),
+            **result,
+        }
@@ -0,0 +1,609 @@
+"""Panel engine computing indicators of whole universe at once. Records of all companies are
+aligned into a (dates x symbols) matrix, so every indicator is a handful of vectorized operations
+over all the columns instead of one pickled task per company.
+"""
+import datetime
+import itertools
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import dateutil
+import numpy as np
+import pandas as pd
+
+from stock_analysis.data_retrieve import DataRetrieve
+from stock_analysis.providers.base import ProviderError
+from stock_analysis.utils.fetch_planner import plan_ema_start_date
+from stock_analysis.utils.formula_helpers import ema_matrix, rolling_sum
+from stock_analysis.utils.helpers import (
+    RETURN_HORIZONS,
+    asof_positions,
+    horizon_start_dates,
+)
+from stock_analysis.utils.logger import set_logger
+
+now_string = datetime.datetime.now().strftime("%d-%m-%Y")
+logger = set_logger()
+
+
+@dataclass
+class PricePanel:
+    """Close price & volume of many symbols aligned on union of their dates. Dates on which a
+    symbol has no record are NaN.
+
+    Args:
+        dates (pd.DatetimeIndex): Sorted dates, i.e. rows of the matrices
+        symbols (List[str]): Symbols, i.e. columns of the matrices
+        close (np.ndarray): Close price of shape (dates, symbols)
+        volume (np.ndarray): Volume of shape (dates, symbols)
+
+    Example:
+    ```python
+    from stock_analysis.executors.panel import PricePanel
+    panel = PricePanel.retrieve(['TCS.NS', 'INFY.NS'], start_date=datetime.datetime(2021, 1, 1))
+    ema50 = panel.ema((50,))[50]
+    ```
+    """
+
+    dates: pd.DatetimeIndex
+    symbols: List[str]
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame]) -> "PricePanel":
+        """Align records of many symbols into a panel
+
+        Args:
+            frames (Dict[str, pd.DataFrame]): OHLCV records indexed by date keyed by symbol
+
+        Returns:
+            PricePanel: panel of all symbols having at least one record
+        """
+        return cls.from_columns(
+            {symbol: cls._frame_columns(data) for symbol, data in frames.items()}
+        )
+
+    @staticmethod
+    def _frame_columns(data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        if data.empty:
+            return {"Date": np.array([], dtype="datetime64[ns]")}
+        # NOTE - records with missing values are dropped, same as unit executors do
+        data = data[~data.index.duplicated(keep="last")].dropna(
+            subset=["Close", "Volume"]
+        )
+        return {
+            "Date": data.index.values,
+            "Close": data["Close"].to_numpy(),
+            "Volume": data["Volume"].to_numpy(),
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Dict[str, np.ndarray]]) -> "PricePanel":
+        """Align dates, close price & volume of many symbols into a panel. Arrays are read as
+        they are (e.g. zero-copy views of a price store) & written once into the matrices.
+
+        Args:
+            columns (Dict[str, Dict[str, np.ndarray]]): `Date`, `Close` & `Volume` arrays keyed
+            by symbol, dates of a symbol must be unique
+
+        Returns:
+            PricePanel: panel of all symbols having at least one record
+        """
+        columns = {
+            symbol: arrays for symbol, arrays in columns.items() if len(arrays["Date"])
+        }
+        dates = (
+            np.unique(np.concatenate([arrays["Date"] for arrays in columns.values()]))
+            if columns
+            else np.array([], dtype="datetime64[ns]")
+        )
+        close = np.full((len(dates), len(columns)), np.nan)
+        volume = np.full((len(dates), len(columns)), np.nan)
+        for column, arrays in enumerate(columns.values()):
+            rows = dates.searchsorted(arrays["Date"])
+            close[rows, column] = arrays["Close"]
+            volume[rows, column] = arrays["Volume"]
+        return cls(
+            dates=pd.DatetimeIndex(dates, name="Date"),
+            symbols=list(columns),
+            close=close,
+            volume=volume,
+        )
+
+    @classmethod
+    def retrieve(
+        cls,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> "PricePanel":
+        """Panel of given symbols, symbols present in memory mapped store are read from its views
+        & the rest are retrieved in bulk with `DataRetrieve.many_companies`. Symbols which cannot
+        be retrieved in bulk are retrieved one at a time, symbol which cannot be retrieved at all
+        has no column."""
+        store = DataRetrieve.mmap_store
+        stored = (
+            set()
+            if store is None
+            else {symbol for symbol in symbols if symbol in store.offsets}
+        )
+        frames = DataRetrieve.many_companies(
+            [symbol for symbol in symbols if symbol not in stored], start_date, end_date
+        )
+        columns = {}
+        for symbol in symbols:
+            if symbol in stored:
+                columns[symbol] = store.views(
+                    symbol, ("Date", "Close", "Volume"), start_date, end_date
+                )
+                continue
+            if symbol not in frames:
+                try:
+                    frames[symbol] = DataRetrieve.single_company_specific(
+                        symbol, start_date, end_date
+                    )
+                except (ProviderError, KeyError, ValueError):
+                    logger.warning(f"Cannot retrive data for {symbol}, moving on")
+                    continue
+            columns[symbol] = cls._frame_columns(frames[symbol])
+        return cls.from_columns(columns)
+
+    def _rows(self) -> np.ndarray:
+        return np.arange(len(self.dates))[:, None]
+
+    def _last_rows(self) -> np.ndarray:
+        """Row of latest record of every symbol on or before every date, -1 if none"""
+        valid = ~np.isnan(self.close)
+        return np.maximum.accumulate(np.where(valid, self._rows(), -1), axis=0)
+
+    def _at(
+        self, matrix: np.ndarray, rows: np.ndarray
+    ) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+        """Value of every symbol (columns) at its own row & date of the row, NaN & NaT where row
+        is -1"""
+        if not len(self.dates):
+            return np.full(len(self.symbols), np.nan), pd.DatetimeIndex(
+                [pd.NaT] * len(self.symbols)
+            )
+        found = rows >= 0
+        values = np.where(found, matrix[rows, np.arange(len(self.symbols))], np.nan)
+        dates = pd.DatetimeIndex(
+            np.where(found, self.dates.values[rows], np.datetime64("NaT"))
+        )
+        return values, dates
+
+    def _rank_rows(self) -> np.ndarray:
+        """Row of k-th record (1-based, rows) of every symbol (columns), -1 if none"""
+        valid = ~np.isnan(self.close)
+        rank_rows = np.full((len(self.dates) + 1, len(self.symbols)), -1)
+        rows, columns = np.nonzero(valid)
+        rank_rows[np.cumsum(valid, axis=0)[rows, columns], columns] = rows
+        return rank_rows
+
+    def asof(self, cutoff_date: Union[str, datetime.datetime] = "today") -> int:
+        """Row of latest date on or before cutoff date, -1 if all dates are after it"""
+        if cutoff_date == "today":
+            return len(self.dates) - 1
+        return int(asof_positions(self.dates, cutoff_date)[0])
+
+    def latest(
+        self, matrix: np.ndarray, cutoff_date: Union[str, datetime.datetime] = "today"
+    ) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+        """Latest value of every symbol on or before cutoff date
+
+        Args:
+            matrix (np.ndarray): values of shape (dates, symbols), e.g. `close` or `ema`
+            cutoff_date (Union[str, datetime.datetime], optional): Desired date. Defaults to
+            "today" i.e. latest record.
+
+        Returns:
+            Tuple[np.ndarray, pd.DatetimeIndex]: value of every symbol & date it is recorded on,
+            NaN & NaT for symbol having no record till cutoff date
+        """
+        row = self.asof(cutoff_date)
+        if row < 0:
+            return np.full(len(self.symbols), np.nan), pd.DatetimeIndex(
+                [pd.NaT] * len(self.symbols)
+            )
+        rows = self._last_rows()[row]
+        return self._at(matrix, rows)
+
+    def latest_many(
+        self, matrix: np.ndarray, cutoff_dates: pd.DatetimeIndex
+    ) -> np.ndarray:
+        """Latest value of every symbol on or before every cutoff date
+
+        Returns:
+            np.ndarray: values of shape (cutoff dates, symbols), NaN for symbol having no record
+            till the cutoff date
+        """
+        rows = asof_positions(self.dates, cutoff_dates)
+        rows = np.where(rows[:, None] >= 0, self._last_rows()[np.maximum(rows, 0)], -1)
+        return np.where(rows >= 0, matrix[rows, np.arange(len(self.symbols))], np.nan)
+
+    def ema(
+        self, periods: Sequence[int], smoothing_factor: int = 2
+    ) -> Dict[int, np.ndarray]:
+        """EMA of every symbol for many periods, computed in a single sweep over the panel
+
+        Returns:
+            Dict[int, np.ndarray]: ema of shape (dates, symbols) keyed by period
+        """
+        width = len(self.symbols)
+        ema = ema_matrix(
+            np.tile(self.close, len(periods)),
+            np.repeat(np.asarray(periods), width),
+            smoothing_factor,
+        )
+        return {
+            period: ema[:, idx * width : (idx + 1) * width]
+            for idx, period in enumerate(periods)
+        }
+
+    def rolling_sum(self, matrix: np.ndarray, window: int) -> np.ndarray:
+        """Sum of last `window` records of every symbol on every date, see `rolling_sum`"""
+        return rolling_sum(np.where(np.isnan(self.close), np.nan, matrix), window)
+
+    def sma(self, period: int) -> np.ndarray:
+        """SMA of close price of every symbol on every date"""
+        return self.rolling_sum(self.close, period) / period
+
+    def mean_volume(self, period: int) -> np.ndarray:
+        """Mean volume over last `period` records of every symbol on every date"""
+        return self.rolling_sum(self.volume, period) / period
+
+    def turnover(self, period: int, price: np.ndarray) -> np.ndarray:
+        """Turnover of every symbol, i.e. mean volume over last `period` records times price"""
+        return self.mean_volume(period) * price
+
+    def first(self) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+        """Earliest close price of every symbol & date it is recorded on"""
+        # NOTE - rank 1 exists only if panel has any date
+        rows = self._rank_rows()[min(1, len(self.dates))]
+        return self._at(self.close, rows)
+
+    def nth_last(self, n: int) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+        """Close price of every symbol `n` records before its latest record (i.e. `iloc[-n - 1]`)
+        & date it is recorded on"""
+        count = np.cumsum(~np.isnan(self.close), axis=0)[-1] if len(self.dates) else 0
+        ranks = np.where(count > n, count - n, 0)
+        rows = self._rank_rows()[ranks, np.arange(len(self.symbols))]
+        return self._at(self.close, rows)
+
+    def asof_each(
+        self,
+        desired_dates: pd.DatetimeIndex,
+        last_rows: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+        """Close price of every symbol on its own desired date (or latest record before it).
+        `last_rows` (see `_last_rows`) can be passed to reuse it across many calls."""
+        if not len(self.dates):
+            return self._at(self.close, np.full(len(self.symbols), -1))
+        rows = asof_positions(self.dates, desired_dates)
+        last_rows = self._last_rows() if last_rows is None else last_rows
+        rows = np.where(
+            rows >= 0, last_rows[np.maximum(rows, 0), np.arange(len(self.symbols))], -1
+        )
+        return self._at(self.close, rows)
+
+    def returns(
+        self, horizons: Sequence[str] = RETURN_HORIZONS
+    ) -> Dict[str, np.ndarray]:
+        """Percentage return of every symbol over every horizon, measured from its latest record
+        to its record on start of the horizon (or latest record before it). Every horizon is one
+        binary search & one gather over the panel.
+
+        Args:
+            horizons (Sequence[str], optional): Horizons like 1W, 3M or YTD (see
+            `horizon_start_dates`). Defaults to 1W, 1M, 3M, 6M, 12M & YTD.
+
+        Returns:
+            Dict[str, np.ndarray]: return of every symbol keyed by horizon, NaN for symbol having
+            no record on or before start of the horizon
+        """
+        last_price, last_date = self.latest(self.close)
+        last_rows = self._last_rows()
+        returns = {}
+        for horizon in horizons:
+            start_price, _ = self.asof_each(
+                horizon_start_dates(last_date, horizon), last_rows
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns[horizon] = ((last_price / start_price) - 1) * 100
+        return returns
+
+    @staticmethod
+    def crossover(emas: Sequence[np.ndarray], threshold: float = 1.0) -> np.ndarray:
+        """Buy signal where every pair of given emas is within threshold (absolute percentage
+        difference), same as `unit_ema_indicator_n3`
+
+        Returns:
+            np.ndarray: True where signal is buy, of same shape as emas
+        """
+        signal = np.ones(np.shape(emas[0]), dtype=bool)
+        for ema_a, ema_b in itertools.combinations(emas, 2):
+            signal &= np.abs(ema_a - ema_b) / ((ema_a + ema_b) / 2) * 100 < threshold
+        return signal
+
+
+def _dated_columns(
+    name: str, values: np.ndarray, dates: pd.DatetimeIndex
+) -> Dict[str, np.ndarray]:
+    """Column named `<name> (<date>)` per distinct date, same as unit executors name their
+    price columns, each having values of symbols recorded on that date"""
+    labels = np.asarray(dates.strftime("%d-%m-%Y"), dtype=object)
+    columns = {}
+    for label in pd.unique(labels[~dates.isna()]):
+        columns[f"{name} ({label})"] = np.where(labels == label, values, np.nan)
+    return columns
+
+
+@dataclass
+class PanelExecutor:
+    """PanelExecutor packs batch versions of the unit executors computed over a `PricePanel` of
+    all companies at once. This can be inhereted into strategy classes, results have same layout
+    as the frame compiled from respective unit executor.
+    """
+
+    def _companies(self) -> List[str]:
+        return list(self.data["company"])
+
+    def _long_names(self, companies: List[str]) -> np.ndarray:
+        """Long name of every company, NaN if its quote is not available"""
+        try:
+            quotes = DataRetrieve.many_companies_quote(
+                [f"{company}.NS" for company in companies]
+            )
+        except (ProviderError, KeyError, ValueError):
+            logger.warning("Cannot retrive quotes in bulk")
+            quotes = pd.DataFrame()
+        if "longName" not in quotes.columns:
+            return np.full(len(companies), np.nan, dtype=object)
+        return (
+            quotes["longName"]
+            .reindex([f"{company}.NS" for company in companies])
+            .to_numpy(dtype=object)
+        )
+
+    def _panel(
+        self,
+        companies: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> PricePanel:
+        """Panel of given companies with a column for every company (in given order), even if
+        it has no record"""
+        panel = PricePanel.retrieve(
+            [f"{company}.NS" for company in companies], start_date, end_date
+        )
+        position = {symbol: idx for idx, symbol in enumerate(panel.symbols)}
+        # NOTE - company without record picks the all NaN column appended in the end
+        columns = [position.get(f"{company}.NS", -1) for company in companies]
+
+        def pick(matrix: np.ndarray) -> np.ndarray:
+            missing = np.full((len(panel.dates), 1), np.nan)
+            return np.hstack([matrix, missing])[:, columns]
+
+        return PricePanel(
+            dates=panel.dates,
+            symbols=[f"{company}.NS" for company in companies],
+            close=pick(panel.close),
+            volume=pick(panel.volume),
+        )
+
+    def panel_ema_indicator(
+        self,
+        ema_canditate: Tuple[int, int] = (50, 200),
+        cutoff_date: Union[str, datetime.datetime] = "today",
+    ) -> pd.DataFrame:
+        """Batch version of `unit_ema_indicator` for all companies"""
+        companies = self._companies()
+        panel = self._panel(
+            companies,
+            start_date=plan_ema_start_date(ema_canditate, cutoff_date),
+            end_date=datetime.datetime.now(),
+        )
+        ema_date = (
+            now_string if cutoff_date == "today" else cutoff_date.strftime("%d-%m-%Y")
+        )
+        closing_price, closing_date = panel.latest(panel.close)
+        ema = panel.ema(ema_canditate)
+        return pd.DataFrame(
+            {
+                "symbol": companies,
+                "company": self._long_names(companies),
+                **_dated_columns("price", closing_price, closing_date),
+                **{
+                    f"ema{str(period)} ({ema_date})": panel.latest(
+                        ema[period], cutoff_date
+                    )[0]
+                    for period in ema_canditate
+                },
+            }
+        )
+
+    def panel_ema_indicator_n3(
+        self,
+        ema_canditate: Tuple[int, int, int] = (5, 13, 26),
+        cutoff_date: Union[str, datetime.datetime] = "today",
+    ) -> pd.DataFrame:
+        """Batch version of `unit_ema_indicator_n3` for all companies"""
+        companies = self._companies()
+        panel = self._panel(
+            companies,
+            start_date=plan_ema_start_date(ema_canditate, cutoff_date),
+            end_date=datetime.datetime.now(),
+        )
+        ema = panel.ema(ema_canditate)
+        latest = [panel.latest(ema[period], cutoff_date)[0] for period in ema_canditate]
+        action = np.where(PricePanel.crossover(latest), "buy", "sell").astype(object)
+        action[np.isnan(latest).any(axis=0)] = np.nan
+        return pd.DataFrame(
+            {
+                "symbol": companies,
+                "ema_date": now_string
+                if cutoff_date == "today"
+                else cutoff_date.strftime("%d-%m-%Y"),
+                **{
+                    f"ema{str(period)}": value
+                    for period, value in zip(ema_canditate, latest)
+                },
+                "action": action,
+            }
+        )
+
+    def panel_ema_history(
+        self, ema_canditate: Tuple[int, ...], cutoff_dates: pd.DatetimeIndex
+    ) -> pd.DataFrame:
+        """Batch version of `unit_ema_history` for all companies"""
+        companies = self._companies()
+        panel = self._panel(
+            companies,
+            start_date=plan_ema_start_date(ema_canditate, cutoff_dates.min()),
+            end_date=datetime.datetime.now(),
+        )
+        ema = panel.ema(ema_canditate)
+        # NOTE - long format is ordered by company & then by date, same as the unit results
+        # concatenated one after another
+        return (
+            pd.DataFrame(
+                {
+                    "symbol": np.repeat(companies, len(cutoff_dates)),
+                    "date": np.tile(cutoff_dates.values, len(companies)),
+                    **{
+                        f"ema{str(period)}": panel.latest_many(
+                            ema[period], cutoff_dates
+                        ).T.ravel()
+                        for period in ema_canditate
+                    },
+                }
+            )
+            .dropna()
+            .reset_index(drop=True)
+        )
+
+    def panel_dma_absolute(
+        self,
+        end_date: Union[str, datetime.datetime] = "today",
+        period: int = 200,
+        cutoff: int = 5,
+    ) -> pd.DataFrame:
+        """Batch version of `unit_dma_absolute` for all companies"""
+        companies = self._companies()
+        if end_date == "today":
+            cutoff_date = datetime.datetime.today()
+        else:
+            cutoff_date = datetime.datetime.strptime(end_date, "%d/%m/%Y")
+        panel = self._panel(
+            companies,
+            start_date=cutoff_date - dateutil.relativedelta.relativedelta(months=18),
+            end_date=cutoff_date,
+        )
+        closing_price, _ = panel.latest(panel.close)
+        sma = panel.latest(panel.sma(period))[0]
+        turnover_value = panel.latest(panel.mean_volume(period))[0] * sma / 10000000
+        buy = sma + (sma * (cutoff / 100))
+        sell = sma - (sma * (cutoff / 100))
+        traded = turnover_value > 1
+        action = np.select(
+            [
+                (buy < closing_price) & traded,
+                (sell > closing_price) & traded,
+                (sell < closing_price) & (closing_price < buy) & traded,
+            ],
+            ["buy", "sell", "no action"],
+            "Invalid",
+        ).astype(object)
+        action[np.isnan(sma) | np.isnan(closing_price)] = np.nan
+        return pd.DataFrame(
+            {
+                "symbol": companies,
+                "company": self._long_names(companies),
+                f"price ({cutoff_date.strftime('%d-%m-%Y')})": closing_price,
+                "sma": sma,
+                "ideal buy": buy,
+                "ideal sell": sell,
+                "turnover in cr.": turnover_value,
+                "action": action,
+            }
+        )
+
+    def panel_momentum(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> pd.DataFrame:
+        """Batch version of `unit_momentum` for all companies. Record missing on desired date of
+        monthly return resolves to the latest record before it."""
+        companies = self._companies()
+        panel = self._panel(companies, start_date=start, end_date=end)
+        first_price, first_date = panel.first()
+        last_price, last_date = panel.latest(panel.close)
+        return_yearly = ((last_price / first_price) - 1) * 100
+        monthly_price, monthly_date = panel.asof_each(
+            pd.DatetimeIndex(
+                [
+                    pd.NaT
+                    if pd.isna(date)
+                    else date - dateutil.relativedelta.relativedelta(months=1)
+                    for date in last_date
+                ]
+            )
+        )
+        # NOTE - same as `unit_momentum`, duration & reported monthly price are of 30th last
+        # record while return is of the record a month back
+        price_30, date_30 = panel.nth_last(29)
+        duration = (last_date - date_30).days.to_numpy(dtype=np.float64) / 30
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return_monthly = (
+                ((last_price / monthly_price) ** (1 / duration)) - 1
+            ) * 100
+        return pd.DataFrame(
+            {
+                "symbol": companies,
+                "company": self._long_names(companies),
+                **_dated_columns("price", first_price, first_date),
+                **_dated_columns("price", last_price, last_date),
+                "return_yearly": return_yearly,
+                **_dated_columns("price", price_30, monthly_date),
+                "return_monthly": return_monthly,
+            }
+        )
+
+    def panel_returns(
+        self,
+        end: datetime.datetime,
+        horizons: Sequence[str] = RETURN_HORIZONS,
+    ) -> pd.DataFrame:
+        """Return of all companies over every horizon till end date, from one price panel
+
+        Args:
+            end (datetime.datetime): Last date of record
+            horizons (Sequence[str], optional): Horizons like 1W, 3M or YTD (see
+            `horizon_start_dates`). Defaults to 1W, 1M, 3M, 6M, 12M & YTD.
+
+        Returns:
+            pd.DataFrame: symbol, company, latest price & `return_<horizon>` of every horizon
+        """
+        companies = self._companies()
+        # NOTE - a week before the earliest start covers holidays on the start date itself
+        start = min(
+            horizon_start_dates(pd.DatetimeIndex([end]), horizon)[0]
+            for horizon in horizons
+        )
+        panel = self._panel(
+            companies,
+            start_date=(start - pd.Timedelta(days=7)).to_pydatetime(),
+            end_date=end,
+        )
+        last_price, last_date = panel.latest(panel.close)
+        return pd.DataFrame(
+            {
+                "symbol": companies,
+                "company": self._long_names(companies),
+                **_dated_columns("price", last_price, last_date),
+                **{
+                    f"return_{horizon}": value
+                    for horizon, value in panel.returns(horizons).items()
+                },
+            }
+        )
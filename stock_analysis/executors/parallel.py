@@ -1,128 +1,218 @@
 """This packs all the individual function with the scope of running for just unit input data.
 """
+import contextlib
+import copy
 import datetime
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple, Union
+from typing import (
+    Any,
+    ClassVar,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import dateutil
+import numpy as np
 import pandas as pd
 
-# from stock_analysis.data_retrieve import DataRetrieve
+from stock_analysis.config import settings
+from stock_analysis.data_retrieve import DataRetrieve
+from stock_analysis.executors.backend import ExecutorBackend
+from stock_analysis.executors.indicator_graph import IndicatorGraph
+from stock_analysis.providers.base import ProviderError
+from stock_analysis.storage.ema_state import EMAStateStore
 from stock_analysis.utils.formula_helpers import (
     annualized_rate_of_return,
+    ema_frame,
     exponential_moving_average,
+    exponential_moving_averages,
     percentage_diff,
-    simple_moving_average,
+    rolling_sma,
+    rolling_turnover,
     turnover,
 )
-from stock_analysis.utils.helpers import get_appropriate_date_momentum
+from stock_analysis.utils.fetch_planner import FetchPlan, plan_ema_start_date
+from stock_analysis.utils.helpers import asof_positions, get_appropriate_date_momentum
 from stock_analysis.utils.logger import set_logger
-import yfinance as yf
-from pandas_datareader import data as pdr
-
-yf.pdr_override()
 
 now_string = datetime.datetime.now().strftime("%d-%m-%Y")
 logger = set_logger()
 pd.options.display.float_format = "{:,.2f}".format
 
 
-class DataRetrieve:
-    """
-    Import Stock data using Yahoo Finance Api
+@dataclass
+class UnitExecutor:
+    """UnitExecutor class packs all the different strategies, indicators, etc. which
+    can be used to execute on unit (single) data. This can be inhereted into other
+    class and consumed into multiprocessing iterator used for batch of data.
     """
 
-    # def __init__(self, path: str):
-    #     """
-    #     Update or create new csv using Yahoo Finance Api
+    # NOTE - not a dataclass field, state is shared by all executors (and forked workers)
+    ema_state: ClassVar[Optional[EMAStateStore]] = (
+        EMAStateStore(settings.ema_state_path)
+        if settings.ema_state_path is not None
+        else None
+    )
 
-    #     Parameters
-    #     ----------
-    #     path : str
-    #         path of older csv to be updated or to save new csv
-    #     """
-    #     self.path = path
     @classmethod
-    def single_company_specific(
-        cls,
-        company_name: str,
-        start_date: datetime.datetime,
-        end_date: datetime.datetime,
-        save: bool = False,
-        export_path: str = None,
-    ) -> pd.DataFrame:
-        """
-        Retrive single company date from given start date and end
-
-        Parameters
-        ----------
-        company_name : str
-            name of desired company
-        start_date : Tuple[year, month, day]
-            Start date
-        end_date : Tuple[year, month, day]
-            End date
-
-        Returns
-        -------
-        pd.DataFrame
-            Data from Yahoo finance
-
-        Raises
-        ------
-        ValueError
-            [description]
+    def use_ema_state(cls, path: Optional[str]):
+        """Set folder to persist EMA state in, None disables incremental EMA
+
+        Args:
+            path (Optional[str]): folder of the EMA state store
         """
-        data = pdr.get_data_yahoo(
-            company_name, start=start_date, end=end_date, progress=False
-        )
+        cls.ema_state = EMAStateStore(path) if path is not None else None
 
-        if save is True:
-            data.to_csv(f"{export_path}/{company_name}.csv")
+    def _ema_records(
+        self,
+        company: str,
+        ema_canditate: Tuple[int, ...],
+        cutoff_date: Union[str, datetime.datetime] = "today",
+        verbosity: int = 1,
+    ) -> Tuple[pd.DataFrame, Tuple[float, ...]]:
+        """Records of company & its ema of every period on cutoff date. For today's ema with EMA
+        state enabled, only the records after stored state are retrieved & folded into it.
+        Complete warm-up window is retrieved & state is rebuilt if state is missing or stale.
 
-        return data
+        Returns:
+            Tuple[pd.DataFrame, Tuple[float, ...]]: records of company & ema of every period
 
-    @classmethod
-    def single_company_complete(
-        cls, company_name: str, save: bool = False, export_path: str = None
-    ) -> pd.DataFrame:
-        """Retrive complete data right from its IPO till today
-
-        Parameters
-        ----------
-        company_name : str
-            Name of company
-        save : bool, optional
-            save to disk, by default False
-        export_path : str, optional
-            path where to save (to be used only if save is True), by default None
-
-        Returns
-        -------
-        pd.DataFrame
-            Data from Yahoo finance
+        Raises:
+            ValueError: If there are less records than longest period
         """
+        symbol = f"{company}.NS"
+        incremental = self.ema_state is not None and cutoff_date == "today"
+        resume_date = (
+            self.ema_state.resume_date(symbol, ema_canditate) if incremental else None
+        )
+        if resume_date is not None:
+            company_df = DataRetrieve.single_company_specific(
+                company_name=symbol,
+                start_date=resume_date,
+                end_date=datetime.datetime.now(),
+            ).dropna()
+            emas = self.ema_state.update(symbol, company_df["Close"], ema_canditate)
+            if emas is not None:
+                return company_df, emas
+
+        # NOTE - only the records needed to warm up ema till cutoff date are fetched
+        company_df = DataRetrieve.single_company_specific(
+            company_name=symbol,
+            start_date=plan_ema_start_date(ema_canditate, cutoff_date),
+            end_date=datetime.datetime.now(),
+        )  # NS = Nifty
+        # need to drop rows which have Null values
+        if company_df["Close"].isnull().sum() != 0:
+            logger.warning(f"{company} have some missing value, fixing it")
+            company_df.dropna(inplace=True)
+        if incremental:
+            return company_df, self.ema_state.rebuild(
+                symbol, company_df["Close"], ema_canditate
+            )
+        return company_df, exponential_moving_averages(
+            data_df=company_df,
+            cutoff_date=cutoff_date,
+            periods=ema_canditate,
+            verbosity=verbosity,
+        )
 
-        data = pdr.get_data_yahoo(company_name, progress=False)
-
-        if save is True:
-            data.to_csv(f"{export_path}/{company_name}.csv")
-
-        return data
+    def _prefetch_mode(self) -> Union[bool, str]:
+        """`prefetch` of executor, checked against its backend
 
-    @classmethod
-    def single_company_quote(cls, company_name: str) -> pd.DataFrame:
-        return pdr.get_quote_yahoo(company_name)
+        Raises:
+            ValueError: If data is to be shared with workers which cannot attach to shared memory
+        """
+        prefetch = getattr(self, "prefetch", False)
+        if prefetch == "shared" and self._backend().mode == "process":
+            raise ValueError(
+                'prefetch="shared" needs workers started by multiprocessing, use '
+                '"multiprocessing" or "pool" backend instead of "process"'
+            )
+        return prefetch
 
+    # TODO: Add all parallel executor function here
+    def _prefetch(
+        self,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> ContextManager:
+        """Bulk download data of all companies before dispatching unit tasks, if `prefetch` is
+        enabled on the executor. Unit tasks falling within given date range are then served from
+        memory instead of downloading one company at a time.
+        """
+        prefetch = self._prefetch_mode()
+        if prefetch == "shared":
+            return DataRetrieve.shared(
+                [f"{company}.NS" for company in self.data["company"]],
+                start_date=start_date,
+                end_date=end_date,
+            )
+        if prefetch is not True:
+            return contextlib.nullcontext()
+        return DataRetrieve.prefetched(
+            [f"{company}.NS" for company in self.data["company"]],
+            start_date=start_date,
+            end_date=end_date,
+        )
 
-@dataclass
-class UnitExecutor:
-    """UnitExecutor class packs all the different strategies, indicators, etc. which
-    can be used to execute on unit (single) data. This can be inhereted into other
-    class and consumed into multiprocessing iterator used for batch of data.
-    """
+    @contextlib.contextmanager
+    def _planned(self, plan: FetchPlan) -> Iterator[None]:
+        """Fetch data needed by every stage of a composite strategy once (see `FetchPlan`), stages
+        run within the context (prefetch, quotes & unit tasks) reuse it instead of fetching again.
+        Quotes are always fetched once, records only if `prefetch` is enabled on the executor
+        (loaded in shared memory if it is "shared"), else every unit task fetches its own."""
+        if plan.quotes:
+            self._prefetch_quote(plan.companies)
+        prefetch = self._prefetch_mode()
+        if prefetch is False:
+            yield
+            return
+        hold = DataRetrieve.shared if prefetch == "shared" else DataRetrieve.prefetched
+        with hold(
+            [f"{company}.NS" for company in plan.companies],
+            start_date=plan.start_date,
+            end_date=plan.end_date,
+        ):
+            yield
+
+    def _unit(self) -> "UnitExecutor":
+        """Copy of executor to dispatch unit tasks on. Unit tasks get their company as argument,
+        so company list is left out of the copy & is not pickled along with every task."""
+        unit = copy.copy(self)
+        for name in ("data", "company_name"):
+            if hasattr(unit, name):
+                setattr(unit, name, None)
+        return unit
+
+    def _backend(self) -> ExecutorBackend:
+        """Executor backend of unit tasks, given on the executor (`backend`) or configured"""
+        return ExecutorBackend.of(getattr(self, "backend", None))
+
+    def _prefetch_quote(self, companies: Optional[List[str]] = None) -> pd.DataFrame:
+        """Retrive quotes of all companies in one pass, so that every `unit_quote_retrive` of the
+        batch is served from quote cache instead of downloading one company at a time.
+
+        Args:
+            companies (Optional[List[str]], optional): desired companies. Defaults to None i.e.
+            all the companies of executor.
+
+        Returns:
+            pd.DataFrame: Quotes indexed by company name (with `.NS` suffix)
+        """
+        companies = self.data["company"] if companies is None else companies
+        try:
+            return DataRetrieve.many_companies_quote(
+                [f"{company}.NS" for company in companies]
+            )
+        except (ProviderError, KeyError, ValueError):
+            logger.warning("Cannot retrive quotes in bulk, moving on company wise")
+            return pd.DataFrame()
 
-    # TODO: Add all parallel executor function here
     def unit_vol_indicator_n_days(self, company: str = None, duration: int = 90):
         end = datetime.datetime.now()
         start = end - dateutil.relativedelta.relativedelta(days=duration)
@@ -153,36 +243,48 @@ class UnitExecutor:
     ) -> Dict:
 
         logger.info(f"Retrieving data for {company}")
-        company_df = DataRetrieve.single_company_complete(
-            company_name=f"{company}.NS"
-        )  # NS = Nifty
-        # need to drop rows which have Null values
-        if company_df["Close"].isnull().sum() != 0:
-            logger.warning(f"{company} have some missing value, fixing it")
-            company_df.dropna(inplace=True)
         action = "Invalid"  # deafult value, if not used then error occurs of `UnboundLocalError`
         try:
+            # NOTE - only the records needed to warm up ema till cutoff date are fetched
+            company_df = DataRetrieve.single_company_specific(
+                company_name=f"{company}.NS",
+                start_date=plan_ema_start_date((period,), cutoff_date),
+                end_date=datetime.datetime.now(),
+            )  # NS = Nifty
+            # need to drop rows which have Null values
+            if company_df["Close"].isnull().sum() != 0:
+                logger.warning(f"{company} have some missing value, fixing it")
+                company_df.dropna(inplace=True)
             closing_date = company_df.index[-1].strftime("%d-%m-%Y")
-            closing_price = company_df["Close"][-1]
+            closing_price = company_df["Close"].iloc[-1]
             ema = exponential_moving_average(
                 data_df=company_df,
                 cutoff_date=cutoff_date,
                 period=period,
                 verbosity=verbosity,
             )
-            # NOTE - turnover needs to be relative to 1 cr so dividing it by 1 cr
-            turnover_value = turnover(company_df["Volume"], ema) / 10000000
+            # NOTE - turnover needs to be relative to 1 cr so dividing it by 1 cr. Same as dma,
+            # it is mean volume of the last `period` records (& not of complete history, which is
+            # no longer fetched) times ema
+            turnover_value = turnover(company_df["Volume"][-period:], ema) / 10000000
             buy = ema + (ema * (cutoff / 100))
             sell = ema - (ema * (cutoff / 100))
-            if (buy < company_df["Close"][-1]) and (turnover_value > 1):
+            if (buy < company_df["Close"].iloc[-1]) and (turnover_value > 1):
                 action = "buy"
-            elif (sell > company_df["Close"][-1]) and (turnover_value > 1):
+            elif (sell > company_df["Close"].iloc[-1]) and (turnover_value > 1):
                 action = "sell"
-            elif (sell < company_df["Close"][-1] < buy) and (turnover_value > 1):
+            elif (sell < company_df["Close"].iloc[-1] < buy) and (turnover_value > 1):
                 action = "no action"
-            long_name = self.unit_quote_retrive(company)["longName"][0]
-
-        except (KeyError, IndexError, ValueError, TypeError, ZeroDivisionError):
+            long_name = self.unit_quote_retrive(company)["longName"].iloc[0]
+
+        except (
+            ProviderError,
+            KeyError,
+            IndexError,
+            ValueError,
+            TypeError,
+            ZeroDivisionError,
+        ):
             logger.warning(
                 f"{company}'s record are less than minimum required or delisted or incorrect"
             )
@@ -227,41 +329,24 @@ class UnitExecutor:
         verbosity: int = 1,
     ) -> Dict:
         logger.info(f"Retriving data for {company}")
-        company_df = DataRetrieve.single_company_complete(
-            company_name=f"{company}.NS"
-        )  # NS = Nifty
         if cutoff_date == "today":
             ema_date = now_string
         else:
             ema_date = cutoff_date.strftime("%d-%m-%Y")
 
-        # need to drop rows which have Null values
-        if company_df["Close"].isnull().sum() != 0:
-            logger.warning(f"{company} have some missing value, fixing it")
-            company_df.dropna(inplace=True)
-
         try:
-            closing_date = company_df.index[-1].strftime("%d-%m-%Y")
-            closing_price = company_df["Close"][-1]
-            long_name = self.unit_quote_retrive(company)["longName"][0]
-            ema_candidate_a = exponential_moving_average(
-                data_df=company_df,
-                cutoff_date=cutoff_date,
-                period=ema_canditate[0],
-                verbosity=verbosity,
-            )
-            ema_candidate_b = exponential_moving_average(
-                data_df=company_df,
-                cutoff_date=cutoff_date,
-                period=ema_canditate[1],
-                verbosity=verbosity,
+            company_df, (ema_candidate_a, ema_candidate_b) = self._ema_records(
+                company, ema_canditate, cutoff_date, verbosity
             )
+            closing_date = company_df.index[-1].strftime("%d-%m-%Y")
+            closing_price = company_df["Close"].iloc[-1]
+            long_name = self.unit_quote_retrive(company)["longName"].iloc[0]
             # DEPRECATED - removed as part of output remodel
             # if ema_candidate_a > ema_candidate_b:
             #     action = "buy"
             # else:
             #     action = "sell"
-        except (KeyError, IndexError, ValueError, TypeError):
+        except (ProviderError, KeyError, IndexError, ValueError, TypeError):
             logger.warning(f"{company} has less record than minimum rexquired")
             ema_candidate_a, ema_candidate_b, long_name, closing_date, closing_price = (
                 pd.NA,
@@ -278,11 +363,53 @@ class UnitExecutor:
             f"ema{str(ema_canditate[1])} ({ema_date})": ema_candidate_b,
         }
 
+    def unit_ema_history(
+        self,
+        company: str,
+        ema_canditate: Tuple[int, ...],
+        cutoff_dates: pd.DatetimeIndex,
+        verbosity: int = 1,
+    ) -> pd.DataFrame:
+        """EMA of every period of company on every cutoff date (or latest record before it), from
+        a single fetch & a single ema pass over records.
+
+        Returns:
+            pd.DataFrame: long format i.e. a row per cutoff date having symbol, date & ema of every
+            period, empty if record is not available
+        """
+        logger.info(f"Retriving data for {company}")
+        columns = ["symbol", "date", *[f"ema{str(period)}" for period in ema_canditate]]
+        try:
+            company_df = DataRetrieve.single_company_specific(
+                company_name=f"{company}.NS",
+                start_date=plan_ema_start_date(ema_canditate, cutoff_dates.min()),
+                end_date=datetime.datetime.now(),
+            ).dropna(subset=["Close"])
+            ema = ema_frame(company_df["Close"], ema_canditate)
+        except (ProviderError, KeyError, IndexError, ValueError, TypeError):
+            if verbosity > 0:
+                logger.warning(f"{company} has less record than minimum required")
+            return pd.DataFrame(columns=columns)
+        positions = asof_positions(ema.index, cutoff_dates)
+        found = positions >= 0
+        history_df = pd.DataFrame(
+            {
+                "symbol": company,
+                "date": cutoff_dates[found],
+                **{
+                    f"ema{str(period)}": ema[period].to_numpy()[positions[found]]
+                    for period in ema_canditate
+                },
+            },
+            columns=columns,
+        )
+        return history_df.dropna().reset_index(drop=True)
+
     def unit_quote_retrive(self, company: str) -> pd.DataFrame:
         logger.info(f"Retriving Detail Quote data for {company}")
         try:
             return DataRetrieve.single_company_quote(f"{company}.NS")
-        except (KeyError, IndexError, ValueError):
+        except (ProviderError, KeyError, IndexError, ValueError):
             logger.warning(f"Cannot retrive data for {company}")
             return "Invalid"
 
@@ -294,28 +421,9 @@ class UnitExecutor:
         verbosity: int = 1,
     ) -> Dict:
         logger.info(f"Retriving data for {company}")
-        company_df = DataRetrieve.single_company_complete(company_name=f"{company}.NS")
-        if company_df["Close"].isnull().sum() != 0:
-            logger.warning(f"{company} have some missing value, fixing it")
-            company_df.dropna(inplace=True)
         try:
-            ema_candidate_a = exponential_moving_average(
-                data_df=company_df,
-                cutoff_date=cutoff_date,
-                period=ema_canditate[0],
-                verbosity=verbosity,
-            )
-            ema_candidate_b = exponential_moving_average(
-                data_df=company_df,
-                cutoff_date=cutoff_date,
-                period=ema_canditate[1],
-                verbosity=verbosity,
-            )
-            ema_candidate_c = exponential_moving_average(
-                data_df=company_df,
-                cutoff_date=cutoff_date,
-                period=ema_canditate[2],
-                verbosity=verbosity,
+            _, (ema_candidate_a, ema_candidate_b, ema_candidate_c) = self._ema_records(
+                company, ema_canditate, cutoff_date, verbosity
             )
 
             percentage_diff_cb = percentage_diff(
@@ -337,7 +445,7 @@ class UnitExecutor:
             else:
                 action = "sell"
 
-        except (KeyError, IndexError, ValueError, TypeError):
+        except (ProviderError, KeyError, IndexError, ValueError, TypeError):
             logger.warning(f"{company} has less record than minimum required")
 
             ema_candidate_a, ema_candidate_b, ema_candidate_c, action = (
@@ -361,6 +469,88 @@ class UnitExecutor:
             "action": action,
         }
 
+    @staticmethod
+    def _dma_frame(company_df: pd.DataFrame, period: int, cutoff: int) -> pd.DataFrame:
+        """sma, ideal buy/sell price, turnover & action on every record of company"""
+        close = company_df["Close"].astype(np.float64)
+        sma = rolling_sma(close, period)
+        turnover_value = (
+            rolling_turnover(company_df["Volume"].astype(np.float64), sma, period)
+            / 10000000
+        )
+        buy = sma + (sma * (cutoff / 100))
+        sell = sma - (sma * (cutoff / 100))
+        traded = turnover_value > 1
+        action = np.select(
+            [
+                (buy < close) & traded,
+                (sell > close) & traded,
+                (sell < close) & (close < buy) & traded,
+            ],
+            ["buy", "sell", "no action"],
+            "Invalid",
+        )
+        return pd.DataFrame(
+            {
+                "price": close,
+                "sma": sma,
+                "ideal buy": buy,
+                "ideal sell": sell,
+                "turnover in cr.": turnover_value,
+                "action": action,
+            },
+            index=company_df.index,
+        )
+
+    def unit_dma_history(
+        self,
+        company: str,
+        start_date: datetime.datetime,
+        end_date: Union[str, datetime.datetime] = "today",
+        period: int = 200,
+        cutoff: int = 5,
+    ) -> pd.DataFrame:
+        """History of `unit_dma_absolute` i.e. sma, ideal buy/sell price, turnover & action of
+        company on every trading day between start & end date, computed in one pass over records.
+
+        Args:
+            company (str): company symbol without `.NS`
+            start_date (datetime.datetime): first date of history
+            end_date (Union[str, datetime.datetime], optional): last date of history, `dd/mm/YYYY`
+            string or date. Defaults to "today".
+            period (int, optional): period of sma. Defaults to 200.
+            cutoff (int, optional): percentage band around sma for buy/sell. Defaults to 5.
+
+        Returns:
+            pd.DataFrame: dma of every trading day indexed by date, empty if record is not
+            available
+
+        Example:
+        ```python
+        from stock_analysis.executors.parallel import UnitExecutor
+        dma_df = UnitExecutor().unit_dma_history('TCS', datetime.datetime(2021, 1, 1))
+        ```
+        """
+        if end_date == "today":
+            cutoff_date = datetime.datetime.today()
+        elif isinstance(end_date, str):
+            cutoff_date = datetime.datetime.strptime(end_date, "%d/%m/%Y")
+        else:
+            cutoff_date = end_date
+        # NOTE - records before start date are needed only to warm up sma of first date,
+        # twice the period in calendar days covers holidays
+        try:
+            company_df = DataRetrieve.single_company_specific(
+                company_name=f"{company}.NS",
+                start_date=start_date - datetime.timedelta(days=2 * period),
+                end_date=cutoff_date,
+            ).dropna(subset=["Close", "Volume"])
+        except (KeyError, ValueError, IndexError, ProviderError):
+            logger.warning(f"Record of {company} is not available")
+            return pd.DataFrame()
+        dma_df = self._dma_frame(company_df, period, cutoff)
+        return dma_df[dma_df.index >= pd.Timestamp(start_date)]
+
     def unit_dma_absolute(
         self,
         company: str = None,
@@ -387,7 +577,7 @@ class UnitExecutor:
             if company_df["Close"].isnull().sum() != 0:
                 logger.warning(f"{company} have some missing value, fixing it")
                 company_df.dropna(inplace=True)
-        except (KeyError, ValueError, IndexError):
+        except (ProviderError, KeyError, ValueError, IndexError):
             company_df = pd.DataFrame(
                 {
                     "Open": pd.NA,
@@ -399,21 +589,20 @@ class UnitExecutor:
                 },
                 index=["Date"],
             )
-        action = "Invalid"
         try:
-            sma = simple_moving_average(company_df["Close"][-(period - 1) :], period)
-            turnover_value = turnover(company_df["Volume"][-period:], sma) / 10000000
-            buy = sma + (sma * (cutoff / 100))
-            sell = sma - (sma * (cutoff / 100))
-            if (buy < company_df["Close"][-1]) and (turnover_value > 1):
-                action = "buy"
-            elif (sell > company_df["Close"][-1]) and (turnover_value > 1):
-                action = "sell"
-            elif (sell < company_df["Close"][-1] < buy) and (turnover_value > 1):
-                action = "no action"
-            long_name = self.unit_quote_retrive(company)["longName"][0]
-            closing_price = company_df["Close"][-1]
-        except (KeyError, IndexError, ValueError, TypeError, ZeroDivisionError):
+            latest = self._dma_frame(company_df, period, cutoff).iloc[-1]
+            if pd.isna(latest["sma"]):
+                raise ValueError(f"{company} has less than {period} records")
+            closing_price, sma, buy, sell, turnover_value, action = latest
+            long_name = self.unit_quote_retrive(company)["longName"].iloc[0]
+        except (
+            ProviderError,
+            KeyError,
+            IndexError,
+            ValueError,
+            TypeError,
+            ZeroDivisionError,
+        ):
             logger.warning(f"{company} has less record than minimum rexquired")
             long_name, sma, closing_price, action, turnover_value, buy, sell = (
                 f"{company} (Invalid name)",
@@ -444,23 +633,22 @@ class UnitExecutor:
                 company_name=f"{company}.NS", start_date=start, end_date=end
             )
             company_df.reset_index(inplace=True)
-            long_name = self.unit_quote_retrive(company)["longName"][0]
+            long_name = self.unit_quote_retrive(company)["longName"].iloc[0]
             ar_yearly = annualized_rate_of_return(
                 end_date=company_df.iloc[-1].Close,
                 start_date=company_df.iloc[0].Close,
                 duration=1,
             )  # (company_df.iloc[-30,0] - company_df.iloc[0,0]).days/365)
+            monthly_date, monthly_close = get_appropriate_date_momentum(
+                company_df, company, verbosity=verbosity
+            )
             ar_monthly = annualized_rate_of_return(
                 end_date=company_df.iloc[-1].Close,
-                start_date=get_appropriate_date_momentum(
-                    company_df, company, verbosity=verbosity
-                )[1],
+                start_date=monthly_close,
                 duration=(company_df.iloc[-1, 0] - company_df.iloc[-30, 0]).days / 30,
             )
-            monthly_start_date = get_appropriate_date_momentum(
-                company_df, company, verbosity=0
-            )[0].strftime("%d-%m-%Y")
-        except (IndexError, KeyError, ValueError, TypeError):
+            monthly_start_date = monthly_date.strftime("%d-%m-%Y")
+        except (ProviderError, IndexError, KeyError, ValueError, TypeError):
             if verbosity > 0:
                 logger.debug(f"Data is not available for: {company}")
             company_df = pd.DataFrame(
@@ -490,23 +678,6 @@ class UnitExecutor:
     def unit_custom_indicator(
         self, indicators: List[str], company: str
     ) -> Dict[str, Any]:
-        result = {}
-        result["symbol"] = company
-        if "daily moving average" in indicators:
-            dma_result = self.unit_dma_absolute(company=company)
-            # name of `price` key will keep on chaning so need to unpack it
-            _, dma_company, dma_price, dma_sma, _, _, _, dma_action = dma_result.keys()
-            result["comany"] = dma_result[dma_company]
-            result[dma_price] = dma_result[dma_price]
-            result["dma"] = dma_result[dma_sma]
-            result["dma action"] = dma_result[dma_action]
-        if "exponential moving average" in indicators:
-            ema_result = self.unit_ema_absolute(company=company)
-            # name of `price` key will keep on chaning so need to unpack it
-            _, ema_company, ema_price, ema, _, _, _, ema_action = ema_result.keys()
-            result["comany"] = ema_result[ema_company]
-            result[ema_price] = ema_result[ema_price]
-            result["ema"] = ema_result[ema]
-            result["ema action"] = ema_result[ema_action]
-
-        return result
+        """Selected indicators of company, computed over records & quote retrieved once (see
+        `IndicatorGraph`)"""
+        return IndicatorGraph.build(indicators).run(company)
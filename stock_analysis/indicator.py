@@ -1,13 +1,19 @@
 import datetime
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
+import dateutil
+import numpy as np
 import pandas as pd
 import yaml
-from joblib import Parallel, delayed, parallel_backend
+from joblib import delayed
 
+from stock_analysis.executors.backend import ExecutorBackend
+from stock_analysis.executors.panel import PanelExecutor, PricePanel
 from stock_analysis.executors.parallel import UnitExecutor
+from stock_analysis.utils.fetch_planner import FetchPlan, plan_ema_start_date
 from stock_analysis.utils.formula_helpers import outcome_analysis, percentage_diff
+from stock_analysis.utils.dtypes import maybe_compact_frame
 from stock_analysis.utils.helpers import new_folder
 from stock_analysis.utils.logger import set_logger
 
@@ -16,8 +22,17 @@ logger = set_logger()
 pd.options.display.float_format = "{:,.2f}".format
 
 
+def _cutoff_dates(
+    cutoff_date: Union[str, datetime.datetime, Sequence[datetime.datetime]]
+) -> Optional[pd.DatetimeIndex]:
+    """Sorted unique cutoff dates if many are given, None for a single cutoff date"""
+    if isinstance(cutoff_date, (str, datetime.datetime, datetime.date)):
+        return None
+    return pd.DatetimeIndex(cutoff_date).unique().sort_values()
+
+
 @dataclass
-class Indicator(UnitExecutor):
+class Indicator(UnitExecutor, PanelExecutor):
     """Perform Indicator operation which are based on specific metrics used to study the performance
     of desired stock/company.
 
@@ -25,6 +40,15 @@ class Indicator(UnitExecutor):
         path ([str, optional]): Path to company yaml/json. Either path or company_name can be used.
         company_name ([List, optional]): List of company name. If path is used then this is obsolete
         as 'path' preside over 'company_name'
+        prefetch ([Union[bool, str], optional]): Bulk download data of all companies before running
+        a batch method instead of downloading one company at a time, "shared" loads it once in
+        shared memory for all workers (see `DataRetrieve.shared`), not supported by `process`
+        backend. Default to False.
+        panel ([bool, optional]): Compute batch methods over a panel of all companies at once
+        (see `PanelExecutor`) instead of one task per company. Default to False.
+        backend ([Union[str, ExecutorBackend], optional]): Executor of unit tasks of batch methods,
+        either a mode (see `ExecutorBackend`) or a backend with its no. of workers. Default to None
+        i.e. configured backend.
 
     Example:
     ```python
@@ -35,6 +59,9 @@ class Indicator(UnitExecutor):
 
     path: Optional[str] = None
     company_name: Optional[List] = None
+    prefetch: Union[bool, str] = False
+    panel: bool = False
+    backend: Optional[Union[str, ExecutorBackend]] = None
 
     def __post_init__(self):
         if self.path is not None:
@@ -69,10 +96,17 @@ class Indicator(UnitExecutor):
         ```
         """
 
-        with parallel_backend(n_jobs=-1, backend="multiprocessing"):
-            result = Parallel()(
-                delayed(self.unit_vol_indicator_n_days)(company, duration)
-                for company in self.data["company"]
+        start = datetime.datetime.now() - dateutil.relativedelta.relativedelta(
+            days=duration
+        )
+        unit = self._unit()
+        with self._prefetch(start_date=start):
+            result = self._backend().run(
+                (
+                    delayed(unit.unit_vol_indicator_n_days)(company, duration)
+                    for company in self.data["company"]
+                ),
+                companies=self.data["company"],
             )
 
         vol_ind_df = pd.DataFrame(result)
@@ -89,7 +123,7 @@ class Indicator(UnitExecutor):
                     f"Save at {export_path}/VolumeIndicator90Days_detailed_{now_strting}.csv"
                 )
         else:
-            return vol_ind_df
+            return maybe_compact_frame(vol_ind_df)
 
     def ema_indicator(
         self,
@@ -103,51 +137,74 @@ class Indicator(UnitExecutor):
 
         Args:
             ema_canditate (Tuple[int, int], optional): Two number used two calculate EMA. Defaults to (50, 200).
-            cutoff_date (Union[str, datetime.datetime], optional): Desired date till which to calculate ema. Defaults to "today".
+            cutoff_date (Union[str, datetime.datetime, Sequence[datetime.datetime]], optional): Desired date till which to calculate ema,
+            or many dates (e.g. `pd.date_range`) to calculate ema on each of them. Defaults to "today".
             save (bool, optional): Save to hard disk. Defaults to True.
             export_path (str, optional): Path to save, to be used only if 'save' is true. Defaults to ".".
             verbosity (int, optional): Level of detail logging,1=< Detail, 0=Less detail. Defaults to 1.
 
         Returns:
-            EMA and indicators based on it
+            EMA and indicators based on it. For many cutoff dates it is in long format i.e. a row per
+            company & date having symbol, date, ema of both periods & percentage_diff, computed from
+            a single fetch & a single ema pass per company.
 
         Example:
         ```python
         from stock_analysis.indicator import Indicator
         ind = Indicator('./data/company_list.yaml')
         ema = ind.ema_indicator((50,200), '01/06/2020')
+        ema_history = ind.ema_indicator((50,200), pd.date_range('2020-01-01', '2020-12-31', freq='W'))
         ```
         """
-        if cutoff_date == "today":
-            ema_date = now_strting
+        cutoff_dates = _cutoff_dates(cutoff_date)
+        if cutoff_dates is not None:
+            ema_indicator_df = self._ema_history(ema_canditate, cutoff_dates, verbosity)
+            ema_indicator_df["percentage_diff"] = percentage_diff(
+                ema_indicator_df[f"ema{str(ema_canditate[0])}"],
+                ema_indicator_df[f"ema{str(ema_canditate[1])}"],
+                return_absolute=True,
+            )
         else:
-            ema_date = cutoff_date.strftime("%d-%m-%Y")
-
-        with parallel_backend(n_jobs=-1, backend="multiprocessing"):
-            result = Parallel()(
-                delayed(self.unit_ema_indicator)(
-                    company, ema_canditate, cutoff_date, verbosity
+            if cutoff_date == "today":
+                ema_date = now_strting
+            else:
+                ema_date = cutoff_date.strftime("%d-%m-%Y")
+
+            if self.panel:
+                ema_indicator_df = self.panel_ema_indicator(ema_canditate, cutoff_date)
+            else:
+                self._prefetch_quote()
+                unit = self._unit()
+                with self._prefetch(
+                    start_date=plan_ema_start_date(ema_canditate, cutoff_date)
+                ):
+                    result = self._backend().run(
+                        (
+                            delayed(unit.unit_ema_indicator)(
+                                company, ema_canditate, cutoff_date, verbosity
+                            )
+                            for company in self.data["company"]
+                        ),
+                        companies=self.data["company"],
+                    )
+                ema_indicator_df = pd.DataFrame(result)
+            # NOTE -"price (01-01-1000)" & "price (<NA>)" gets added as extra column if any given company's
+            # data is not available. So need to remove this extra column.
+            if "price (01-01-1000)" in ema_indicator_df.columns:
+                ema_indicator_df.drop(
+                    "price (01-01-1000)", axis="columns", inplace=True
                 )
-                for company in self.data["company"]
-            )
-
-        ema_indicator_df = pd.DataFrame(result)
-        # NOTE -"price (01-01-1000)" & "price (<NA>)" gets added as extra column if any given company's
-        # data is not available. So need to remove this extra column.
-        if "price (01-01-1000)" in ema_indicator_df.columns:
-            ema_indicator_df.drop("price (01-01-1000)", axis="columns", inplace=True)
-        if "price (<NA>)" in ema_indicator_df.columns:
-            ema_indicator_df.drop("price (<NA>)", axis="columns", inplace=True)
-
-        ema_indicator_df.dropna(inplace=True)
-        ema_indicator_df["percentage_diff"] = ema_indicator_df.apply(
-            lambda x: percentage_diff(
-                x[f"ema{str(ema_canditate[0])} ({ema_date})"],
-                x[f"ema{str(ema_canditate[1])} ({ema_date})"],
+            if "price (<NA>)" in ema_indicator_df.columns:
+                ema_indicator_df.drop("price (<NA>)", axis="columns", inplace=True)
+
+            # NOTE - columns having `pd.NA` of unavailable companies are object dtype, so they are
+            # converted back to numbers to compute percentage difference column-wise
+            ema_indicator_df = ema_indicator_df.dropna().infer_objects()
+            ema_indicator_df["percentage_diff"] = percentage_diff(
+                ema_indicator_df[f"ema{str(ema_canditate[0])} ({ema_date})"],
+                ema_indicator_df[f"ema{str(ema_canditate[1])} ({ema_date})"],
                 return_absolute=True,
-            ),
-            axis=1,
-        )
+            )
         # DEPRECATED - removed as part of output remodel
         # ema_indicator_df["outcome"] = ema_indicator_df.apply(
         #     lambda x: outcome_analysis(x["percentage_diff"]), axis=1
@@ -167,7 +224,7 @@ class Indicator(UnitExecutor):
                 )
 
         else:
-            return ema_indicator_df
+            return maybe_compact_frame(ema_indicator_df)
 
     def ema_detail_indicator(
         self,
@@ -212,29 +269,27 @@ class Indicator(UnitExecutor):
         else:
             ema_date = cutoff_date.strftime("%d-%m-%Y")
 
-        ema_short = self.ema_indicator(
-            ema_canditate=ema_canditate,
-            cutoff_date=cutoff_date,
-            save=False,
-            verbosity=verbosity,
+        # NOTE - records & quotes are fetched once for both the ema & quote stage
+        plan = FetchPlan().need(
+            self.data["company"],
+            start_date=plan_ema_start_date(ema_canditate, cutoff_date),
+            quotes=True,
         )
-
-        logger.info("Extarcting detail company quote data")
-        batch_company_quote = pd.DataFrame()
-        with parallel_backend(n_jobs=-1, backend="multiprocessing"):
-            company_quote = Parallel()(
-                delayed(self.unit_quote_retrive)(company)
-                for company in ema_short["symbol"]
+        with self._planned(plan):
+            ema_short = self.ema_indicator(
+                ema_canditate=ema_canditate,
+                cutoff_date=cutoff_date,
+                save=False,
+                verbosity=verbosity,
             )
-        for single_company_quote in company_quote:
-            if isinstance(single_company_quote, pd.DataFrame):
-                batch_company_quote = batch_company_quote.append(single_company_quote)
 
+            logger.info("Extarcting detail company quote data")
+            batch_company_quote = self._prefetch_quote(ema_short["symbol"])
         batch_company_quote = batch_company_quote.reset_index().rename(
             columns={"index": "symbol"}  # , "longName": "company"}
         )
-        batch_company_quote["symbol"] = batch_company_quote["symbol"].str.replace(
-            ".NS", ""
+        batch_company_quote["symbol"] = batch_company_quote["symbol"].str.removesuffix(
+            ".NS"
         )
         ema_quote = ema_short.merge(batch_company_quote, on="symbol", validate="1:1")
 
@@ -274,7 +329,7 @@ class Indicator(UnitExecutor):
                 )
 
         else:
-            return ema_quote
+            return maybe_compact_frame(ema_quote)
 
     def ema_crossover_detail_indicator(
         self,
@@ -282,6 +337,7 @@ class Indicator(UnitExecutor):
         save: bool = True,
         export_path: str = ".",
         verbosity: int = 1,
+        cutoff_date: Union[str, datetime.datetime] = "today",
     ) -> Optional[pd.DataFrame]:
         """Exponential moving average for crossover triple period technique
 
@@ -290,40 +346,45 @@ class Indicator(UnitExecutor):
             save (bool, optional): Save to hard disk. Defaults to True.
             export_path (str, optional): Path to save, to be used only if 'save' is true. Defaults to ".".
             verbosity (int, optional): Level of detail logging,1=< Deatil, 0=Less detail. Defaults to 1.
+            cutoff_date (Union[str, datetime.datetime, Sequence[datetime.datetime]], optional): Desired date till which to calculate ema,
+            or many dates (e.g. `pd.date_range`) to calculate ema on each of them. Defaults to "today".
 
         Returns:
-            Results is based on crossover ema and detailed metrics
+            Results is based on crossover ema and detailed metrics. For many cutoff dates it is in long
+            format i.e. a row per company & date having symbol, date, ema of all periods & action,
+            without the quote metrics as those are not available as of past dates.
 
         Example:
         ```python
         from stock_analysis.indicator import Indicator
         ind = Indicator('./data/company_list.yaml')
-        ema = ind.ema_crossover_detail_indicator((5,10,020), '01/06/2020')
+        ema = ind.ema_crossover_detail_indicator((5,10,20), cutoff_date=datetime.datetime(2020, 6, 1))
         ```
         """
 
         logger.info("Performing EMA Indicator Task")
+        cutoff_dates = _cutoff_dates(cutoff_date)
+        if cutoff_dates is not None:
+            ema_quote = self._ema_history(ema_canditate, cutoff_dates, verbosity)
+            emas = [
+                ema_quote[f"ema{str(period)}"].to_numpy() for period in ema_canditate
+            ]
+            ema_quote["action"] = np.where(PricePanel.crossover(emas), "buy", "sell")
+            return self._export_crossover(
+                ema_quote, ema_canditate, save, export_path, verbosity
+            )
         ema_short = self._ema_indicator_n3(
-            ema_canditate=ema_canditate, verbosity=verbosity
+            ema_canditate=ema_canditate, cutoff_date=cutoff_date, verbosity=verbosity
         )
 
         logger.info("Extarcting detail company quote data")
-        batch_company_quote = pd.DataFrame()
-        with parallel_backend(n_jobs=-1, backend="multiprocessing"):
-            company_quote = Parallel()(
-                delayed(self.unit_quote_retrive)(company)
-                for company in ema_short["symbol"]
-            )
-        for single_company_quote in company_quote:
-            if isinstance(single_company_quote, pd.DataFrame):
-                batch_company_quote = batch_company_quote.append(single_company_quote)
-
+        batch_company_quote = self._prefetch_quote(ema_short["symbol"])
         batch_company_quote = batch_company_quote.reset_index().rename(
             columns={"index": "symbol", "longName": "company"}
         )
 
-        batch_company_quote["symbol"] = batch_company_quote["symbol"].str.replace(
-            ".NS", ""
+        batch_company_quote["symbol"] = batch_company_quote["symbol"].str.removesuffix(
+            ".NS"
         )
 
         ema_quote = ema_short.merge(batch_company_quote, on="symbol", validate="1:1")
@@ -355,6 +416,19 @@ class Indicator(UnitExecutor):
             ]
         ]
 
+        return self._export_crossover(
+            ema_quote, ema_canditate, save, export_path, verbosity
+        )
+
+    def _export_crossover(
+        self,
+        ema_quote: pd.DataFrame,
+        ema_canditate: Tuple[int, int, int],
+        save: bool,
+        export_path: str,
+        verbosity: int,
+    ) -> Optional[pd.DataFrame]:
+        """Save crossover result to hard disk or return it"""
         if verbosity > 0:
             logger.debug(f"Here are sample 5 company\n{ema_quote.head()}")
         if save is not False:
@@ -368,7 +442,31 @@ class Indicator(UnitExecutor):
                 )
 
         else:
-            return ema_quote
+            return maybe_compact_frame(ema_quote)
+
+    def _ema_history(
+        self,
+        ema_canditate: Tuple[int, ...],
+        cutoff_dates: pd.DatetimeIndex,
+        verbosity: int = 1,
+    ) -> pd.DataFrame:
+        """EMA of all companies on every cutoff date in long format, see `unit_ema_history`"""
+        if self.panel:
+            return self.panel_ema_history(ema_canditate, cutoff_dates)
+        unit = self._unit()
+        with self._prefetch(
+            start_date=plan_ema_start_date(ema_canditate, cutoff_dates.min())
+        ):
+            result = self._backend().run(
+                (
+                    delayed(unit.unit_ema_history)(
+                        company, ema_canditate, cutoff_dates, verbosity
+                    )
+                    for company in self.data["company"]
+                ),
+                companies=self.data["company"],
+            )
+        return pd.concat(result, ignore_index=True)
 
     def _ema_indicator_n3(
         self,
@@ -376,15 +474,23 @@ class Indicator(UnitExecutor):
         cutoff_date: Union[str, datetime.datetime] = "today",
         verbosity: int = 1,
     ) -> pd.DataFrame:
-
-        with parallel_backend(n_jobs=-1, backend="multiprocessing"):
-            result = Parallel()(
-                delayed(self.unit_ema_indicator_n3)(
-                    company, ema_canditate, cutoff_date, verbosity
+        if self.panel:
+            ema_indicator_df = self.panel_ema_indicator_n3(ema_canditate, cutoff_date)
+        else:
+            unit = self._unit()
+            with self._prefetch(
+                start_date=plan_ema_start_date(ema_canditate, cutoff_date)
+            ):
+                result = self._backend().run(
+                    (
+                        delayed(unit.unit_ema_indicator_n3)(
+                            company, ema_canditate, cutoff_date, verbosity
+                        )
+                        for company in self.data["company"]
+                    ),
+                    companies=self.data["company"],
                 )
-                for company in self.data["company"]
-            )
-        ema_indicator_df = pd.DataFrame(result)
+            ema_indicator_df = pd.DataFrame(result)
         ema_indicator_df.dropna(inplace=True)
 
         if verbosity > 0:
@@ -2,27 +2,31 @@
 """
 import datetime
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import dateutil
 import pandas as pd
 import yaml
-import yfinance as yf
-from joblib import Parallel, delayed, parallel_backend
+from joblib import delayed
 
+from stock_analysis.config import settings
+from stock_analysis.executors.backend import ExecutorBackend
+from stock_analysis.executors.panel import PanelExecutor
 from stock_analysis.executors.parallel import UnitExecutor
 from stock_analysis.indicator import Indicator
-from stock_analysis.utils.helpers import new_folder
+from stock_analysis.utils.dtypes import maybe_compact_frame
+from stock_analysis.utils.fetch_planner import FetchPlan, plan_ema_start_date
+from stock_analysis.utils.helpers import RETURN_HORIZONS, create_chunks, new_folder
 from stock_analysis.utils.logger import set_logger
+from stock_analysis.utils.top_k import TopK
 
-yf.pdr_override()
 logger = set_logger()
 pd.options.display.float_format = "{:,.2f}".format
 now_strting = datetime.datetime.now().strftime("%d-%m-%Y")
 
 
 @dataclass
-class MomentumStrategy(UnitExecutor):
+class MomentumStrategy(UnitExecutor, PanelExecutor):
     """Traders measure momentum in many different ways to identify opportunity pockets.
     The core idea across all these strategies remains the same i.e to identify momentum and ride the
     wave. The strategy are combinations of several metrics to determine momentum.
@@ -38,10 +42,22 @@ class MomentumStrategy(UnitExecutor):
         Default to None.
         company_name ([List, optional]): List of company name. If path is used then this is obsolete
         as 'path' preside over 'company_name'. Default to None.
+        prefetch ([Union[bool, str], optional]): Bulk download data of all companies before running
+        a batch method instead of downloading one company at a time, "shared" loads it once in
+        shared memory for all workers (see `DataRetrieve.shared`), not supported by `process`
+        backend. Default to False.
+        panel ([bool, optional]): Compute batch methods over a panel of all companies at once
+        (see `PanelExecutor`) instead of one task per company. Default to False.
+        backend ([Union[str, ExecutorBackend], optional]): Executor of unit tasks of batch methods,
+        either a mode (see `ExecutorBackend`) or a backend with its no. of workers. Default to None
+        i.e. configured backend.
     """
 
     path: Optional[str] = None
     company_name: Optional[List] = None
+    prefetch: Union[bool, str] = False
+    panel: bool = False
+    backend: Optional[Union[str, ExecutorBackend]] = None
 
     def __post_init__(self):
         if self.path is not None:
@@ -57,6 +73,9 @@ class MomentumStrategy(UnitExecutor):
         save: bool = True,
         export_path: str = ".",
         verbosity: int = 1,
+        horizons: Optional[Sequence[str]] = None,
+        rank_by: Optional[Union[str, Dict[str, float]]] = None,
+        on_progress: Optional[Callable[[pd.DataFrame], None]] = None,
     ) -> Optional[pd.DataFrame]:
         """The strategy is used to identity stocks which had 'good performance'
         based on desired 'return' duration
@@ -72,9 +91,18 @@ class MomentumStrategy(UnitExecutor):
             Defaults to '.'.
             verbosity (int, optional): Level of detail logging, 1=< Deatil, 0=Less detail.
             Defaults to 1.
+            horizons (Optional[Sequence[str]], optional): Return horizons like 1W, 1M, 3M, 6M,
+            12M or YTD, computed for all companies from one price panel (see `panel_returns`).
+            Defaults to None i.e. yearly & monthly return only.
+            rank_by (Optional[Union[str, Dict[str, float]]], optional): Horizon to rank on, or
+            weight of every horizon to rank on their weighted composite (`return_composite`).
+            Defaults to None i.e. 12M if it is one of the horizons, else last of the horizons.
+            on_progress (Optional[Callable[[pd.DataFrame], None]], optional): Called with
+            provisional leaderboard (best `top_company_count` so far) every time a batch of
+            companies is done, used only by unit executors. Defaults to None.
 
         Returns:
-            Record based on monthly and yearly calculation
+            Record based on monthly and yearly calculation, or on given horizons
 
         Example:
 
@@ -82,6 +110,7 @@ class MomentumStrategy(UnitExecutor):
         from stock_analysis import MomentumStrategy
         sa = MomentumStrategy('./data/company_list.yaml')
         ms = sa.relative_momentum(end_date='01/06/2020')
+        ms = sa.relative_momentum(horizons=('1M', '3M', '12M'), rank_by={'3M': 0.5, '12M': 0.5})
         ```
         """
         if end_date == "today":
@@ -90,28 +119,17 @@ class MomentumStrategy(UnitExecutor):
             end = datetime.datetime.strptime(end_date, "%d/%m/%Y").date()
         start = end - dateutil.relativedelta.relativedelta(years=1)
 
-        with parallel_backend(n_jobs=-1, backend="multiprocessing"):
-            result = Parallel()(
-                delayed(self.unit_momentum)(company, start, end, verbosity)
-                for company in self.data["company"]
+        if horizons is not None or rank_by is not None:
+            momentum_df = self._ranked_returns(end, horizons, rank_by)
+        elif self.panel:
+            momentum_df = self.panel_momentum(start, end)
+        else:
+            momentum_df = self._streamed_momentum(
+                start, end, top_company_count, on_progress, verbosity
             )
-        momentum_df = pd.DataFrame(result)
-
-        # NOTE -"price (01-01-1000)" & "price (<NA>)" gets added as extra column if any given company's
-        # data is not available. So need to remove this extra column.
-        if "price (01-01-1000)" in momentum_df.columns:
-            momentum_df.drop("price (01-01-1000)", axis="columns", inplace=True)
-        if "price (<NA>)" in momentum_df.columns:
-            momentum_df.drop("price (<NA>)", axis="columns", inplace=True)
-        # need to drop a row who is have at three or more values as `NA`
-        momentum_df.dropna(axis="index", thresh=3, inplace=True)
-        # also need to drop a column who is having more than 2 values as `NA`
-        momentum_df.dropna(axis="columns", thresh=2, inplace=True)
 
-        # need sorting based on "return_yearly" to display the result
-        momentum_df.sort_values(by=["return_yearly"], ascending=False, inplace=True)
-
-        momentum_df.reset_index(inplace=True, drop=True)
+        if horizons is None and rank_by is None:
+            momentum_df = self._clean_momentum(momentum_df)
 
         if verbosity > 0:
             logger.debug(f"Sample output:\n{momentum_df.head(top_company_count)}")
@@ -127,7 +145,95 @@ class MomentumStrategy(UnitExecutor):
                     f"Saved at {export_path}/momentum_result_{end.strftime('%d-%m-%Y')}_top_{top_company_count}.csv"
                 )
         else:
-            return momentum_df.head(top_company_count)
+            return maybe_compact_frame(momentum_df.head(top_company_count))
+
+    @staticmethod
+    def _clean_momentum(momentum_df: pd.DataFrame) -> pd.DataFrame:
+        """Drop price columns of companies without data & sparse price columns, then sort on
+        yearly return. Run on result of every executor, so all give the same columns."""
+        # NOTE -"price (01-01-1000)" & "price (<NA>)" gets added as extra column if any given company's
+        # data is not available. So need to remove this extra column.
+        momentum_df = momentum_df.drop(
+            columns=["price (01-01-1000)", "price (<NA>)"], errors="ignore"
+        )
+        # need to drop a row who is have at three or more values as `NA`
+        momentum_df = momentum_df.dropna(axis="index", thresh=3)
+        # also need to drop a column who is having more than 2 values as `NA`, a leaderboard of
+        # single company keeps all its columns
+        momentum_df = momentum_df.dropna(
+            axis="columns", thresh=min(2, len(momentum_df))
+        )
+
+        # need sorting based on "return_yearly" to display the result, column is dropped
+        # above if no company has its record
+        if "return_yearly" in momentum_df.columns:
+            momentum_df = momentum_df.sort_values(by=["return_yearly"], ascending=False)
+        return momentum_df.reset_index(drop=True)
+
+    def _streamed_momentum(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        top_company_count: int,
+        on_progress: Optional[Callable[[pd.DataFrame], None]] = None,
+        verbosity: int = 1,
+    ) -> pd.DataFrame:
+        """Momentum of all companies keeping only the best `top_company_count` by yearly return
+        (see `TopK`). Companies are dispatched in batches of `stream_batch_size` to the same
+        worker pool & leaderboard is updated as every batch finishes."""
+        top = TopK(top_company_count, "return_yearly")
+        self._prefetch_quote()
+        unit = self._unit()
+        with self._prefetch(
+            start_date=start, end_date=end
+        ), self._backend().session() as run:
+            for companies in create_chunks(
+                list(self.data["company"]), settings.stream_batch_size
+            ):
+                top.extend(
+                    run(
+                        (
+                            delayed(unit.unit_momentum)(company, start, end, verbosity)
+                            for company in companies
+                        ),
+                        companies=companies,
+                    )
+                )
+                if on_progress is not None:
+                    on_progress(
+                        maybe_compact_frame(self._clean_momentum(top.leaderboard()))
+                    )
+        return top.leaderboard()
+
+    def _ranked_returns(
+        self,
+        end: datetime.datetime,
+        horizons: Optional[Sequence[str]],
+        rank_by: Optional[Union[str, Dict[str, float]]],
+    ) -> pd.DataFrame:
+        """Return of all companies over given horizons, sorted by rank (best first). Companies
+        without the ranked return are dropped."""
+        horizons = list(RETURN_HORIZONS if horizons is None else horizons)
+        if rank_by is None:
+            # NOTE - same as yearly & monthly return, rank is on yearly return by default
+            rank_by = "12M" if "12M" in horizons else horizons[-1]
+        weights = rank_by if isinstance(rank_by, dict) else {rank_by: 1.0}
+        horizons += [horizon for horizon in weights if horizon not in horizons]
+
+        momentum_df = self.panel_returns(end, horizons)
+        if isinstance(rank_by, dict):
+            rank_column = "return_composite"
+            momentum_df[rank_column] = sum(
+                weight * momentum_df[f"return_{horizon}"]
+                for horizon, weight in weights.items()
+            )
+        else:
+            rank_column = f"return_{rank_by}"
+        return (
+            momentum_df.dropna(subset=[rank_column])
+            .sort_values(by=[rank_column], ascending=False)
+            .reset_index(drop=True)
+        )
 
     def relative_momentum_with_ema(
         self,
@@ -165,32 +271,58 @@ class MomentumStrategy(UnitExecutor):
         ```
         """
 
-        logger.info("Performing Momentum Strategy task")
-        momentum_df = self.relative_momentum(
-            end_date=end_date,
-            top_company_count=top_company_count,
-            save=False,
-            verbosity=verbosity,
-        )
-        momentum_df.reset_index(drop=True, inplace=True)
-
-        ind = Indicator(company_name=momentum_df["symbol"])
-        logger.info(
-            f"Performing EMA task on top {top_company_count} company till {end_date}"
-        )
         if end_date == "today":
             cutoff_date = end_date
             save_date = datetime.datetime.now().strftime("%d-%m-%Y")
+            momentum_end = None
         else:
             save_date = end_date.replace("/", "-")
             cutoff_date = datetime.datetime.strptime(end_date, "%d/%m/%Y")
             assert isinstance(cutoff_date, datetime.datetime), "Incorrect date type"
-        ema_df = ind.ema_indicator(
-            ema_canditate=ema_canditate,
-            cutoff_date=cutoff_date,
-            save=False,
-            verbosity=verbosity,
+            momentum_end = cutoff_date
+        # NOTE - top companies are known only after momentum stage, so ema stage is planned for
+        # all of them & every company is fetched once over the wider of both ranges
+        plan = (
+            FetchPlan()
+            .need(
+                self.data["company"],
+                start_date=(momentum_end or datetime.datetime.now())
+                - dateutil.relativedelta.relativedelta(years=1),
+                end_date=momentum_end,
+                quotes=True,
+            )
+            .need(
+                self.data["company"],
+                start_date=plan_ema_start_date(ema_canditate, cutoff_date),
+                quotes=True,
+            )
         )
+
+        with self._planned(plan):
+            logger.info("Performing Momentum Strategy task")
+            momentum_df = self.relative_momentum(
+                end_date=end_date,
+                top_company_count=top_company_count,
+                save=False,
+                verbosity=verbosity,
+            )
+            momentum_df.reset_index(drop=True, inplace=True)
+
+            ind = Indicator(
+                company_name=momentum_df["symbol"],
+                prefetch=self.prefetch,
+                panel=self.panel,
+                backend=self.backend,
+            )
+            logger.info(
+                f"Performing EMA task on top {top_company_count} company till {end_date}"
+            )
+            ema_df = ind.ema_indicator(
+                ema_canditate=ema_canditate,
+                cutoff_date=cutoff_date,
+                save=False,
+                verbosity=verbosity,
+            )
         # droping company, price (date) column as `momentum_df` already has it
         ema_df.drop(columns=ema_df.columns[[1, 2]], inplace=True)
         momentum_ema_df = momentum_df.merge(ema_df, on="symbol", validate="1:1")
@@ -208,7 +340,7 @@ class MomentumStrategy(UnitExecutor):
             if verbosity > 0:
                 logger.debug(f"Sample output:\n{momentum_ema_df.head()}")
         else:
-            return momentum_ema_df
+            return maybe_compact_frame(momentum_ema_df)
 
     def absolute_momentum_with_dma(
         self,
@@ -238,12 +370,32 @@ class MomentumStrategy(UnitExecutor):
         mes = sa.absolute_momentum_with_dma('01/06/2020', 30)
         ```
         """
-        with parallel_backend(n_jobs=-1, backend="multiprocessing"):
-            result = Parallel()(
-                delayed(self.unit_dma_absolute)(company, end_date, period, cutoff)
-                for company in self.data["company"]
-            )
-        dma_compile = pd.DataFrame(result)
+        # NOTE - `unit_dma_absolute` needs 18 months of record till cutoff date
+        if end_date == "today":
+            prefetch_start, prefetch_end = datetime.datetime.today(), None
+        else:
+            prefetch_start = prefetch_end = datetime.datetime.strptime(
+                end_date, "%d/%m/%Y"
+            ).date()
+        prefetch_start = prefetch_start - dateutil.relativedelta.relativedelta(
+            months=18
+        )
+        if self.panel:
+            dma_compile = self.panel_dma_absolute(end_date, period, cutoff)
+        else:
+            self._prefetch_quote()
+            unit = self._unit()
+            with self._prefetch(start_date=prefetch_start, end_date=prefetch_end):
+                result = self._backend().run(
+                    (
+                        delayed(unit.unit_dma_absolute)(
+                            company, end_date, period, cutoff
+                        )
+                        for company in self.data["company"]
+                    ),
+                    companies=self.data["company"],
+                )
+            dma_compile = pd.DataFrame(result)
         # NOTE -"price (<NA>)" gets added as extra column if any given company's data is not available.
         # So need to remove this extra column.
         if "price (<NA>)" in dma_compile.columns:
@@ -263,4 +415,4 @@ class MomentumStrategy(UnitExecutor):
                 float_format="%.2f",
             )
         else:
-            return dma_compile
+            return maybe_compact_frame(dma_compile)
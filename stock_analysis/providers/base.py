@@ -0,0 +1,98 @@
+"""Packs the interface every market data provider must follow"""
+import datetime
+from typing import Dict, List, Optional, Protocol, Sequence, runtime_checkable
+
+import pandas as pd
+
+from stock_analysis.config import settings
+
+
+class ProviderError(Exception):
+    """Raised when provider is not able to serve the requested data
+
+    Args:
+        message (str, optional): Reason of failure. Defaults to "".
+        symbols (Optional[Sequence[str]], optional): Symbols which could not be served, charged
+        for the retry by request scheduler. Defaults to None i.e. every requested symbol.
+    """
+
+    def __init__(self, message: str = "", symbols: Optional[Sequence[str]] = None):
+        super().__init__(message)
+        self.symbols = None if symbols is None else list(symbols)
+
+    def __reduce__(self):
+        # NOTE - symbols are not part of `args`, so they are passed explicitly to be kept across
+        # worker processes
+        return self.__class__, (str(self), self.symbols)
+
+
+class ThrottledError(ProviderError):
+    """Raised when upstream rejects the request due to rate limit"""
+
+
+@runtime_checkable
+class MarketDataProvider(Protocol):
+    """Source of OHLCV & quote data used by `DataRetrieve`. Any object having below methods
+    can be used as provider.
+    """
+
+    def history(
+        self,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """OHLCV data of given symbols
+
+        Args:
+            symbols (List[str]): desired symbols
+            start_date (Optional[datetime.datetime], optional): Start date. Defaults to None i.e.
+            since IPO.
+            end_date (Optional[datetime.datetime], optional): End date (exclusive). Defaults to
+            None i.e. till today.
+
+        Returns:
+            Dict[str, pd.DataFrame]: Data indexed by `Date` keyed by symbol. Symbol for which no
+            data is available has an empty dataframe.
+        """
+
+    def quote(self, symbols: List[str]) -> pd.DataFrame:
+        """Latest quote of given symbols
+
+        Args:
+            symbols (List[str]): desired symbols
+
+        Returns:
+            pd.DataFrame: Quotes indexed by symbol. Symbol for which quote is not available is
+            absent.
+        """
+
+
+def get_provider(name: str) -> MarketDataProvider:
+    """Resolve market data provider from its name
+
+    Args:
+        name (str): either `yahoo`, `yahoo-async` or `replay` (fixtures are read from
+        `STOCK_ANALYSIS_REPLAY_PATH`)
+
+    Returns:
+        MarketDataProvider: provider instance
+
+    Raises:
+        ValueError: If provider name is unknown
+    """
+    # NOTE - providers are imported lazily, so that e.g. replay provider can be used without
+    # importing (and configuring) yahoo finance at all
+    if name == "yahoo":
+        from stock_analysis.providers.yahoo import YahooProvider
+
+        return YahooProvider()
+    if name == "yahoo-async":
+        from stock_analysis.providers.yahoo_async import AsyncYahooProvider
+
+        return AsyncYahooProvider()
+    if name == "replay":
+        from stock_analysis.providers.replay import ReplayProvider
+
+        return ReplayProvider(settings.replay_path)
+    raise ValueError(f"Unknown market data provider: {name}")
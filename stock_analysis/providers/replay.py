@@ -0,0 +1,82 @@
+"""Market data provider which replays locally saved data, used to run strategies without
+network (e.g. air-gapped CI or load testing).
+"""
+import datetime
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from stock_analysis.providers.base import ProviderError
+
+
+@dataclass
+class ReplayProvider:
+    """Replay OHLCV & quote data from local fixtures. Fixture folder must have one file per
+    symbol, i.e. `<symbol>.parquet` or `<symbol>.csv` having `Date` column, & optionally
+    `quotes.parquet` or `quotes.csv` having `symbol` column.
+
+    Args:
+        path (Union[str, Path]): Folder having the fixtures
+
+    Example:
+    ```python
+    from stock_analysis.data_retrieve import DataRetrieve
+    from stock_analysis.providers.replay import ReplayProvider
+    DataRetrieve.use_provider(ReplayProvider('./fixtures'))
+    ```
+    """
+
+    path: Union[str, Path]
+    # NOTE - fixtures are local files with no rate limit, so `DataRetrieve` does not schedule
+    # requests made to it
+    self_scheduled = True
+
+    def __post_init__(self):
+        self.path = Path(self.path)
+        if not self.path.is_dir():
+            raise ProviderError(f"Replay fixture folder {self.path} not present")
+        self._quotes = None
+
+    def _read(self, name: str) -> Optional[pd.DataFrame]:
+        if (self.path / f"{name}.parquet").exists():
+            return pd.read_parquet(self.path / f"{name}.parquet")
+        if (self.path / f"{name}.csv").exists():
+            return pd.read_csv(self.path / f"{name}.csv")
+        return None
+
+    def history(
+        self,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        panel = {}
+        for symbol in symbols:
+            data = self._read(symbol)
+            if data is None:
+                panel[symbol] = pd.DataFrame()
+                continue
+            if "Date" in data.columns:
+                data = data.set_index("Date")
+            data.index = pd.to_datetime(data.index)
+            data.index.name = "Date"
+            data = data.sort_index()
+            if start_date is not None:
+                data = data[data.index >= pd.Timestamp(start_date)]
+            if end_date is not None:
+                data = data[data.index < pd.Timestamp(end_date)]
+            panel[symbol] = data
+        return panel
+
+    def quote(self, symbols: List[str]) -> pd.DataFrame:
+        if self._quotes is None:
+            quotes = self._read("quotes")
+            if quotes is None:
+                raise ProviderError(f"Replay quote fixture not present in {self.path}")
+            self._quotes = quotes.set_index("symbol")
+            self._quotes.index.name = None
+        return self._quotes.loc[
+            [symbol for symbol in symbols if symbol in self._quotes.index]
+        ]
@@ -0,0 +1,165 @@
+"""Central scheduler for every request made to market data provider. Requests are paced with a
+token bucket so that sustained throughput stays just under upstream rate limit, and failed
+requests are retried with jittered exponential backoff within a per symbol retry budget.
+"""
+import asyncio
+import multiprocessing
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+from stock_analysis.config import settings
+from stock_analysis.providers.base import ProviderError, ThrottledError
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+T = TypeVar("T")
+
+STATS = ("requests", "throttled", "retried", "failed")
+
+
+class RequestScheduler:
+    """Token bucket rate limiter with retry & backoff. Bucket & stats are kept in shared memory,
+    so the limit holds across all forked worker processes & stats of workers are visible in parent.
+
+    Args:
+        rate (Optional[float], optional): Requests per second. Defaults to None i.e.
+        `STOCK_ANALYSIS_REQUEST_RATE`.
+        burst (Optional[int], optional): Bucket size. Defaults to None i.e.
+        `STOCK_ANALYSIS_REQUEST_BURST`.
+        retry_budget (Optional[int], optional): Retries per symbol within budget window. Defaults
+        to None i.e. `STOCK_ANALYSIS_RETRY_BUDGET`.
+
+    Example:
+    ```python
+    from stock_analysis.providers.scheduler import RequestScheduler
+    scheduler = RequestScheduler(rate=2)
+    data = scheduler.run(['TCS.NS'], lambda: provider.history(['TCS.NS']))
+    scheduler.stats()
+    ```
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        retry_budget: Optional[int] = None,
+    ):
+        self.rate = rate or settings.request_rate
+        self.burst = burst or settings.request_burst
+        self.retry_budget = (
+            settings.retry_budget if retry_budget is None else retry_budget
+        )
+        self._lock = multiprocessing.Lock()
+        self._tokens = multiprocessing.Value("d", self.burst, lock=False)
+        self._refilled_at = multiprocessing.Value("d", time.monotonic(), lock=False)
+        self._stats = {name: multiprocessing.Value("i", 0) for name in STATS}
+        self._budget_lock = threading.Lock()
+        self._budget: Dict[str, Tuple[int, float]] = {}
+
+    def _reserve(self, tokens: int) -> float:
+        """Take tokens from bucket (bucket may go negative to reserve future tokens)
+
+        Returns:
+            float: time (in seconds) to wait till reserved tokens are available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens.value = min(
+                self.burst,
+                self._tokens.value + (now - self._refilled_at.value) * self.rate,
+            )
+            self._refilled_at.value = now
+            self._tokens.value -= tokens
+            return max(0.0, -self._tokens.value / self.rate)
+
+    def _count(self, name: str, value: int = 1):
+        with self._stats[name].get_lock():
+            self._stats[name].value += value
+
+    def _retry_delay(self, symbols: Sequence[str], attempt: int) -> Optional[float]:
+        """Charge one retry to every symbol & return backoff delay, None if any symbol has
+        exhausted its retry budget"""
+        now = time.monotonic()
+        with self._budget_lock:
+            budget = {}
+            for symbol in symbols:
+                used, since = self._budget.get(symbol, (0, now))
+                if now - since > settings.retry_budget_window:
+                    used, since = 0, now
+                if used >= self.retry_budget:
+                    return None
+                budget[symbol] = (used + 1, since)
+            self._budget.update(budget)
+        delay = min(settings.retry_max_delay, settings.retry_base_delay * 2**attempt)
+        # NOTE - full jitter, so that workers throttled together do not retry together
+        return random.uniform(0, delay)
+
+    def _on_error(
+        self, symbols: Sequence[str], attempt: int, error: ProviderError
+    ) -> float:
+        if isinstance(error, ThrottledError):
+            self._count("throttled")
+        # NOTE - only symbols which failed are charged, not every symbol of a bulk request
+        delay = self._retry_delay(
+            symbols if error.symbols is None else error.symbols, attempt
+        )
+        if delay is None:
+            self._count("failed")
+            logger.warning(f"Retry budget exhausted for {list(symbols)}: {error}")
+            raise error
+        self._count("retried")
+        logger.debug(f"Retrying {list(symbols)} after {delay:.2f}s: {error}")
+        return delay
+
+    def run(
+        self, symbols: Sequence[str], request: Callable[[], T], tokens: int = 1
+    ) -> T:
+        """Run request once rate limit allows, retrying it on `ProviderError`
+
+        Args:
+            symbols (Sequence[str]): symbols requested, charged for every retry unless the error
+            names the symbols which failed (see `ProviderError`)
+            request (Callable[[], T]): function making the request
+            tokens (int, optional): no. of upstream requests it makes. Defaults to 1.
+
+        Returns:
+            T: result of request
+
+        Raises:
+            ProviderError: If request still fails after retry budget of any symbol is exhausted
+        """
+        attempt = 0
+        while True:
+            time.sleep(self._reserve(tokens))
+            self._count("requests", tokens)
+            try:
+                return request()
+            except ProviderError as error:
+                time.sleep(self._on_error(symbols, attempt, error))
+                attempt += 1
+
+    async def arun(
+        self,
+        symbols: Sequence[str],
+        request: Callable[[], Awaitable[T]],
+        tokens: int = 1,
+    ) -> T:
+        """Awaitable version of `run`, request must be a coroutine function"""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._reserve(tokens))
+            self._count("requests", tokens)
+            try:
+                return await request()
+            except ProviderError as error:
+                await asyncio.sleep(self._on_error(symbols, attempt, error))
+                attempt += 1
+
+    def stats(self) -> Dict[str, int]:
+        """No. of requests made, throttled by upstream, retried & failed after retries"""
+        return {name: value.value for name, value in self._stats.items()}
+
+
+scheduler = RequestScheduler()
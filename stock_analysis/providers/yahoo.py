@@ -0,0 +1,95 @@
+"""Market data provider backed by Yahoo finance"""
+import datetime
+import json
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+from pandas_datareader import data as pdr
+from pandas_datareader._utils import RemoteDataError
+from pandas_datareader.yahoo.quotes import YahooQuotesReader
+from requests.exceptions import RequestException
+
+from stock_analysis.providers.base import ProviderError, ThrottledError
+
+yf.pdr_override()
+
+
+def quotes_frame(result: List[dict]) -> pd.DataFrame:
+    """Convert result of Yahoo quote api into quotes indexed by symbol"""
+    if len(result) == 0:
+        return pd.DataFrame()
+    data = pd.DataFrame(result).set_index("symbol")
+    data.index.name = None
+    data["price"] = data["regularMarketPrice"]
+    return data
+
+
+class YahooBulkQuotesReader(YahooQuotesReader):
+    """Yahoo quote reader which retrieves all given symbols in a single request, unlike
+    `YahooQuotesReader` which makes one request per symbol
+    """
+
+    def read(self) -> pd.DataFrame:
+        symbols = [self.symbols] if isinstance(self.symbols, str) else self.symbols
+        return self._read_one_data(self.url, self.params(",".join(symbols)))
+
+    def _read_lines(self, out) -> pd.DataFrame:
+        return quotes_frame(json.loads(out.read())["quoteResponse"]["result"])
+
+
+def _is_throttled(message: str) -> bool:
+    return "429" in message or "Too Many Requests" in message
+
+
+class YahooProvider:
+    """Retrive OHLCV data with `yfinance` & quotes with Yahoo quote api"""
+
+    def history(
+        self,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        if len(symbols) == 1:
+            data = pdr.get_data_yahoo(
+                symbols[0], start=start_date, end=end_date, progress=False
+            )
+        else:
+            data = pdr.get_data_yahoo(
+                symbols,
+                start=start_date,
+                end=end_date,
+                progress=False,
+                group_by="ticker",
+            )
+        if len(symbols) == 1:
+            panel = {symbols[0]: data}
+        else:
+            # NOTE - data of all symbols is aligned on common dates, so dates on which given
+            # symbol was not traded are all null
+            panel = {
+                symbol: data[symbol].dropna(how="all")
+                if symbol in data.columns.get_level_values(0)
+                else pd.DataFrame()
+                for symbol in symbols
+            }
+        # NOTE - yfinance does not raise on failure (nor expose the HTTP status) but returns no
+        # record for failed symbols. A request with no record of any symbol was rejected as a
+        # whole, which is what rate limiting looks like, while few empty symbols of a served
+        # request are delisted or unknown ones & are returned as such.
+        if all(frame.empty for frame in panel.values()):
+            raise ThrottledError(
+                f"No record served while retrieving {symbols}, likely rate limited",
+                symbols=symbols,
+            )
+        return panel
+
+    def quote(self, symbols: List[str]) -> pd.DataFrame:
+        try:
+            # NOTE - retries are handled by request scheduler
+            return YahooBulkQuotesReader(symbols, retry_count=0).read()
+        except (RemoteDataError, RequestException) as error:
+            if _is_throttled(str(error)):
+                raise ThrottledError(f"Rate limited while quoting {symbols}") from error
+            raise ProviderError(f"Cannot retrive quotes for {symbols}") from error
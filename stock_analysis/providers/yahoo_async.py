@@ -0,0 +1,216 @@
+"""Market data provider backed by Yahoo finance api, fetching concurrently with asyncio. All
+requests share one keep-alive connection pool, so hundreds of symbols are fetched from a single
+process without spawning workers just to wait on sockets.
+"""
+import asyncio
+import concurrent.futures
+import datetime
+import os
+import threading
+from typing import Awaitable, Dict, List, Optional, TypeVar
+
+import httpx
+import numpy as np
+import pandas as pd
+from pandas_datareader.yahoo.headers import DEFAULT_HEADERS
+
+from stock_analysis.config import settings
+from stock_analysis.providers.base import ProviderError, ThrottledError
+from stock_analysis.providers.scheduler import scheduler
+from stock_analysis.providers.yahoo import quotes_frame
+from stock_analysis.utils.helpers import create_chunks
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+T = TypeVar("T")
+
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+# NOTE - same as yfinance, used as start of complete history
+FIRST_TIMESTAMP = -2208994789
+
+
+def history_frame(chart: dict) -> pd.DataFrame:
+    """Convert result of Yahoo chart api into OHLCV data indexed by date"""
+    timestamps = chart.get("timestamp")
+    if not timestamps:
+        return pd.DataFrame()
+    quote = chart["indicators"]["quote"][0]
+    adj_close = chart["indicators"].get("adjclose", [{}])[0].get("adjclose")
+    # NOTE - timestamps are of session start, shifting them to exchange timezone gives the date
+    index = pd.to_datetime(
+        np.asarray(timestamps) + chart["meta"].get("gmtoffset", 0), unit="s"
+    ).normalize()
+    data = pd.DataFrame(
+        {
+            "Open": quote["open"],
+            "High": quote["high"],
+            "Low": quote["low"],
+            "Close": quote["close"],
+            "Adj Close": adj_close if adj_close is not None else quote["close"],
+            "Volume": quote["volume"],
+        },
+        index=pd.DatetimeIndex(index, name="Date"),
+        dtype="float64",
+    )
+    data = data[~data.index.duplicated(keep="last")].dropna(how="all")
+    return data
+
+
+class AsyncYahooProvider:
+    """Retrive OHLCV data & quotes concurrently on a background event loop.
+
+    Sync methods (`history`, `quote`) block till the fetch completes, async methods (`ahistory`,
+    `aquote`) can be awaited from any other event loop, e.g. FastAPI endpoints. Either way all
+    requests go through the same connection pool & every request is paced & retried by the
+    request scheduler.
+
+    Args:
+        max_in_flight (Optional[int], optional): Max no. of concurrent requests. Defaults to None
+        i.e. `STOCK_ANALYSIS_MAX_IN_FLIGHT`.
+        timeout (Optional[float], optional): Timeout (in seconds) of each request. Defaults to
+        None i.e. `STOCK_ANALYSIS_HTTP_TIMEOUT`.
+    """
+
+    # NOTE - tells `DataRetrieve` that requests are already scheduled by the provider itself
+    self_scheduled = True
+
+    def __init__(
+        self, max_in_flight: Optional[int] = None, timeout: Optional[float] = None
+    ):
+        self.max_in_flight = max_in_flight or settings.max_in_flight
+        self.timeout = timeout or settings.http_timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+
+    def _start(self):
+        """Start background event loop with shared client, (re)started lazily so that a forked
+        worker gets its own loop instead of the parent's dead one
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=self._loop.run_forever, name="async-fetcher", daemon=True
+            ).start()
+
+            async def open_client():
+                self._semaphore = asyncio.Semaphore(self.max_in_flight)
+                return httpx.AsyncClient(
+                    headers=DEFAULT_HEADERS,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_in_flight,
+                        max_keepalive_connections=self.max_in_flight,
+                    ),
+                )
+
+            self._client = asyncio.run_coroutine_threadsafe(
+                open_client(), self._loop
+            ).result()
+            self._pid = os.getpid()
+
+    def _submit(self, coroutine: Awaitable[T]) -> concurrent.futures.Future:
+        self._start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    async def _request(self, url: str, params: dict) -> Optional[dict]:
+        async with self._semaphore:
+            try:
+                response = await self._client.get(url, params=params)
+            except httpx.HTTPError as error:
+                raise ProviderError(f"Request to {url} failed: {error}") from error
+        if response.status_code == 429:
+            raise ThrottledError(f"Rate limited by {url}")
+        if response.status_code >= 500:
+            raise ProviderError(f"Request to {url} failed: {response.status_code}")
+        # NOTE - other errors (e.g. unknown symbol) are not worth retrying
+        if response.is_error:
+            return None
+        return response.json()
+
+    async def _get(self, symbols: List[str], url: str, params: dict) -> Optional[dict]:
+        return await scheduler.arun(symbols, lambda: self._request(url, params))
+
+    async def _history_one(
+        self,
+        symbol: str,
+        start_date: Optional[datetime.datetime],
+        end_date: Optional[datetime.datetime],
+    ) -> pd.DataFrame:
+        params = {
+            "period1": FIRST_TIMESTAMP
+            if start_date is None
+            else int(pd.Timestamp(start_date).timestamp()),
+            "period2": int(
+                pd.Timestamp(end_date or datetime.datetime.now()).timestamp()
+            ),
+            "interval": "1d",
+            "events": "div,splits",
+        }
+        try:
+            payload = await self._get([symbol], CHART_URL.format(symbol=symbol), params)
+            return history_frame(payload["chart"]["result"][0])
+        except (ProviderError, KeyError, IndexError, TypeError):
+            logger.warning(f"Cannot retrive data for {symbol}")
+            return pd.DataFrame()
+
+    async def _history(
+        self,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime],
+        end_date: Optional[datetime.datetime],
+    ) -> Dict[str, pd.DataFrame]:
+        panel = await asyncio.gather(
+            *(self._history_one(symbol, start_date, end_date) for symbol in symbols)
+        )
+        return dict(zip(symbols, panel))
+
+    async def _quote(self, symbols: List[str]) -> pd.DataFrame:
+        # NOTE - quote api serves many symbols in a single request, so only batches are concurrent
+        payloads = await asyncio.gather(
+            *(
+                self._get(batch, QUOTE_URL, {"symbols": ",".join(batch)})
+                for batch in create_chunks(symbols, settings.download_batch_size)
+            )
+        )
+        return quotes_frame(
+            [
+                quote
+                for payload in payloads
+                if payload is not None
+                for quote in payload["quoteResponse"]["result"]
+            ]
+        )
+
+    def history(
+        self,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        return self._submit(self._history(symbols, start_date, end_date)).result()
+
+    def quote(self, symbols: List[str]) -> pd.DataFrame:
+        return self._submit(self._quote(symbols)).result()
+
+    async def ahistory(
+        self,
+        symbols: List[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Awaitable version of `history`"""
+        return await asyncio.wrap_future(
+            self._submit(self._history(symbols, start_date, end_date))
+        )
+
+    async def aquote(self, symbols: List[str]) -> pd.DataFrame:
+        """Awaitable version of `quote`"""
+        return await asyncio.wrap_future(self._submit(self._quote(symbols)))
@@ -0,0 +1,213 @@
+"""Persisted state of EMA recurrence. EMA of today is EMA of yesterday folded with today's close,
+so once the state is stored, daily refresh needs only the records after it instead of
+recomputing EMA right from the first record.
+"""
+import datetime
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from stock_analysis.utils.formula_helpers import ema_frame
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+
+
+@dataclass
+class EMAState:
+    """State of EMA recurrence of a symbol for a period & smoothing factor
+
+    Args:
+        ema (float): EMA on last date
+        last_date (str): Date (ISO format) of last record folded into EMA
+        last_close (float): Close price on last date, used to detect change in history
+        count (int): No. of records folded into EMA
+    """
+
+    ema: float
+    last_date: str
+    last_close: float
+    count: int
+
+
+@dataclass
+class EMAStateStore:
+    """EMA states kept in memory & additionally on disk (one json per symbol) if path is given,
+    so that it is shared by all worker processes & runs.
+
+    Args:
+        path (Optional[Union[str, Path]], optional): Folder to persist the states. Defaults to
+        None i.e. in memory only.
+
+    Example:
+    ```python
+    from stock_analysis.storage.ema_state import EMAStateStore
+    states = EMAStateStore('./.ema_state')
+    ema50, ema200 = states.rebuild('TCS.NS', tcs_df['Close'], (50, 200))
+    # next day, only new records are needed
+    ema50, ema200 = states.update('TCS.NS', tcs_df['Close'][-5:], (50, 200))
+    ```
+    """
+
+    path: Optional[Union[str, Path]] = None
+
+    def __post_init__(self):
+        self._states: Dict[str, Dict[str, EMAState]] = {}
+        if self.path is not None:
+            self.path = Path(self.path)
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _key(period: int, smoothing_factor: int) -> str:
+        return f"{period}-{smoothing_factor}"
+
+    def _file(self, symbol: str) -> Path:
+        return self.path / f"{symbol}.json"
+
+    def _load(self, symbol: str) -> Dict[str, EMAState]:
+        if symbol not in self._states:
+            states = {}
+            if self.path is not None and self._file(symbol).exists():
+                with open(self._file(symbol), "r", encoding="utf-8") as state_file:
+                    states = {
+                        key: EMAState(**state)
+                        for key, state in json.load(state_file).items()
+                    }
+            self._states[symbol] = states
+        return self._states[symbol]
+
+    def _save(self, symbol: str):
+        if self.path is None:
+            return
+        # NOTE - writing to temp file first & then replacing it, so that a reader never
+        # sees half written state
+        tmp_file = self._file(symbol).with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as state_file:
+            json.dump(
+                {key: asdict(state) for key, state in self._states[symbol].items()},
+                state_file,
+            )
+        os.replace(tmp_file, self._file(symbol))
+
+    def get(
+        self, symbol: str, period: int, smoothing_factor: int = 2
+    ) -> Optional[EMAState]:
+        """Stored state of symbol, None if not present"""
+        return self._load(symbol).get(self._key(period, smoothing_factor))
+
+    def resume_date(
+        self, symbol: str, periods: Sequence[int], smoothing_factor: int = 2
+    ) -> Optional[datetime.datetime]:
+        """Date from which records are needed to update all given periods of symbol, None if
+        state of any period is not present"""
+        states = [self.get(symbol, period, smoothing_factor) for period in periods]
+        if any(state is None for state in states):
+            return None
+        return min(pd.Timestamp(state.last_date) for state in states).to_pydatetime()
+
+    def _store(
+        self,
+        symbol: str,
+        close: pd.Series,
+        emas: Dict[int, float],
+        counts: Dict[int, int],
+        smoothing_factor: int,
+    ):
+        states = self._load(symbol)
+        for period, ema in emas.items():
+            states[self._key(period, smoothing_factor)] = EMAState(
+                ema=float(ema),
+                last_date=close.index[-1].isoformat(),
+                last_close=float(close.iloc[-1]),
+                count=counts[period],
+            )
+        self._save(symbol)
+
+    def rebuild(
+        self,
+        symbol: str,
+        close: pd.Series,
+        periods: Sequence[int],
+        smoothing_factor: int = 2,
+    ) -> Tuple[float, ...]:
+        """Calculate EMA of given periods over complete given record & store its state
+
+        Args:
+            symbol (str): name of symbol
+            close (pd.Series): Close price indexed by date
+            periods (Sequence[int]): Periods for which ema has to be calculated
+            smoothing_factor (int, optional): Smoothing factor. Defaults to 2.
+
+        Returns:
+            Tuple[float, ...]: ema on last record of every period, in order of given periods
+
+        Raises:
+            ValueError: If there are less records than the longest period
+        """
+        close = close.dropna()
+        ema = ema_frame(close, periods, smoothing_factor)
+        # NOTE - last record can be of incomplete trading session, so state is stored till the
+        # record before it
+        if len(close) > max(periods):
+            self._store(
+                symbol,
+                close.iloc[:-1],
+                {period: ema[period].iloc[-2] for period in periods},
+                {period: len(close) - 1 for period in periods},
+                smoothing_factor,
+            )
+        return tuple(float(ema[period].iloc[-1]) for period in periods)
+
+    @staticmethod
+    def _fold(ema: float, close: np.ndarray, mf: float) -> float:
+        """Fold records into ema, closed form of n multiply-adds of the recurrence"""
+        weights = (1 - mf) ** np.arange(len(close) - 1, -1, -1)
+        return ema * (1 - mf) ** len(close) + mf * float(np.dot(weights, close))
+
+    def update(
+        self,
+        symbol: str,
+        close: pd.Series,
+        periods: Sequence[int],
+        smoothing_factor: int = 2,
+    ) -> Optional[Tuple[float, ...]]:
+        """Fold records after stored state into EMA of given periods. Given record must include
+        last date of the states.
+
+        Args:
+            symbol (str): name of symbol
+            close (pd.Series): Close price indexed by date
+            periods (Sequence[int]): Periods for which ema has to be calculated
+            smoothing_factor (int, optional): Smoothing factor. Defaults to 2.
+
+        Returns:
+            Optional[Tuple[float, ...]]: ema on last record of every period, None if state of
+            any period is missing, not covered by given record or history has changed since it
+            was stored (e.g. split adjusted prices) i.e. it must be rebuilt
+        """
+        close = close.dropna()
+        emas, committed, counts = {}, {}, {}
+        for period in periods:
+            state = self.get(symbol, period, smoothing_factor)
+            if state is None:
+                return None
+            last_date = pd.Timestamp(state.last_date)
+            if last_date not in close.index:
+                return None
+            if not np.isclose(close[last_date], state.last_close, rtol=1e-6):
+                logger.warning(f"History of {symbol} has changed, rebuilding its ema")
+                return None
+            new = close[close.index > last_date].to_numpy(dtype=np.float64)
+            mf = smoothing_factor / (1 + period)
+            if len(new) > 1:
+                committed[period] = self._fold(state.ema, new[:-1], mf)
+                counts[period] = state.count + len(new) - 1
+            emas[period] = self._fold(committed.get(period, state.ema), new[-1:], mf)
+        if committed:
+            self._store(symbol, close.iloc[:-1], committed, counts, smoothing_factor)
+        return tuple(emas[period] for period in periods)
@@ -0,0 +1,251 @@
+"""Memory mapped price store holding complete universe in one contiguous array per field. All
+symbols are kept back to back (ragged layout), so history of any symbol is a zero-copy view of
+the array. Since arrays are memory mapped, every worker process shares the same OS page cache
+instead of holding its own copy.
+"""
+import abc
+import datetime
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from stock_analysis.storage.ohlcv_store import OHLCVStore
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+
+FIELDS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+
+def _field_file(field: str) -> str:
+    return f"{field.lower().replace(' ', '_')}.npy"
+
+
+def field_dtype(field: str) -> str:
+    """dtype of field in ragged stores, `Date` gives dtype of dates"""
+    if field == "Date":
+        return "datetime64[ns]"
+    return "int64" if field == "Volume" else "float64"
+
+
+def ragged_layout(
+    panel: Dict[str, pd.DataFrame], fields: Sequence[str] = FIELDS
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Tuple[int, int]], int]:
+    """Records of many symbols to be stored back to back & offset of every symbol
+
+    Args:
+        panel (Dict[str, pd.DataFrame]): Data indexed by date keyed by symbol
+        fields (Sequence[str], optional): Columns to store. Defaults to all OHLCV columns.
+
+    Returns:
+        Tuple[Dict[str, pd.DataFrame], Dict[str, Tuple[int, int]], int]: sorted non empty
+        records, offset & length of every symbol & total no. of records
+    """
+    # NOTE - views are sliced by binary search on dates, so record must be sorted
+    panel = {
+        symbol: data.dropna(subset=list(fields)).sort_index()
+        for symbol, data in panel.items()
+        if not data.empty
+    }
+    offsets, offset = {}, 0
+    for symbol, data in panel.items():
+        offsets[symbol] = (offset, len(data))
+        offset += len(data)
+    return panel, offsets, offset
+
+
+def fill_ragged(
+    array: np.ndarray,
+    field: str,
+    panel: Dict[str, pd.DataFrame],
+    offsets: Dict[str, Tuple[int, int]],
+):
+    """Copy field (`Date` for dates) of every symbol into its slot of ragged array"""
+    for symbol, data in panel.items():
+        start, length = offsets[symbol]
+        if field == "Date":
+            array[start : start + length] = data.index.values.astype(field_dtype(field))
+        else:
+            array[start : start + length] = data[field].to_numpy(
+                dtype=field_dtype(field)
+            )
+
+
+class RaggedPriceStore(abc.ABC):
+    """Read only views of a ragged layout, i.e. one array per field with all symbols back to
+    back. Stores define `fields`, `offsets` (symbol to its offset & length) & `_array`."""
+
+    fields: List[str]
+    offsets: Dict[str, Tuple[int, int]]
+
+    @abc.abstractmethod
+    def _array(self, name: str) -> np.ndarray:
+        """Complete array of given field (`Date` for dates) having all symbols back to back"""
+
+    def symbols(self) -> List[str]:
+        """All the symbols available in store"""
+        return list(self.offsets)
+
+    def view(self, symbol: str, field: str = "Close") -> np.ndarray:
+        """Zero-copy read only view of complete record of given symbol & field
+
+        Args:
+            symbol (str): desired symbol
+            field (str, optional): desired field, `Date` gives the dates. Defaults to "Close".
+
+        Returns:
+            np.ndarray: record of symbol
+
+        Raises:
+            KeyError: If symbol is not present in store
+        """
+        offset, length = self.offsets[symbol]
+        return self._array(field)[offset : offset + length]
+
+    def views(
+        self,
+        symbol: str,
+        fields: Optional[Sequence[str]] = None,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Zero-copy read only views of given fields of symbol, sliced between start & end date
+        (end date is exclusive) with binary search on its dates
+
+        Args:
+            symbol (str): desired symbol
+            fields (Optional[Sequence[str]], optional): desired fields, `Date` gives the dates.
+            Defaults to None i.e. dates & all the fields of store.
+            start_date (Optional[datetime.datetime], optional): Start date. Defaults to None.
+            end_date (Optional[datetime.datetime], optional): End date. Defaults to None.
+
+        Returns:
+            Dict[str, np.ndarray]: view of every field
+
+        Raises:
+            KeyError: If symbol is not present in store
+        """
+        fields = ["Date", *self.fields] if fields is None else fields
+        dates = self.view(symbol, "Date")
+        start = (
+            0
+            if start_date is None
+            else dates.searchsorted(np.datetime64(pd.Timestamp(start_date)))
+        )
+        end = (
+            len(dates)
+            if end_date is None
+            else dates.searchsorted(np.datetime64(pd.Timestamp(end_date)))
+        )
+        return {field: self.view(symbol, field)[start:end] for field in fields}
+
+    def frame(
+        self,
+        symbol: str,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Record of given symbol as dataframe, optionally sliced between start & end date
+        (end date is exclusive). Columns & index of dataframe are the read only views of store,
+        so nothing is copied.
+
+        Returns:
+            Optional[pd.DataFrame]: record of symbol, None if symbol is not present in store
+        """
+        if symbol not in self.offsets:
+            return None
+        views = self.views(symbol, start_date=start_date, end_date=end_date)
+        dates = views.pop("Date")
+        # NOTE - `copy=False` keeps every column in a block of its own instead of consolidating
+        # (i.e. copying) columns of same dtype
+        return pd.DataFrame(
+            views, index=pd.DatetimeIndex(dates, name="Date", copy=False), copy=False
+        )
+
+
+@dataclass
+class MmapPriceStore(RaggedPriceStore):
+    """Read only ragged price store, i.e. `<path>/<field>.npy` arrays with all symbols back to
+    back, `<path>/date.npy` having dates of every record & `<path>/index.json` mapping every
+    symbol to its offset & length in the arrays. Use `MmapPriceStore.build` to create it.
+
+    Args:
+        path (Union[str, Path]): Folder having the store
+
+    Example:
+    ```python
+    from stock_analysis.storage.mmap_store import MmapPriceStore
+    store = MmapPriceStore.build('./.mmap', {'TCS.NS': tcs_df, 'INFY.NS': infy_df})
+    close = store.view('TCS.NS', 'Close')  # zero-copy numpy view
+    ```
+    """
+
+    path: Union[str, Path]
+
+    def __post_init__(self):
+        self.path = Path(self.path)
+        with open(self.path / "index.json", "r", encoding="utf-8") as index_file:
+            index = json.load(index_file)
+        self.fields: List[str] = index["fields"]
+        self.offsets: Dict[str, Tuple[int, int]] = {
+            symbol: tuple(offset) for symbol, offset in index["symbols"].items()
+        }
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __getstate__(self) -> dict:
+        # NOTE - memory mapped arrays would be pickled with complete data, so only path & index
+        # are sent to worker which then maps the files itself
+        state = self.__dict__.copy()
+        state["_arrays"] = {}
+        return state
+
+    @classmethod
+    def build(
+        cls,
+        path: Union[str, Path],
+        panel: Dict[str, pd.DataFrame],
+        fields: Sequence[str] = FIELDS,
+    ) -> "MmapPriceStore":
+        """Create (or overwrite) store from data of many symbols
+
+        Args:
+            path (Union[str, Path]): Folder to create the store in
+            panel (Dict[str, pd.DataFrame]): Data indexed by date keyed by symbol
+            fields (Sequence[str], optional): Columns to store. Defaults to all OHLCV columns.
+
+        Returns:
+            MmapPriceStore: opened store
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        panel, offsets, offset = ragged_layout(panel, fields)
+        for field in ("Date", *fields):
+            file_name = "date.npy" if field == "Date" else _field_file(field)
+            array = np.lib.format.open_memmap(
+                path / file_name, mode="w+", dtype=field_dtype(field), shape=(offset,)
+            )
+            fill_ragged(array, field, panel, offsets)
+            array.flush()
+
+        with open(path / "index.json", "w", encoding="utf-8") as index_file:
+            json.dump({"fields": list(fields), "symbols": offsets}, index_file)
+        logger.debug(f"Built memory mapped store of {len(offsets)} symbols at {path}")
+        return cls(path)
+
+    @classmethod
+    def from_ohlcv_store(
+        cls, path: Union[str, Path], ohlcv_store: OHLCVStore
+    ) -> "MmapPriceStore":
+        """Create store from complete record of every symbol present in local OHLCV store"""
+        panel = {symbol: ohlcv_store.read(symbol) for symbol in ohlcv_store.symbols()}
+        return cls.build(path, panel)
+
+    def _array(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            file_name = "date.npy" if name == "Date" else _field_file(name)
+            self._arrays[name] = np.load(self.path / file_name, mmap_mode="r")
+        return self._arrays[name]
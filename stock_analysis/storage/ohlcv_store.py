@@ -0,0 +1,104 @@
+"""Local columnar store for OHLCV data. Each symbol is kept in its own Parquet partition
+so that any company can be read or refreshed without touching the rest of the universe.
+"""
+import datetime
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Union
+
+import pandas as pd
+
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+
+
+@dataclass
+class OHLCVStore:
+    """Parquet store partitioned by symbol, i.e. `<path>/symbol=<symbol>/data.parquet`
+
+    Args:
+        path (str): Root folder of the store. Created if not present.
+
+    Example:
+    ```python
+    from stock_analysis.storage.ohlcv_store import OHLCVStore
+    store = OHLCVStore('./.store')
+    store.append('TCS.NS', tcs_df)
+    tcs_df = store.read('TCS.NS')
+    ```
+    """
+
+    path: Union[str, Path]
+
+    def __post_init__(self):
+        self.path = Path(self.path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def partition(self, symbol: str) -> Path:
+        """Path of parquet file holding data of given symbol"""
+        return self.path / f"symbol={symbol}" / "data.parquet"
+
+    def symbols(self) -> List[str]:
+        """All the symbols available in store"""
+        return sorted(
+            p.parent.name.split("=", 1)[1]
+            for p in self.path.glob("symbol=*/data.parquet")
+        )
+
+    def read(
+        self,
+        symbol: str,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Read stored data of given symbol, optionally sliced between start & end date
+        (end date is exclusive, same as Yahoo finance)
+
+        Returns:
+            Optional[pd.DataFrame]: stored data, None if symbol is not present in store
+        """
+        partition = self.partition(symbol)
+        if not partition.exists():
+            return None
+        data = pd.read_parquet(partition)
+        if start_date is not None:
+            data = data[data.index >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            data = data[data.index < pd.Timestamp(end_date)]
+        return data
+
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        """Latest recorded date of given symbol, None if symbol is not present in store"""
+        data = self.read(symbol)
+        if data is None or data.empty:
+            return None
+        return data.index[-1]
+
+    def write(self, symbol: str, data: pd.DataFrame):
+        """Overwrite complete record of given symbol"""
+        partition = self.partition(symbol)
+        partition.parent.mkdir(parents=True, exist_ok=True)
+        # NOTE - writing to temp file first & then replacing it, so that a reader never
+        # sees half written partition
+        tmp_partition = partition.with_suffix(f".{os.getpid()}.tmp")
+        data.to_parquet(tmp_partition)
+        os.replace(tmp_partition, partition)
+
+    def append(self, symbol: str, data: pd.DataFrame) -> pd.DataFrame:
+        """Append new records of given symbol. Record with an already stored date replaces
+        the older one.
+
+        Returns:
+            pd.DataFrame: complete record of symbol after appending
+        """
+        stored = self.read(symbol)
+        if stored is not None and not stored.empty:
+            data = pd.concat([stored, data])
+            data = data[~data.index.duplicated(keep="last")]
+        data = data.sort_index()
+        data.index.name = "Date"
+        self.write(symbol, data)
+        logger.debug(f"Stored {len(data)} records of {symbol}")
+        return data
@@ -0,0 +1,172 @@
+"""Cache of company quotes. Quotes change only once per trading session, so a quote retrieved
+today is reused (till it expires) by every strategy instead of being downloaded again.
+"""
+import contextlib
+import datetime
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from stock_analysis.utils.logger import set_logger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = set_logger()
+
+
+@dataclass
+class QuoteCache:
+    """Quotes cached per trading day with time to live. Cache is kept in memory & additionally on
+    disk (one pickle per day) if path is given, so that it is shared by all worker processes. The
+    file is read again only when another process has rewritten it (i.e. its modification time
+    changed) & writers merge into it under a file lock, so that no process loses quotes of other.
+
+    Args:
+        path (Optional[Union[str, Path]], optional): Folder to persist the cache. Defaults to None
+        i.e. in memory only.
+        ttl (int, optional): Time (in seconds) after which a cached quote expires. Defaults to 3600.
+
+    Example:
+    ```python
+    from stock_analysis.storage.quote_cache import QuoteCache
+    cache = QuoteCache('./.quotes')
+    cache.put(quotes_df)
+    quotes_df, missing = cache.get(['TCS.NS', 'INFY.NS'])
+    ```
+    """
+
+    path: Optional[Union[str, Path]] = None
+    ttl: int = 3600
+
+    def __post_init__(self):
+        self._day = datetime.date.today()
+        self._quotes = pd.DataFrame()
+        # NOTE - quotes handed over by another process, served only within `hold`
+        self._held = pd.DataFrame()
+        # NOTE - modification time (& inode, as every write replaces the file) of the file when it
+        # was last merged into memory, so a rewrite is noticed even on coarse mtime file systems
+        self._stamp: Optional[Tuple[int, int]] = None
+        if self.path is not None:
+            self.path = Path(self.path)
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self) -> Path:
+        return self.path / f"quotes_{self._day.isoformat()}.pkl"
+
+    def _load(self):
+        """Drop quotes of previous trading day & merge quotes persisted by other processes, if
+        file has changed since it was last merged"""
+        today = datetime.date.today()
+        if self._day != today:
+            self._day = today
+            self._quotes = pd.DataFrame()
+            self._stamp = None
+        if self.path is None:
+            return
+        stamp = self._file_stamp()
+        if stamp is not None and stamp != self._stamp:
+            self._quotes = self._merge(pd.read_pickle(self._file()), self._quotes)
+            self._stamp = stamp
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        """Modification time & inode of the file, None if it is not written yet"""
+        try:
+            stat = self._file().stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclusive lock on the cache of the day, held by one writer (of any process) at a time"""
+        if fcntl is None:
+            # NOTE - no `fcntl` on Windows, writers still replace the file atomically
+            yield
+            return
+        with open(self._file().with_suffix(".lock"), "a", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _merge(older: pd.DataFrame, newer: pd.DataFrame) -> pd.DataFrame:
+        if older.empty:
+            return newer
+        if newer.empty:
+            return older
+        quotes = pd.concat([older, newer]).sort_values("_fetched_at", kind="stable")
+        return quotes[~quotes.index.duplicated(keep="last")]
+
+    def get(self, symbols: List[str]) -> Tuple[pd.DataFrame, List[str]]:
+        """Retrive cached quotes
+
+        Args:
+            symbols (List[str]): desired symbols
+
+        Returns:
+            Tuple[pd.DataFrame, List[str]]: quotes found in cache (indexed by symbol in order of
+            given symbols) & symbols which are either not cached or expired
+        """
+        self._load()
+        quotes = self._merge(self._quotes, self._held)
+        if quotes.empty:
+            return pd.DataFrame(), list(symbols)
+        fresh = quotes[quotes["_fetched_at"] > time.time() - self.ttl]
+        found = [symbol for symbol in symbols if symbol in fresh.index]
+        missing = [symbol for symbol in symbols if symbol not in fresh.index]
+        return fresh.loc[found].drop(columns="_fetched_at"), missing
+
+    def held(self, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Quotes held in memory, to be handed over to another process (see `hold`)
+
+        Args:
+            symbols (Optional[List[str]], optional): desired symbols. Defaults to None i.e. all
+            quotes.
+        """
+        self._load()
+        quotes = self._merge(self._quotes, self._held)
+        if symbols is None or quotes.empty:
+            return quotes
+        return quotes[quotes.index.isin(symbols)]
+
+    @contextlib.contextmanager
+    def hold(self, quotes: pd.DataFrame) -> Iterator[None]:
+        """Serve quotes handed over by another process (see `held`) along with cached quotes
+        within the context. They are not added to the cache, so a long lived worker neither keeps
+        them after the context nor serves them to later requests."""
+        previous, self._held = self._held, self._merge(self._held, quotes)
+        try:
+            yield
+        finally:
+            self._held = previous
+
+    def put(self, quotes: pd.DataFrame):
+        """Add quotes (indexed by symbol) to cache"""
+        if quotes.empty:
+            return
+        quotes = quotes.assign(_fetched_at=time.time())
+        if self.path is None:
+            self._load()
+            self._quotes = self._merge(self._quotes, quotes)
+        else:
+            with self._locked():
+                # NOTE - quotes written by other processes till the lock was taken are merged
+                # in, so that replacing the file does not drop them
+                self._load()
+                self._quotes = self._merge(self._quotes, quotes)
+                # NOTE - writing to temp file first & then replacing it, so that a reader never
+                # sees half written cache
+                tmp_file = self._file().with_suffix(f".{os.getpid()}.tmp")
+                self._quotes.to_pickle(tmp_file)
+                os.replace(tmp_file, self._file())
+                self._stamp = self._file_stamp()
+        logger.debug(f"Cached quotes of {len(quotes)} companies")
@@ -0,0 +1,151 @@
+"""Shared memory price store holding the universe in one `multiprocessing.shared_memory` block per
+field (same ragged layout as memory mapped store). Parent loads the panel once & workers attach
+to the blocks by name, so history of any symbol is a zero-copy view of memory shared by all
+workers & only block names are pickled along with tasks. Workers must be started by
+`multiprocessing` (forked or spawned, e.g. `multiprocessing` & `pool` backends), so that they share
+resource tracker of the parent.
+"""
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from stock_analysis.storage.mmap_store import (
+    FIELDS,
+    RaggedPriceStore,
+    field_dtype,
+    fill_ragged,
+    ragged_layout,
+)
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+
+# NOTE - blocks detached by `close` while views of them were alive, kept referenced so that the
+# mapping stays valid (& is not closed again on garbage collection) till the views are dropped
+_retained: List[shared_memory.SharedMemory] = []
+
+
+@dataclass
+class SharedPriceStore(RaggedPriceStore):
+    """Read only ragged price store in shared memory. Use `SharedPriceStore.create` to load it,
+    pickled store (e.g. sent to a worker) attaches to the same blocks. Views & frames are zero-copy
+    read only views of the blocks. Creator must `unlink` the store once results of workers are
+    collected, views handed out before stay valid till they are dropped.
+
+    Args:
+        blocks (Dict[str, str]): Name of shared memory block of every field & `Date`
+        fields (List[str]): Fields present in store
+        offsets (Dict[str, Tuple[int, int]]): Offset & length of every symbol in the blocks
+        length (int): Total no. of records
+
+    Example:
+    ```python
+    from stock_analysis.storage.shared_store import SharedPriceStore
+    store = SharedPriceStore.create({'TCS.NS': tcs_df, 'INFY.NS': infy_df})
+    close = store.view('TCS.NS', 'Close')  # zero-copy numpy view
+    store.unlink()
+    ```
+    """
+
+    blocks: Dict[str, str]
+    fields: List[str]
+    offsets: Dict[str, Tuple[int, int]]
+    length: int
+    _memory: Dict[str, shared_memory.SharedMemory] = field(
+        default_factory=dict, repr=False
+    )
+    _arrays: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    def __getstate__(self) -> dict:
+        # NOTE - only block names & index are sent to worker which then attaches itself
+        state = self.__dict__.copy()
+        state["_memory"], state["_arrays"] = {}, {}
+        return state
+
+    @classmethod
+    def create(
+        cls, panel: Dict[str, pd.DataFrame], fields: Sequence[str] = FIELDS
+    ) -> "SharedPriceStore":
+        """Load data of many symbols into new shared memory blocks
+
+        Args:
+            panel (Dict[str, pd.DataFrame]): Data indexed by date keyed by symbol
+            fields (Sequence[str], optional): Columns to store. Defaults to all OHLCV columns.
+
+        Returns:
+            SharedPriceStore: store owning the blocks
+        """
+        panel, offsets, length = ragged_layout(panel, fields)
+        memory, arrays = {}, {}
+        try:
+            for name in ("Date", *fields):
+                dtype = np.dtype(field_dtype(name))
+                # NOTE - block of size 0 cannot be created
+                memory[name] = shared_memory.SharedMemory(
+                    create=True, size=max(length * dtype.itemsize, 1)
+                )
+                # NOTE - `frombuffer` holds the buffer exported till array (& its views) are
+                # alive, so block cannot be closed under a view
+                arrays[name] = np.frombuffer(memory[name].buf, dtype, count=length)
+                fill_ragged(arrays[name], name, panel, offsets)
+                arrays[name].flags.writeable = False
+        except BaseException:
+            for block in memory.values():
+                block.close()
+                block.unlink()
+            raise
+        logger.debug(f"Loaded {len(offsets)} symbols in shared memory")
+        return cls(
+            blocks={name: block.name for name, block in memory.items()},
+            fields=list(fields),
+            offsets=offsets,
+            length=length,
+            _memory=memory,
+            _arrays=arrays,
+        )
+
+    def _array(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            # NOTE - attaching registers the block with resource tracker, which unlinks it once
+            # its process tree exits. Workers started by multiprocessing (fork, spawn or
+            # forkserver) are handed the tracker of parent, so the block is still unlinked only
+            # by the creator. Workers with a tracker of their own (loky of `process` backend)
+            # must not attach, see `UnitExecutor._prefetch_mode`.
+            self._memory[name] = shared_memory.SharedMemory(name=self.blocks[name])
+            array = np.frombuffer(
+                self._memory[name].buf, field_dtype(name), count=self.length
+            )
+            array.flags.writeable = False
+            self._arrays[name] = array
+        return self._arrays[name]
+
+    def close(self):
+        """Detach from the blocks, block stays mapped till views handed out before are alive"""
+        self._arrays.clear()
+        for block in list(_retained):
+            try:
+                block.close()
+                _retained.remove(block)
+            except BufferError:
+                continue
+        for block in self._memory.values():
+            try:
+                block.close()
+            except BufferError:
+                logger.debug(f"Views of {block.name} are alive, left it mapped")
+                _retained.append(block)
+        self._memory.clear()
+
+    def unlink(self):
+        """Detach from & free the blocks, to be called once by creator"""
+        self.close()
+        for name in self.blocks.values():
+            try:
+                block = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                continue
+            block.close()
+            block.unlink()
@@ -0,0 +1,114 @@
+"""Compact dtypes for price panels & strategy results. Downloaded records are float64/int64 &
+strategy results are mostly object columns, which is several times the memory actually needed
+when full history of whole universe is held by every worker. Enabled with
+`STOCK_ANALYSIS_COMPACT_DTYPES` env variable.
+"""
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from stock_analysis.config import settings
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close")
+CATEGORICAL_COLUMNS = ("symbol", "company", "action", "dma action", "ema action")
+DATE_COLUMNS = ("ema_date", "current date", "start date")
+DATE_FORMAT = "%d-%m-%Y"
+
+
+def _compact_volume(volume: pd.Series) -> pd.Series:
+    """Volume as uint32 if it fits, else as it is (e.g. has missing values)"""
+    if volume.dtype.kind not in "iuf" or volume.isna().any():
+        return volume
+    if volume.empty or (
+        volume.min() >= 0
+        and volume.max() <= np.iinfo(np.uint32).max
+        and (volume % 1 == 0).all()
+    ):
+        return volume.astype(np.uint32)
+    return volume
+
+
+def compact_ohlcv(data: pd.DataFrame) -> pd.DataFrame:
+    """OHLCV record with float32 prices, uint32 volume & datetime64 index
+
+    Args:
+        data (pd.DataFrame): OHLCV record indexed by date
+
+    Returns:
+        pd.DataFrame: compact record, given record is not modified
+
+    Example:
+    ```python
+    from stock_analysis.utils.dtypes import compact_ohlcv
+    tcs_df = compact_ohlcv(tcs_df)
+    ```
+    """
+    dtypes = {column: np.float32 for column in PRICE_COLUMNS if column in data.columns}
+    data = data.astype(dtypes, copy=False)
+    if "Volume" in data.columns:
+        data = data.assign(Volume=_compact_volume(data["Volume"]))
+    if not isinstance(data.index, pd.DatetimeIndex) and len(data.index) > 0:
+        data = data.set_axis(pd.DatetimeIndex(data.index, name=data.index.name))
+    return data
+
+
+def _compact_column(column: pd.Series) -> pd.Series:
+    # NOTE - columns having `pd.NA` are object dtype even if all other values are numbers
+    if column.dtype == object:
+        numeric = pd.to_numeric(column, errors="coerce")
+        if numeric.notna().sum() != column.notna().sum():
+            return column
+        column = numeric
+    if column.dtype.kind == "f":
+        return column.astype(np.float32)
+    if column.dtype.kind in "iu":
+        return pd.to_numeric(
+            column, downcast="unsigned" if (column >= 0).all() else "integer"
+        )
+    return column
+
+
+def compact_frame(
+    data: pd.DataFrame,
+    categorical: Sequence[str] = CATEGORICAL_COLUMNS,
+    dates: Sequence[str] = DATE_COLUMNS,
+) -> pd.DataFrame:
+    """Strategy result with float32 numbers, smallest fitting integers, categorical labels &
+    datetime64 dates. Columns holding anything else (e.g. `fiftyTwoWeekRange`) are kept as they are.
+
+    Args:
+        data (pd.DataFrame): strategy result
+        categorical (Sequence[str], optional): columns to convert to categorical. Defaults to
+        symbol, company & action columns.
+        dates (Sequence[str], optional): columns having `dd-mm-YYYY` date strings. Defaults to
+        date columns of strategy results.
+
+    Returns:
+        pd.DataFrame: compact result, given result is not modified
+
+    Example:
+    ```python
+    from stock_analysis.utils.dtypes import compact_frame
+    ema_df = compact_frame(ema_df)
+    ```
+    """
+    columns = {}
+    for name, column in data.items():
+        if name in categorical:
+            columns[name] = column.astype("category")
+        elif name in dates:
+            columns[name] = pd.to_datetime(column, format=DATE_FORMAT, errors="coerce")
+        else:
+            columns[name] = _compact_column(column)
+    return pd.DataFrame(columns, index=data.index)
+
+
+def maybe_compact_ohlcv(data: pd.DataFrame) -> pd.DataFrame:
+    """`compact_ohlcv` if compact dtypes are enabled, else record as it is"""
+    return compact_ohlcv(data) if settings.compact_dtypes else data
+
+
+def maybe_compact_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """`compact_frame` if compact dtypes are enabled, else result as it is"""
+    return compact_frame(data) if settings.compact_dtypes else data
@@ -0,0 +1,137 @@
+"""Plans the smallest date range that must be fetched for an indicator, based on the no. of
+records (lookback) each indicator declares it needs till the cutoff date, & merges data needs of
+every stage of a composite strategy into a single fetch.
+"""
+import datetime
+import math
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from stock_analysis.utils.formula_helpers import EMA_WARMUP_TOLERANCE, ema_lookback
+
+# NOTE - market is open ~250 days a year, so 1.5 calendar days per record & few extra days to
+# cover long holidays
+CALENDAR_DAYS_PER_RECORD = 1.5
+HOLIDAY_SLACK_DAYS = 10
+
+
+def plan_start_date(
+    lookback: int, cutoff_date: Union[str, datetime.datetime] = "today"
+) -> datetime.datetime:
+    """Latest start date which still gives `lookback` records till cutoff date
+
+    Args:
+        lookback (int): no. of records needed till cutoff date
+        cutoff_date (Union[str, datetime.datetime], optional): Desired cutoff date. Defaults to
+        "today".
+
+    Returns:
+        datetime.datetime: start date to fetch record from
+    """
+    if cutoff_date == "today":
+        cutoff = datetime.datetime.now()
+    else:
+        cutoff = pd.Timestamp(cutoff_date).to_pydatetime()
+    days = math.ceil(lookback * CALENDAR_DAYS_PER_RECORD) + HOLIDAY_SLACK_DAYS
+    return cutoff - datetime.timedelta(days=days)
+
+
+def plan_ema_start_date(
+    periods: Sequence[int],
+    cutoff_date: Union[str, datetime.datetime] = "today",
+    smoothing_factor: int = 2,
+    tolerance: float = EMA_WARMUP_TOLERANCE,
+) -> datetime.datetime:
+    """Start date to fetch record from, to calculate EMA of all given periods till cutoff date
+    within warm-up tolerance (see `ema_lookback`)
+
+    Args:
+        periods (Sequence[int]): Periods for which ema has to be calculated
+        cutoff_date (Union[str, datetime.datetime], optional): Desired cutoff date. Defaults to
+        "today".
+        smoothing_factor (int, optional): Smoothing factor used to calculate ema. Defaults to 2.
+        tolerance (float, optional): Max residual weight of the seed. Defaults to
+        `EMA_WARMUP_TOLERANCE`.
+
+    Returns:
+        datetime.datetime: start date to fetch record from
+    """
+    lookback = max(
+        ema_lookback(period, smoothing_factor, tolerance) for period in periods
+    )
+    return plan_start_date(lookback, cutoff_date)
+
+
+@dataclass
+class FetchPlan:
+    """Data needs of every stage of a composite strategy, merged so that every company is fetched
+    once over the widest date range any stage needs & quotes are fetched once. Stages run within
+    `UnitExecutor._planned` are then served from memory, records only if `prefetch` is enabled.
+
+    Args:
+        companies (List[str]): Companies needed by any stage
+        start_date (Optional[datetime.datetime], optional): Earliest start date. Defaults to None
+        i.e. complete history.
+        end_date (Optional[datetime.datetime], optional): Latest end date (exclusive). Defaults
+        to None i.e. till today.
+        quotes (bool, optional): Whether any stage needs quotes. Defaults to False.
+        stages (int, optional): No. of stages planned. Defaults to 0.
+
+    Example:
+    ```python
+    from stock_analysis.utils.fetch_planner import FetchPlan, plan_ema_start_date
+    plan = (
+        FetchPlan()
+        .need(companies, start_date=one_year_ago, quotes=True)
+        .need(companies, start_date=plan_ema_start_date((50, 200)), quotes=True)
+    )
+    ```
+    """
+
+    companies: List[str] = field(default_factory=list)
+    start_date: Optional[datetime.datetime] = None
+    end_date: Optional[datetime.datetime] = None
+    quotes: bool = False
+    stages: int = 0
+
+    def need(
+        self,
+        companies: Iterable[str],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        quotes: bool = False,
+    ) -> "FetchPlan":
+        """Add data need of a stage, widening the date range to cover it
+
+        Args:
+            companies (Iterable[str]): Companies needed by the stage
+            start_date (Optional[datetime.datetime], optional): Start date needed by the stage.
+            Defaults to None i.e. complete history.
+            end_date (Optional[datetime.datetime], optional): End date (exclusive) needed by the
+            stage. Defaults to None i.e. till today.
+            quotes (bool, optional): Whether the stage needs quotes. Defaults to False.
+
+        Returns:
+            FetchPlan: the plan itself, so that stages can be chained
+        """
+        if self.stages == 0:
+            self.start_date, self.end_date = start_date, end_date
+        else:
+            if self.start_date is not None:
+                self.start_date = (
+                    None
+                    if start_date is None
+                    else min(pd.Timestamp(self.start_date), pd.Timestamp(start_date))
+                )
+            if self.end_date is not None:
+                self.end_date = (
+                    None
+                    if end_date is None
+                    else max(pd.Timestamp(self.end_date), pd.Timestamp(end_date))
+                )
+        self.companies = list(dict.fromkeys([*self.companies, *companies]))
+        self.quotes = self.quotes or quotes
+        self.stages += 1
+        return self
@@ -1,9 +1,21 @@
 import datetime
-from typing import List, Union
+import math
+from typing import List, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
-from stock_analysis.utils.helpers import get_appropriate_date_ema
+from stock_analysis.utils.helpers import asof_positions
+from stock_analysis.utils.jit import jit_kernel
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+
+# NOTE - EMA is a recurrence, so value at cutoff date computed over a limited window differs from
+# the one computed over complete history only by the residual weight of the window's seed, i.e.
+# (1 - multiplying factor) ** no of records after seed. Window is chosen so that this weight is
+# below the tolerance, e.g. with 1e-4 an EMA of 100 differs by at most 0.01 * |seed - EMA|/EMA.
+EMA_WARMUP_TOLERANCE = 1e-4
 
 
 def annualized_rate_of_return(end_date: int, start_date: int, duration: float) -> float:
@@ -33,58 +45,378 @@ def simple_moving_average(data: Union[pd.Series, List], period: int) -> float:
     Returns:
         float: SMA calculated over given period
     """
-    return (sum(data[:period])) / period
+    return np.asarray(data, dtype=np.float64)[:period].sum() / period
 
 
-def exponential_moving_average(
-    data_df: pd.DataFrame,
+def rolling_sum(values: Union[np.ndarray, pd.Series], window: int) -> np.ndarray:
+    """Sum of last `window` records on every record, from prefix sums in O(n). Works on a
+    series or on every column of a (records x columns) matrix. Missing records (NaN) are skipped,
+    i.e. window always spans `window` available records of the column.
+
+    Args:
+        values (Union[np.ndarray, pd.Series]): 1-D series or 2-D matrix of records
+        window (int): No. of records to sum
+
+    Returns:
+        np.ndarray: rolling sum of same shape as values, NaN on missing records & till
+        `window` records are available
+
+    Example:
+    ```python
+    from stock_analysis.utils.formula_helpers import rolling_sum
+    sum200 = rolling_sum(company_df["Close"], 200)
+    ```
+    """
+    values = np.asarray(values, dtype=np.float64)
+    flat = values.ndim == 1
+    if flat:
+        values = values[:, None]
+    valid = ~np.isnan(values)
+    prefix = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    count = np.cumsum(valid, axis=0)
+    # NOTE - prefix sum indexed by no. of available records instead of by row, so that the window
+    # skips missing records
+    ranked = np.zeros((len(values) + 1, values.shape[1]))
+    rows, columns = np.nonzero(valid)
+    ranked[count[rows, columns], columns] = prefix[rows, columns]
+    earlier = np.take_along_axis(ranked, np.maximum(count - window, 0), axis=0)
+    result = np.where(valid & (count >= window), prefix - earlier, np.nan)
+    return result[:, 0] if flat else result
+
+
+def rolling_sma(close: pd.Series, period: int) -> pd.Series:
+    """SMA over last `period` records on every record, see `rolling_sum`
+
+    Args:
+        close (pd.Series): Close price indexed by date
+        period (int): Total period used to calculate SMA
+
+    Returns:
+        pd.Series: sma of every record, NaN till `period` records are available
+    """
+    return pd.Series(rolling_sum(close, period) / period, index=close.index)
+
+
+def rolling_mean_volume(volume: pd.Series, period: int) -> pd.Series:
+    """Mean volume over last `period` records on every record, see `rolling_sum`
+
+    Args:
+        volume (pd.Series): Volume indexed by date
+        period (int): No. of records to average
+
+    Returns:
+        pd.Series: mean volume of every record, NaN till `period` records are available
+    """
+    return pd.Series(rolling_sum(volume, period) / period, index=volume.index)
+
+
+def rolling_turnover(volume: pd.Series, price: pd.Series, period: int) -> pd.Series:
+    """Turnover on every record, i.e. mean volume over last `period` records times price, same
+    as `turnover` over a sliding window
+
+    Args:
+        volume (pd.Series): Volume indexed by date
+        price (pd.Series): Price (e.g. sma) of every record
+        period (int): No. of records to average volume over
+
+    Returns:
+        pd.Series: turnover of every record, NaN till `period` records are available
+    """
+    return rolling_mean_volume(volume, period) * price
+
+
+def sma_lookback(period: int) -> int:
+    """No. of records needed till cutoff date to calculate SMA
+
+    Args:
+        period (int): Total period used to calculate SMA
+
+    Returns:
+        int: no. of records
+    """
+    return period
+
+
+def ema_lookback(
     period: int,
-    cutoff_date: Union[str, datetime.datetime] = "today",
     smoothing_factor: int = 2,
-    verbosity: int = 1,
-) -> float:
-    """Calculate exponential moving avarage based on given period
+    tolerance: float = EMA_WARMUP_TOLERANCE,
+) -> int:
+    """No. of records needed till cutoff date so that EMA calculated over them is same as the one
+    calculated over complete history, up to given warm-up tolerance
 
     Args:
-        data_df (pd.Dataframe): Data to calculate ema
         period (int): Period for which ema has to be calculated
-        cutoff_date (Union[str, datetime.datetime], optional): . Defaults to "today".
-        smoothing_factor (int, optional): Smoothing factor which will be used to calculate 'Multiplying factor'. Defaults to 2.
-        verbosity (int, optional): . Defaults to 1.
+        smoothing_factor (int, optional): Smoothing factor used to calculate ema. Defaults to 2.
+        tolerance (float, optional): Max residual weight of the seed. Defaults to
+        `EMA_WARMUP_TOLERANCE`.
 
     Returns:
-        float: ema value
+        int: no. of records
     """
-
-    ema_list = []
-    # Calculating multiplying factor
     mf = smoothing_factor / (1 + period)
+    warmup = math.ceil(math.log(tolerance) / math.log(1 - mf))
+    # NOTE - first `period` records seed the recurrence with their SMA
+    return period + warmup
+
+
+def _ema_matrix_numpy(
+    values: np.ndarray, periods: np.ndarray, mf: np.ndarray
+) -> np.ndarray:
+    """Vectorized kernel of `ema_matrix`"""
+    length, width = values.shape
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    count = np.cumsum(valid, axis=0)
+    seeded = np.flatnonzero(count[-1] >= periods)
+    starts = np.full(width, length)
+    starts[seeded] = np.argmax(count[:, seeded] >= periods[seeded], axis=0)
+    decay = 1 - mf
+
+    # NOTE - recurrence `ema[t] = decay[t] * ema[t - 1] + forcing[t]` starting from zero, where
+    # forcing is the SMA seed on first ema record of a column & `close * mf` after it. Decay of
+    # records before the seed & of missing records is 1, so the ema is carried over them as is.
+    rows = np.arange(length)[:, None]
+    after = valid & (rows > starts)
+    forcing = np.where(after, filled * mf, 0.0)
+    forcing[starts[seeded], seeded] = (
+        np.cumsum(filled[:, seeded], axis=0)[starts[seeded], np.arange(len(seeded))]
+        / periods[seeded]
+    )
+
+    # NOTE - within a block the recurrence has closed form
+    # `ema[b + j] = shrink[j] * (ema[b - 1] + sum(forcing[b + i] / shrink[i], i <= j))` where
+    # `shrink` is cumulative product of decay in the block, so blocks are swept one after another
+    # & each block is a vectorized cumulative sum. Block length is bounded so that neither
+    # `shrink` nor `1 / shrink` overflows. Decay is negative when `smoothing_factor > period + 1`,
+    # then `shrink` simply alternates in sign. Zero decay (e.g. period of 1 with default smoothing
+    # factor) has no memory at all (ema is the close itself), so it is excluded from blocks &
+    # filled in the end.
+    memoryless = decay == 0
+    decay = np.where(memoryless, 1.0, decay)
+    rate = np.abs(np.log(np.abs(decay))).max() if width > 0 else 0.0
+    block = int(max(1, min(length, 200 / rate))) if rate > 0 else length
+    step_decay = np.where(after, decay, 1.0)
+    ema = np.empty((length, width))
+    previous = np.zeros(width)
+    for begin in range(0, length, block):
+        size = min(block, length - begin)
+        shrink = np.cumprod(step_decay[begin : begin + size], axis=0)
+        scaled = np.cumsum(forcing[begin : begin + size] / shrink, axis=0)
+        ema[begin : begin + size] = shrink * (previous + scaled)
+        previous = ema[begin + size - 1]
+    ema[:, memoryless] = forcing[:, memoryless]
+    ema[~valid | (rows < starts)] = np.nan
+    return ema
+
+
+def _ema_matrix_loop(
+    values: np.ndarray, periods: np.ndarray, mf: np.ndarray
+) -> np.ndarray:
+    """Loop kernel of `ema_matrix`, compiled by numba (see `jit_kernel`)"""
+    length, width = values.shape
+    ema = np.full((length, width), np.nan)
+    count = np.zeros(width, dtype=np.int64)
+    previous = np.zeros(width)
+    for row in range(length):
+        for column in range(width):
+            value = values[row, column]
+            if np.isnan(value):
+                continue
+            count[column] += 1
+            if count[column] < periods[column]:
+                # NOTE - sum of records till seed is accumulated in place of ema
+                previous[column] += value
+            elif count[column] == periods[column]:
+                previous[column] = (previous[column] + value) / periods[column]
+                ema[row, column] = previous[column]
+            else:
+                previous[column] = value * mf[column] + previous[column] * (
+                    1 - mf[column]
+                )
+                ema[row, column] = previous[column]
+    return ema
+
+
+_ema_matrix_kernel = jit_kernel(_ema_matrix_loop, _ema_matrix_numpy)
+
+
+def ema_matrix(
+    values: np.ndarray,
+    periods: Union[int, Sequence[int]],
+    smoothing_factor: int = 2,
+) -> np.ndarray:
+    """Calculate exponential moving average of every column of a (records x columns) matrix in
+    one 2-D sweep. EMA of every column is seeded with SMA of its first `period` records & then
+    follows `ema = close * mf + previous ema * (1 - mf)`. Missing records (NaN) are skipped, i.e.
+    ema of a column is same as the one calculated over its own records only. Recurrence is
+    compiled with numba if it is installed (see `jit_kernel`).
 
-    # Calculating first SMA
-    sma0 = simple_moving_average(data_df["Close"], period)
+    Args:
+        values (np.ndarray): Close price of every record (rows) of every column
+        periods (Union[int, Sequence[int]]): Period of every column or a single period for all
+        smoothing_factor (int, optional): Smoothing factor which will be used to calculate
+        'Multiplying factor'. Defaults to 2.
 
-    # Calculating first EMA
-    ema0 = (data_df["Close"][period] * mf) + (sma0 * (1 - mf))
+    Returns:
+        np.ndarray: ema of every record, NaN for missing records & first `period - 1` records of
+        every column
+
+    Example:
+    ```python
+    from stock_analysis.utils.formula_helpers import ema_matrix
+    ema50 = ema_matrix(close_matrix, 50)
+    ```
+    """
+    values = np.asarray(values, dtype=np.float64)
+    length, width = values.shape
+    periods = np.ascontiguousarray(
+        np.broadcast_to(np.asarray(periods, dtype=np.int64), (width,))
+    )
+    if length == 0:
+        return np.empty((0, width))
+    mf = smoothing_factor / (1 + periods.astype(np.float64))
+    return _ema_matrix_kernel(values, periods, mf)
+
+
+def ema_frame(
+    close: pd.Series, periods: Sequence[int], smoothing_factor: int = 2
+) -> pd.DataFrame:
+    """Calculate exponential moving average of every record for many periods together. All
+    periods are computed in one 2-D sweep over the close series (see `ema_matrix`), so cost grows
+    with no. of records & not with no. of records times periods.
+
+    Args:
+        close (pd.Series): Close price indexed by date, missing values are skipped
+        periods (Sequence[int]): Periods for which ema has to be calculated
+        smoothing_factor (int, optional): Smoothing factor which will be used to calculate
+        'Multiplying factor'. Defaults to 2.
+
+    Returns:
+        pd.DataFrame: ema of every record (one column per period), NaN for first `period - 1`
+        records of each period
+
+    Raises:
+        ValueError: If there are less records than the longest period
+
+    Example:
+    ```python
+    from stock_analysis.utils.formula_helpers import ema_frame
+    ema = ema_frame(company_df["Close"], (50, 200))
+    ema50, ema200 = ema[50], ema[200]
+    ```
+    """
+    periods = list(periods)
+    if len(close) < max(periods):
+        raise ValueError(f"Need at least {max(periods)} records, got {len(close)}")
+    values = close.to_numpy(dtype=np.float64)
+    ema = ema_matrix(
+        np.repeat(values[:, None], len(periods), axis=1), periods, smoothing_factor
+    )
+    return pd.DataFrame(ema, index=close.index, columns=periods)
+
+
+def ema_series(close: pd.Series, period: int, smoothing_factor: int = 2) -> pd.Series:
+    """Calculate exponential moving average of every record for a single period, see `ema_frame`
+
+    Args:
+        close (pd.Series): Close price indexed by date, missing values are skipped
+        period (int): Period for which ema has to be calculated
+        smoothing_factor (int, optional): Smoothing factor which will be used to calculate
+        'Multiplying factor'. Defaults to 2.
 
-    # Calculating latest EMA
-    ema_pre = ema0
+    Returns:
+        pd.Series: ema of every record, NaN for first `period - 1` records
+
+    Raises:
+        ValueError: If there are less records than period
+
+    Example:
+    ```python
+    from stock_analysis.utils.formula_helpers import ema_series
+    ema50 = ema_series(company_df["Close"], 50)
+    ```
+    """
+    return ema_frame(close, (period,), smoothing_factor)[period]
+
+
+def exponential_moving_averages(
+    data_df: pd.DataFrame,
+    periods: Sequence[int],
+    cutoff_date: Union[str, datetime.datetime] = "today",
+    smoothing_factor: int = 2,
+    verbosity: int = 1,
+) -> Tuple[float, ...]:
+    """Calculate exponential moving avarage of many periods in a single pass. Given data is not
+    modified.
 
-    for idx in range(1, len(data_df) - 50):
-        ema = (data_df["Close"][idx + 50] * mf) + (ema_pre * (1 - mf))
-        ema_pre = ema
-        ema_list.append(ema)
-        # if cutoff_date is not None:
-        if idx == (len(data_df) - 50):
-            break
-    data_df["ema"] = [pd.NA] * (len(data_df) - len(ema_list)) + ema_list
+    Args:
+        data_df (pd.Dataframe): Data to calculate ema
+        periods (Sequence[int]): Periods for which ema has to be calculated
+        cutoff_date (Union[str, datetime.datetime], optional): Date on which ema is needed, latest
+        record on or before it is used. Defaults to "today".
+        smoothing_factor (int, optional): Smoothing factor which will be used to calculate
+        'Multiplying factor'. Defaults to 2.
+        verbosity (int, optional): Level of detail logging, 1=< Detail, 0=Less detail.
+        Defaults to 1.
+
+    Returns:
+        Tuple[float, ...]: ema value of every period, in order of given periods
+
+    Raises:
+        ValueError: If there are less records than longest period or no ema is available till
+        cutoff date
+
+    Example:
+    ```python
+    from stock_analysis.utils.formula_helpers import exponential_moving_averages
+    ema5, ema13, ema26 = exponential_moving_averages(company_df, (5, 13, 26))
+    ```
+    """
+    ema = ema_frame(data_df["Close"], periods, smoothing_factor)
     if cutoff_date == "today":
-        date = data_df.index[-1]
+        position = len(ema) - 1
     else:
-        date = get_appropriate_date_ema(
-            company_df=data_df, desired_date=cutoff_date, verbosity=verbosity
-        )
+        position = asof_positions(ema.index, cutoff_date)[0]
+        if (
+            verbosity > 0
+            and position >= 0
+            and ema.index[position] != pd.Timestamp(cutoff_date)
+        ):
+            logger.warning(
+                f"Desired date: {cutoff_date.strftime('%d-%m-%Y')} not found going for next possible date: {ema.index[position].strftime('%d-%m-%Y')}"
+            )
+    if position < 0 or ema.iloc[position].isna().any():
+        raise ValueError(f"EMA{tuple(periods)} is not available till {cutoff_date}")
+    return tuple(float(value) for value in ema.iloc[position])
+
 
-    return float(data_df[data_df.index == date]["ema"])
+def exponential_moving_average(
+    data_df: pd.DataFrame,
+    period: int,
+    cutoff_date: Union[str, datetime.datetime] = "today",
+    smoothing_factor: int = 2,
+    verbosity: int = 1,
+) -> float:
+    """Calculate exponential moving avarage based on given period. Given data is not modified.
+
+    Args:
+        data_df (pd.Dataframe): Data to calculate ema
+        period (int): Period for which ema has to be calculated
+        cutoff_date (Union[str, datetime.datetime], optional): Date on which ema is needed, latest
+        record on or before it is used. Defaults to "today".
+        smoothing_factor (int, optional): Smoothing factor which will be used to calculate 'Multiplying factor'. Defaults to 2.
+        verbosity (int, optional): Level of detail logging, 1=< Detail, 0=Less detail. Defaults to 1.
+
+    Returns:
+        float: ema value
+
+    Raises:
+        ValueError: If there are less records than period or no ema is available till cutoff date
+    """
+    return exponential_moving_averages(
+        data_df, (period,), cutoff_date, smoothing_factor, verbosity
+    )[0]
 
 
 def percentage_diff(
@@ -137,4 +469,4 @@ def turnover(volume: Union[pd.Series, List], price: float) -> float:
     Returns:
         float
     """
-    return (sum(volume) / len(volume)) * price
+    return np.asarray(volume, dtype=np.float64).mean() * price
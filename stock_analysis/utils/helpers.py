@@ -1,8 +1,9 @@
 import datetime
 import os
-from typing import Generator, Tuple
+from typing import Generator, Sequence, Tuple, Union
 
 import dateutil
+import numpy as np
 import pandas as pd
 
 from stock_analysis.utils.logger import set_logger
@@ -10,44 +11,96 @@ from stock_analysis.utils.logger import set_logger
 logger = set_logger()
 
 
+def asof_positions(
+    dates: Union[pd.DatetimeIndex, pd.Series, np.ndarray],
+    desired_dates: Union[datetime.datetime, Sequence[datetime.datetime]],
+) -> np.ndarray:
+    """Position of latest record on or before every desired date, by binary search on sorted
+    record dates i.e. O(log n) per desired date.
+
+    Args:
+        dates (Union[pd.DatetimeIndex, pd.Series, np.ndarray]): Sorted dates of record
+        desired_dates (Union[datetime.datetime, Sequence[datetime.datetime]]): One or many desired
+        dates, in any order
+
+    Returns:
+        np.ndarray: position of every desired date, -1 if it is older than first record
+
+    Example:
+    ```python
+    from stock_analysis.utils.helpers import asof_positions
+    positions = asof_positions(company_df.index, [datetime.datetime(2021, 1, 1), cutoff_date])
+    ```
+    """
+    desired_dates = pd.DatetimeIndex(np.atleast_1d(desired_dates))
+    return pd.DatetimeIndex(dates).searchsorted(desired_dates, side="right") - 1
+
+
+RETURN_HORIZONS = ("1W", "1M", "3M", "6M", "12M", "YTD")
+HORIZON_UNITS = {"D": "days", "W": "weeks", "M": "months", "Y": "years"}
+
+
+def horizon_start_dates(end_dates: pd.DatetimeIndex, horizon: str) -> pd.DatetimeIndex:
+    """Date from which return of given horizon is measured, for every end date
+
+    Args:
+        end_dates (pd.DatetimeIndex): Date of latest record of every symbol, NaT if none
+        horizon (str): `<n><unit>` where unit is D (days), W (weeks), M (months) or Y (years),
+        e.g. `1W`, `3M` or `12M`, or `YTD` i.e. since last record of previous year
+
+    Returns:
+        pd.DatetimeIndex: start date of every end date, NaT for NaT
+
+    Raises:
+        ValueError: If horizon is not in above format
+
+    Example:
+    ```python
+    from stock_analysis.utils.helpers import horizon_start_dates
+    start_dates = horizon_start_dates(pd.DatetimeIndex(['2021-06-30']), '3M')
+    ```
+    """
+    end_dates = pd.DatetimeIndex(end_dates)
+    if horizon == "YTD":
+        return end_dates.to_period("Y").to_timestamp() - pd.Timedelta(days=1)
+    count, unit = horizon[:-1], horizon[-1:]
+    if not count.isdigit() or unit not in HORIZON_UNITS:
+        raise ValueError(f"Invalid horizon {horizon}, must be like 1W, 3M, 1Y or YTD")
+    return end_dates - pd.DateOffset(**{HORIZON_UNITS[unit]: int(count)})
+
+
 def get_appropriate_date_ema(
     company_df: pd.DataFrame, desired_date: datetime.datetime, verbosity: int = 1
-) -> Tuple[datetime.datetime, float]:
-    """Return appropriate date which is present in data record.
+) -> datetime.datetime:
+    """Return appropriate date which is present in data record i.e. latest date on or before
+    desired date.
 
     Args:
-        company_df (pd.DataFrame): Company dataframe
+        company_df (pd.DataFrame): Company dataframe indexed by date
         desired_date (datetime.datetime): Desired date cut-off to calculate ema
         verbosity ([int, optional]): Level of detail logging. Default to 1.
 
     Returns:
-        Tuple[datetime.datetime,float]: Date,Close value on date retrived
+        datetime.datetime: Date retrived
 
     Raises:
-        ValueError: If desired old is older than first record
+        ValueError: If desired date is older than first record
     """
-    if desired_date < company_df.index[0]:
-        logger.error(
-            f"Given desired date {desired_date.strftime('%d-%m-%Y')} is older than first recorded date {company_df.index[0].strftime('%d-%m-%Y')}"
-        )
-
     if verbosity > 0:
         logger.debug(
             f"Your desired EMA cut-off date is {desired_date.strftime('%d-%m-%Y')}"
         )
-
-    for day_idx in range(1, 100):
-        if desired_date not in company_df.index:
-            date = desired_date - dateutil.relativedelta.relativedelta(days=day_idx)
-        else:
-            date = desired_date
-        if date in company_df.index:
-            break
-    if verbosity > 0 and desired_date != date:
+    position = asof_positions(company_df.index, desired_date)[0]
+    if position < 0:
+        logger.error(
+            f"Given desired date {desired_date.strftime('%d-%m-%Y')} is older than first recorded date {company_df.index[0].strftime('%d-%m-%Y')}"
+        )
+        raise ValueError
+    date = company_df.index[position]
+    if verbosity > 0 and date != desired_date:
         logger.warning(
             f"Desired date: {desired_date.strftime('%d-%m-%Y')} not found going for next possible date: {date.strftime('%d-%m-%Y')}"
         )
-
     return date
 
 
@@ -57,10 +110,11 @@ def get_appropriate_date_momentum(
     duration: Tuple[int, int] = (0, 1),
     verbosity: int = 1,
 ) -> Tuple[datetime.datetime, float]:
-    """Return appropriate date which is present in data record.
+    """Return appropriate date which is present in data record i.e. latest date on or before
+    the date `duration` before last record.
 
     Args:
-        company_df (pd.DataFrame): Company dataframe
+        company_df (pd.DataFrame): Company dataframe with `Date` column
         duration (Tuple[year,month], optional): Desired duration to go back to retrive record. Default to (0,1)
         verbosity (int, optional): Level of detail logging, 1=< Deatil, 0=Less detail. Default to 1
 
@@ -75,33 +129,22 @@ def get_appropriate_date_momentum(
     desired_date = current_date - dateutil.relativedelta.relativedelta(
         years=duration[0], months=duration[1]
     )
-    if desired_date < company_df.iloc[0].Date:
+    if verbosity > 0:
+        logger.debug(
+            f"Your desired date for monthly return  for {company} is {desired_date.strftime('%d-%m-%Y')}"
+        )
+    position = asof_positions(company_df["Date"], desired_date)[0]
+    if position < 0:
         logger.error(
             f"Given desired date {desired_date.strftime('%d-%m-%Y')} is older than first recorded date {company_df.iloc[0].Date.strftime('%d-%m-%Y')}"
         )
         raise ValueError
-    dd_copy = desired_date
-
-    if verbosity > 0:
-        logger.debug(
-            f"Your desired date for monthly return  for {company} is {desired_date.strftime('%d-%m-%Y')}"
+    date = company_df["Date"].iloc[position]
+    if verbosity > 0 and date != desired_date:
+        logger.warning(
+            f"Desired date: {desired_date.strftime('%d-%m-%Y')} not found going for next possible date: {date.strftime('%d-%m-%Y')}"
         )
-
-    if len(company_df.loc[company_df["Date"] == desired_date]) != 0:
-        desired_close = company_df.loc[company_df["Date"] == desired_date]
-    else:
-        for i in range(1, 100):
-            if len(company_df.loc[company_df["Date"] == desired_date]) == 0:
-                desired_date = desired_date - dateutil.relativedelta.relativedelta(
-                    days=i
-                )
-                desired_close = company_df.loc[company_df["Date"] == desired_date]
-            break
-        if verbosity > 0:
-            logger.warning(
-                f"Desired date: {dd_copy.strftime('%d-%m-%Y')} not found going for next possible date: {desired_date.strftime('%d-%m-%Y')}"
-            )
-    return desired_date, desired_close.iloc[-1].Close
+    return date, company_df["Close"].iloc[position]
 
 
 def new_folder(path: str):
@@ -0,0 +1,46 @@
+"""Optional Numba backend for indicator kernels. Recurrences are plain loops when compiled, which
+is faster than the vectorized NumPy kernels for full history of many periods. Compiled code is
+cached on disk, so it is compiled only on first ever call & not on every start up. Install
+`numba` to enable it, without it (or with `STOCK_ANALYSIS_JIT=false`) NumPy kernels are used.
+"""
+import os
+from typing import Callable
+
+from stock_analysis.config import settings
+from stock_analysis.utils.logger import set_logger
+
+logger = set_logger()
+
+# NOTE - numba reads cache folder only when imported
+if settings.jit_cache_path is not None:
+    os.environ.setdefault("NUMBA_CACHE_DIR", settings.jit_cache_path)
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+JIT_ENABLED = numba is not None and settings.jit
+
+
+def jit_kernel(kernel: Callable, fallback: Callable) -> Callable:
+    """Compiled kernel if numba is available & enabled, else its NumPy fallback. Both must take
+    same arguments & return same result.
+
+    Args:
+        kernel (Callable): loop kernel written in numba compatible python
+        fallback (Callable): vectorized NumPy kernel
+
+    Returns:
+        Callable: kernel to be used
+
+    Example:
+    ```python
+    from stock_analysis.utils.jit import jit_kernel
+    _ema_kernel = jit_kernel(_ema_matrix_loop, _ema_matrix_numpy)
+    ```
+    """
+    if not JIT_ENABLED:
+        return fallback
+    logger.debug(f"Using numba compiled {kernel.__name__}")
+    return numba.njit(cache=True, nogil=True)(kernel)
@@ -0,0 +1,79 @@
+"""Streaming top-k selection. Results of a batch are consumed as they arrive & only the best k
+are kept, so memory is bound by k instead of by universe size & a provisional leaderboard is
+available at any point of the scan.
+"""
+import heapq
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+
+@dataclass
+class TopK:
+    """Best k rows by score, kept in a min-heap of size k i.e. O(log k) per row. Rows without
+    score (missing or NA) are skipped. Among equal scores, earlier row ranks first.
+
+    Args:
+        k (int): No. of rows to keep
+        key (str): Name of the score in every row
+
+    Example:
+    ```python
+    from stock_analysis.utils.top_k import TopK
+    top = TopK(20, "return_yearly")
+    for row in rows:
+        top.push(row)
+    leaderboard = top.leaderboard()
+    ```
+    """
+
+    k: int
+    key: str
+
+    def __post_init__(self):
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, row: Dict[str, Any]) -> bool:
+        """Add row if it is among the best k seen so far
+
+        Returns:
+            bool: True if row is kept
+        """
+        score = row.get(self.key)
+        if self.k <= 0 or score is None or pd.isna(score):
+            return False
+        # NOTE - negative arrival order, so that among equal scores the latest is evicted first
+        entry = (float(score), -next(self._order), row)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> "TopK":
+        """Add all rows, see `push`"""
+        for row in rows:
+            self.push(row)
+        return self
+
+    def leaderboard(self) -> pd.DataFrame:
+        """Rows kept so far, best first. Columns are in order of arrival of rows (same as a frame
+        of all rows in order of companies), not in order of rank."""
+        # NOTE - second item of an entry is negative arrival order
+        arrived = sorted(self._heap, key=lambda entry: -entry[1])
+        ranks = sorted(
+            range(len(arrived)), key=lambda idx: arrived[idx][:2], reverse=True
+        )
+        return (
+            pd.DataFrame([row for *_, row in arrived])
+            .iloc[ranks]
+            .reset_index(drop=True)
+        )
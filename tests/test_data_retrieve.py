@@ -0,0 +1,527 @@
+"""Unit test for data retrieval & local OHLCV store
+"""
+import asyncio
+import datetime
+import pickle
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis.data_retrieve import DataRetrieve
+from stock_analysis.executors.panel import PricePanel
+from stock_analysis.executors.parallel import UnitExecutor
+from stock_analysis.momentum_strategy import MomentumStrategy
+from stock_analysis.config import settings
+from stock_analysis.providers.base import MarketDataProvider, ThrottledError
+from stock_analysis.providers.scheduler import RequestScheduler
+from stock_analysis.providers.yahoo_async import history_frame
+from stock_analysis.utils.formula_helpers import ema_frame
+from stock_analysis.storage.ema_state import EMAStateStore
+from stock_analysis.storage.mmap_store import MmapPriceStore
+from stock_analysis.storage.ohlcv_store import OHLCVStore
+from stock_analysis.storage.quote_cache import QuoteCache
+from stock_analysis.storage.shared_store import SharedPriceStore
+
+
+def sample_ohlcv(start: str, periods: int) -> pd.DataFrame:
+    index = pd.bdate_range(start, periods=periods, name="Date")
+    close = np.linspace(100, 200, periods)
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close,
+            "Low": close,
+            "Close": close,
+            "Adj Close": close,
+            "Volume": np.arange(periods) * 1000,
+        },
+        index=index,
+    )
+
+
+class RecordingProvider:
+    """Provider serving sample data & recording every request made to it"""
+
+    def __init__(self):
+        self.requested = []
+        self.quoted = []
+
+    def history(self, symbols, start_date=None, end_date=None):
+        self.requested.append((list(symbols), start_date))
+        if start_date is None:
+            return {symbol: sample_ohlcv("2022-01-03", 10) for symbol in symbols}
+        return {symbol: sample_ohlcv(start_date, 3) for symbol in symbols}
+
+    def quote(self, symbols):
+        self.quoted.append(list(symbols))
+        return pd.DataFrame(
+            {"longName": [f"{symbol} Ltd." for symbol in symbols]}, index=symbols
+        )
+
+
+def test_store_append(tmp_path):
+    """test to check appending only adds newer records"""
+    store = OHLCVStore(tmp_path)
+    assert store.read("TCS.NS") is None, "Symbol must not be present"
+
+    store.append("TCS.NS", sample_ohlcv("2022-01-03", 10))
+    # overlapping record must replace the stored one
+    store.append("TCS.NS", sample_ohlcv("2022-01-12", 5) * 2)
+    data = store.read("TCS.NS")
+
+    assert len(data) == 12, "Incorrect no of records"
+    assert data.index.is_unique, "Found duplicate dates"
+    assert data.loc["2022-01-12", "Close"] == 200, "Overlapping record not replaced"
+    assert store.last_date("TCS.NS") == pd.Timestamp(
+        "2022-01-18"
+    ), "Incorrect last date"
+    assert store.symbols() == ["TCS.NS"], "Incorrect symbols"
+
+
+def test_retrieve_tail_only(tmp_path, monkeypatch):
+    """test to check only records after last stored date are downloaded"""
+    provider = RecordingProvider()
+    assert isinstance(provider, MarketDataProvider), "Incorrect provider interface"
+    monkeypatch.setattr(DataRetrieve, "provider", provider)
+    monkeypatch.setattr(DataRetrieve, "store", OHLCVStore(tmp_path))
+    complete = DataRetrieve.single_company_complete("TCS.NS")
+    refreshed = DataRetrieve.single_company_complete("TCS.NS")
+    specific = DataRetrieve.single_company_specific(
+        "TCS.NS",
+        start_date=datetime.datetime(2022, 1, 5),
+        end_date=datetime.datetime(2022, 1, 10),
+    )
+
+    assert provider.requested == [
+        (["TCS.NS"], None),
+        (["TCS.NS"], pd.Timestamp("2022-01-14")),
+    ], "Incorrect download range"
+    assert len(complete) == 10, "Incorrect no of records"
+    assert len(refreshed) == 12, "Tail not appended"
+    assert len(specific) == 3, "Incorrect slicing of stored record"
+
+
+def test_many_companies(monkeypatch):
+    """test to check bulk download in batches & serving prefetched data"""
+    provider = RecordingProvider()
+    monkeypatch.setattr(DataRetrieve, "provider", provider)
+    symbols = ["TCS.NS", "INFY.NS", "WIPRO.NS"]
+    panel = DataRetrieve.many_companies(symbols, batch_size=2)
+
+    assert [batch for batch, _ in provider.requested] == [
+        ["TCS.NS", "INFY.NS"],
+        ["WIPRO.NS"],
+    ], "Incorrect batches"
+    assert list(panel.keys()) == symbols, "Incorrect symbols"
+    assert all(len(data) == 10 for data in panel.values()), "Incorrect no of records"
+
+    with DataRetrieve.prefetched(symbols, batch_size=3):
+        complete = DataRetrieve.single_company_complete("INFY.NS")
+        specific = DataRetrieve.single_company_specific(
+            "INFY.NS",
+            start_date=datetime.datetime(2022, 1, 5),
+            end_date=datetime.datetime(2022, 1, 10),
+        )
+        held = DataRetrieve._prefetched["INFY.NS"][2]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            specific.reset_index(inplace=True)
+            complete.drop(complete.index[:5], inplace=True)
+        assert len(held) == 10, "Held data modified by caller"
+        assert np.shares_memory(
+            specific["Close"].to_numpy(), held["Close"].to_numpy()
+        ), "Prefetched data copied"
+    assert len(provider.requested) == 3, "Prefetched data downloaded again"
+    assert len(complete) == 5, "Incorrect no of records"
+    assert len(specific) == 3, "Incorrect slicing of prefetched record"
+    assert not DataRetrieve._prefetched, "Prefetched data not released"
+
+
+def test_quote_cache(tmp_path, monkeypatch):
+    """test to check quotes are downloaded in bulk & only once per ttl"""
+    provider = RecordingProvider()
+    monkeypatch.setattr(DataRetrieve, "provider", provider)
+    monkeypatch.setattr(DataRetrieve, "quote_cache", QuoteCache(tmp_path))
+    DataRetrieve.many_companies_quote(["TCS.NS", "INFY.NS"])
+    quotes = DataRetrieve.many_companies_quote(["WIPRO.NS", "TCS.NS", "INFY.NS"])
+    single_quote = DataRetrieve.single_company_quote("TCS.NS")
+
+    assert provider.quoted == [
+        ["TCS.NS", "INFY.NS"],
+        ["WIPRO.NS"],
+    ], "Cached quote downloaded again"
+    assert list(quotes.index) == ["WIPRO.NS", "TCS.NS", "INFY.NS"], "Incorrect order"
+    assert single_quote["longName"][0] == "TCS.NS Ltd.", "Incorrect quote"
+    # quote persisted by one process must be visible to other
+    persisted, missing = QuoteCache(tmp_path).get(["TCS.NS", "HDFC.NS"])
+    assert list(persisted.index) == ["TCS.NS"] and missing == [
+        "HDFC.NS"
+    ], "Not persisted"
+    # expired quote must be reported as missing
+    _, missing = QuoteCache(tmp_path, ttl=-1).get(["TCS.NS"])
+    assert missing == ["TCS.NS"], "Expired quote served"
+
+
+def test_quote_cache_writers(tmp_path, monkeypatch):
+    """test to check quote file is read only when changed & writers do not drop quotes of other"""
+    provider = RecordingProvider()
+    first, second = QuoteCache(tmp_path), QuoteCache(tmp_path)
+    first.put(provider.quote(["TCS.NS"]))
+    # NOTE - second has never read the file, so writing must merge quotes of first
+    second.put(provider.quote(["INFY.NS"]))
+    quotes, missing = first.get(["TCS.NS", "INFY.NS"])
+    assert list(quotes.index) == ["TCS.NS", "INFY.NS"] and not missing, "Quote lost"
+
+    reads = []
+    read_pickle = pd.read_pickle
+    monkeypatch.setattr(
+        pd, "read_pickle", lambda *args: reads.append(args) or read_pickle(*args)
+    )
+    for _ in range(3):
+        first.get(["TCS.NS"])
+    assert not reads, "Unchanged file read again"
+    second.put(provider.quote(["WIPRO.NS"]))
+    _, missing = first.get(["WIPRO.NS"])
+    assert len(reads) == 1 and not missing, "Changed file not read"
+
+
+def test_holding_released(monkeypatch):
+    """test to check data handed over to a worker is served only within `holding`"""
+    provider = RecordingProvider()
+    monkeypatch.setattr(DataRetrieve, "provider", provider)
+    monkeypatch.setattr(DataRetrieve, "store", None)
+    monkeypatch.setattr(DataRetrieve, "mmap_store", None)
+    monkeypatch.setattr(DataRetrieve, "quote_cache", QuoteCache())
+    monkeypatch.setattr(
+        DataRetrieve,
+        "_prefetched",
+        {"TCS.NS": (None, None, sample_ohlcv("2022-01-03", 4))},
+    )
+    parent = QuoteCache()
+    parent.put(provider.quote(["TCS.NS", "INFY.NS"]))
+    held = (
+        {
+            "TCS.NS": (None, None, sample_ohlcv("2022-01-03", 6)),
+            "INFY.NS": (None, None, sample_ohlcv("2022-01-03", 6)),
+        },
+        parent.held(),
+        None,
+    )
+
+    with DataRetrieve.holding(held):
+        quotes = DataRetrieve.many_companies_quote(["TCS.NS", "INFY.NS"])
+        assert len(DataRetrieve.single_company_complete("TCS.NS")) == 6, "Not served"
+    assert list(quotes.index) == ["TCS.NS", "INFY.NS"], "Handed over quotes not served"
+    assert len(provider.quoted) == 1, "Handed over quotes downloaded again"
+
+    assert list(DataRetrieve._prefetched) == ["TCS.NS"], "Handed over records kept"
+    assert len(DataRetrieve._prefetched["TCS.NS"][2]) == 4, "Own records not restored"
+    assert DataRetrieve.quote_cache.held().empty, "Handed over quotes kept"
+
+
+def test_mmap_store(tmp_path, monkeypatch):
+    """test to check zero-copy views of memory mapped store"""
+    panel = {
+        "TCS.NS": sample_ohlcv("2022-01-03", 10),
+        "INFY.NS": sample_ohlcv("2022-01-05", 4),
+    }
+    store = MmapPriceStore.build(tmp_path, panel)
+    close = store.view("INFY.NS", "Close")
+
+    assert store.symbols() == ["TCS.NS", "INFY.NS"], "Incorrect symbols"
+    assert isinstance(close.base, np.memmap), "View is not zero-copy"
+    assert np.array_equal(close, panel["INFY.NS"]["Close"]), "Incorrect record"
+    assert not pickle.loads(pickle.dumps(store))._arrays, "Mapped data got pickled"
+
+    provider = RecordingProvider()
+    monkeypatch.setattr(DataRetrieve, "provider", provider)
+    monkeypatch.setattr(DataRetrieve, "mmap_store", MmapPriceStore(tmp_path))
+    complete = DataRetrieve.single_company_complete("TCS.NS")
+    specific = DataRetrieve.single_company_specific(
+        "TCS.NS",
+        start_date=datetime.datetime(2022, 1, 5),
+        end_date=datetime.datetime(2022, 1, 10),
+    )
+    frame = store.frame("INFY.NS")
+    many = DataRetrieve.many_companies(["TCS.NS", "INFY.NS"])
+    price_panel = PricePanel.retrieve(["TCS.NS", "INFY.NS"])
+    assert not provider.requested, "Stored data downloaded again"
+    pd.testing.assert_frame_equal(complete, panel["TCS.NS"], check_freq=False)
+    assert len(specific) == 3, "Incorrect slicing of stored record"
+    assert np.shares_memory(frame["Close"].to_numpy(), close), "Frame is not zero-copy"
+    assert np.shares_memory(
+        frame.index.values, store.view("INFY.NS", "Date")
+    ), "Index is not zero-copy"
+    pd.testing.assert_frame_equal(many["INFY.NS"], panel["INFY.NS"], check_freq=False)
+    expected = PricePanel.from_frames(panel)
+    pd.testing.assert_index_equal(price_panel.dates, expected.dates)
+    assert np.array_equal(
+        price_panel.close, expected.close, equal_nan=True
+    ), "Incorrect panel of stored records"
+
+
+def test_shared_store(monkeypatch):
+    """test to check shared memory store is attached by name & serves data retrieval"""
+    panel = {
+        "TCS.NS": sample_ohlcv("2022-01-03", 10),
+        "INFY.NS": sample_ohlcv("2022-01-05", 4),
+    }
+    store = SharedPriceStore.create(panel)
+    try:
+        attached = pickle.loads(pickle.dumps(store))
+        assert len(pickle.dumps(store)) < 1000, "Shared data got pickled"
+        assert np.array_equal(
+            attached.view("INFY.NS", "Close"), panel["INFY.NS"]["Close"]
+        ), "Incorrect record"
+        assert not attached.view("INFY.NS").flags.writeable, "View is writeable"
+        frame = attached.frame("INFY.NS")
+        assert np.shares_memory(
+            frame["Close"].to_numpy(), attached.view("INFY.NS", "Close")
+        ), "Frame is not zero-copy"
+        del frame
+        attached.close()
+    finally:
+        store.unlink()
+
+    provider = RecordingProvider()
+    monkeypatch.setattr(DataRetrieve, "provider", provider)
+    monkeypatch.setattr(DataRetrieve, "mmap_store", None)
+    with DataRetrieve.shared(["TCS.NS"]):
+        provider.requested.clear()
+        complete = DataRetrieve.single_company_complete("TCS.NS")
+        specific = DataRetrieve.single_company_specific(
+            "TCS.NS",
+            start_date=datetime.datetime(2022, 1, 5),
+            end_date=datetime.datetime(2022, 1, 10),
+        )
+        assert not provider.requested, "Shared data downloaded again"
+    pd.testing.assert_frame_equal(complete, panel["TCS.NS"], check_freq=False)
+    assert len(specific) == 3, "Incorrect slicing of shared record"
+    assert DataRetrieve._shared is None, "Shared store not released"
+
+    async def run_strategy():
+        async with DataRetrieve.ashared(["TCS.NS", "INFY.NS"]) as store:
+            async with DataRetrieve.ashared(["INFY.NS"]) as nested:
+                assert nested is store, "Loaded store not reused"
+            return store, DataRetrieve.single_company_complete("INFY.NS")
+
+    provider.requested.clear()
+    store, complete = asyncio.run(run_strategy())
+    assert provider.requested == [(["TCS.NS", "INFY.NS"], None)], "Not fetched together"
+    assert sorted(store.symbols()) == ["INFY.NS", "TCS.NS"], "Incorrect symbols"
+    assert len(complete) == 10, "Incorrect no of records"
+    assert DataRetrieve._shared is None, "Shared store not released"
+
+
+def test_async_retrieve(monkeypatch):
+    """test to check async api awaits async provider & serves prefetched data"""
+
+    class AsyncRecordingProvider(RecordingProvider):
+        async def ahistory(self, symbols, start_date=None, end_date=None):
+            return self.history(symbols, start_date, end_date)
+
+        async def aquote(self, symbols):
+            return self.quote(symbols)
+
+    async def run_strategy():
+        async with DataRetrieve.aprefetched(["TCS.NS", "INFY.NS"]):
+            quotes = await DataRetrieve.many_companies_quote_async(["TCS.NS"])
+            return quotes, DataRetrieve.single_company_complete("INFY.NS")
+
+    provider = AsyncRecordingProvider()
+    monkeypatch.setattr(DataRetrieve, "provider", provider)
+    monkeypatch.setattr(DataRetrieve, "quote_cache", QuoteCache())
+    quotes, complete = asyncio.run(run_strategy())
+
+    assert provider.requested == [(["TCS.NS", "INFY.NS"], None)], "Not fetched together"
+    assert provider.quoted == [["TCS.NS"]], "Incorrect quote request"
+    assert len(complete) == 10, "Incorrect no of records"
+    assert list(quotes.index) == ["TCS.NS"], "Incorrect quotes"
+
+
+def test_history_frame():
+    """test to check parsing of Yahoo chart api result"""
+    chart = {
+        "meta": {"gmtoffset": 19800},
+        "timestamp": [1641181500, 1641267900, 1641267900],
+        "indicators": {
+            "quote": [
+                {
+                    "open": [1.0, 2.0, 2.5],
+                    "high": [1.0, 2.0, 2.5],
+                    "low": [1.0, 2.0, 2.5],
+                    "close": [1.0, 2.0, 2.5],
+                    "volume": [10, 20, 25],
+                }
+            ],
+            "adjclose": [{"adjclose": [0.5, 1.0, 1.25]}],
+        },
+    }
+    data = history_frame(chart)
+
+    assert list(data.index) == [
+        pd.Timestamp("2022-01-03"),
+        pd.Timestamp("2022-01-04"),
+    ], "Incorrect dates"
+    assert list(data["Close"]) == [1.0, 2.5], "Duplicate session not replaced"
+    assert list(data["Adj Close"]) == [0.5, 1.25], "Incorrect adjusted close"
+
+
+class ThrottledProvider(RecordingProvider):
+    """Provider rejecting first given no. of requests as rate limited, naming the failed symbols
+    if they are given"""
+
+    def __init__(self, throttle: int, failed=None):
+        super().__init__()
+        self.throttle = throttle
+        self.failed = failed
+
+    def history(self, symbols, start_date=None, end_date=None):
+        if self.throttle > 0:
+            self.throttle -= 1
+            raise ThrottledError("429 Too Many Requests", symbols=self.failed)
+        return super().history(symbols, start_date, end_date)
+
+
+def test_request_scheduler(monkeypatch):
+    """test to check throttled requests are retried within retry budget"""
+    monkeypatch.setattr(settings, "retry_base_delay", 0.01)
+    monkeypatch.setattr(DataRetrieve, "store", None)
+    monkeypatch.setattr(DataRetrieve, "mmap_store", None)
+    monkeypatch.setattr(
+        DataRetrieve, "scheduler", RequestScheduler(rate=1000, retry_budget=2)
+    )
+
+    monkeypatch.setattr(DataRetrieve, "provider", ThrottledProvider(throttle=1))
+    data = DataRetrieve.single_company_complete("TCS.NS")
+    assert len(data) == 10, "Throttled request not retried"
+    assert DataRetrieve.request_stats() == {
+        "requests": 2,
+        "throttled": 1,
+        "retried": 1,
+        "failed": 0,
+    }, "Incorrect request stats"
+
+    # NOTE - one retry of TCS is already charged, so only one more is allowed
+    monkeypatch.setattr(DataRetrieve, "provider", ThrottledProvider(throttle=2))
+    try:
+        DataRetrieve.single_company_complete("TCS.NS")
+        assert False, "Retry budget not enforced"
+    except ThrottledError:
+        pass
+    assert DataRetrieve.request_stats()["failed"] == 1, "Failure not counted"
+
+
+def test_retry_budget_of_failed_symbols(monkeypatch):
+    """test to check only failed symbols of a bulk request are charged for its retry"""
+    monkeypatch.setattr(settings, "retry_base_delay", 0.01)
+    monkeypatch.setattr(DataRetrieve, "store", None)
+    monkeypatch.setattr(DataRetrieve, "mmap_store", None)
+    monkeypatch.setattr(
+        DataRetrieve, "scheduler", RequestScheduler(rate=1000, retry_budget=1)
+    )
+    monkeypatch.setattr(
+        DataRetrieve, "provider", ThrottledProvider(throttle=1, failed=["INFY.NS"])
+    )
+    assert list(DataRetrieve.many_companies(["TCS.NS", "INFY.NS"])) == [
+        "TCS.NS",
+        "INFY.NS",
+    ], "Throttled batch not retried"
+
+    monkeypatch.setattr(DataRetrieve, "provider", ThrottledProvider(throttle=1))
+    data = DataRetrieve.single_company_complete("TCS.NS")
+    assert len(data) == 10, "Served symbol of bulk request charged"
+    monkeypatch.setattr(DataRetrieve, "provider", ThrottledProvider(throttle=1))
+    with pytest.raises(ThrottledError):
+        DataRetrieve.single_company_complete("INFY.NS")
+
+
+def test_yahoo_throttle_from_result(monkeypatch):
+    """test to check yahoo request with no record of any symbol is taken as rate limited"""
+    # pylint: disable=import-outside-toplevel
+    from stock_analysis.providers import yahoo
+
+    provider = yahoo.YahooProvider()
+    monkeypatch.setattr(
+        yahoo.pdr, "get_data_yahoo", lambda *args, **kwargs: pd.DataFrame()
+    )
+    with pytest.raises(ThrottledError) as error:
+        provider.history(["TCS.NS", "INFY.NS"])
+    assert error.value.symbols == ["TCS.NS", "INFY.NS"], "Failed symbols not named"
+
+    served = pd.concat({"TCS.NS": sample_ohlcv("2022-01-03", 3)}, axis="columns")
+    monkeypatch.setattr(yahoo.pdr, "get_data_yahoo", lambda *args, **kwargs: served)
+    panel = provider.history(["TCS.NS", "DELISTED.NS"])
+    assert len(panel["TCS.NS"]) == 3, "Incorrect record"
+    assert panel["DELISTED.NS"].empty, "Unknown symbol of served request must be empty"
+
+
+@pytest.mark.parametrize("panel", [False, True])
+def test_retry_budget_exhausted_in_batch(monkeypatch, panel):
+    """test to check batch with exhausted retry budget gives NA rows instead of raising"""
+    monkeypatch.setattr(settings, "retry_base_delay", 0.01)
+    monkeypatch.setattr(DataRetrieve, "store", None)
+    monkeypatch.setattr(DataRetrieve, "mmap_store", None)
+    monkeypatch.setattr(DataRetrieve, "quote_cache", QuoteCache())
+    monkeypatch.setattr(
+        DataRetrieve, "scheduler", RequestScheduler(rate=1000, retry_budget=1)
+    )
+    monkeypatch.setattr(DataRetrieve, "provider", ThrottledProvider(throttle=100))
+
+    assert DataRetrieve.many_companies(["TCS.NS", "INFY.NS"]) == {}, "Batch not skipped"
+    momentum = MomentumStrategy(
+        company_name=["TCS", "INFY"], prefetch=True, panel=panel, backend="sequential"
+    ).relative_momentum(save=False, verbosity=0)
+    assert momentum.empty, "Companies without record must not be ranked"
+
+    end = datetime.datetime.now()
+    row = UnitExecutor().unit_momentum("TCS", end - datetime.timedelta(days=365), end)
+    assert pd.isna(row["return_yearly"]), "Return must be NA"
+    assert DataRetrieve.request_stats()["failed"] > 0, "Failure not counted"
+
+
+def test_compact_dtypes(monkeypatch):
+    """test to check compact dtypes of retrieved data"""
+    monkeypatch.setattr(settings, "compact_dtypes", True)
+    monkeypatch.setattr(DataRetrieve, "store", None)
+    monkeypatch.setattr(DataRetrieve, "mmap_store", None)
+    monkeypatch.setattr(DataRetrieve, "provider", RecordingProvider())
+
+    data = DataRetrieve.single_company_complete("TCS.NS")
+    assert data["Close"].dtype == np.float32, "Price is not float32"
+    assert data["Volume"].dtype == np.uint32, "Volume is not uint32"
+    assert isinstance(data.index, pd.DatetimeIndex), "Index is not datetime"
+
+    panel = DataRetrieve.many_companies(["TCS.NS", "INFY.NS"])
+    for symbol, data in panel.items():
+        assert data["Open"].dtype == np.float32, f"Price of {symbol} is not float32"
+
+
+def test_ema_state(tmp_path):
+    """test to check incremental ema matches ema recomputed over complete record"""
+    rng = np.random.default_rng(11)
+    index = pd.bdate_range("2020-01-01", periods=600, name="Date")
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 600))), index=index)
+    periods = (13, 50)
+
+    states = EMAStateStore(tmp_path)
+    assert states.update("TCS.NS", close, periods) is None, "State must not be present"
+    rebuilt = states.rebuild("TCS.NS", close[:500], periods)
+    assert np.allclose(
+        rebuilt, ema_frame(close[:500], periods).iloc[-1]
+    ), "Incorrect ema"
+
+    # only recent records are needed, state is read back from disk
+    states = EMAStateStore(tmp_path)
+    assert states.resume_date("TCS.NS", periods) == index[498], "Incorrect resume date"
+    updated = states.update("TCS.NS", close[490:550], periods)
+    assert np.allclose(
+        updated, ema_frame(close[:550], periods).iloc[-1], rtol=1e-12
+    ), "Incorrect incremental ema"
+    assert states.get("TCS.NS", 50).count == 549, "Incorrect record count"
+
+    # changed history must not be folded into stored state
+    adjusted = close[540:] / 2
+    assert states.update("TCS.NS", adjusted, periods) is None, "Stale state used"
@@ -0,0 +1,207 @@
+"""Unit test for formula helpers, as-of resolver, top-k selection & fetch planner
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from stock_analysis.utils.fetch_planner import FetchPlan, plan_ema_start_date
+from stock_analysis.utils.formula_helpers import (
+    _ema_matrix_loop,
+    _ema_matrix_numpy,
+    ema_frame,
+    ema_series,
+    exponential_moving_average,
+    rolling_sma,
+    rolling_sum,
+    simple_moving_average,
+)
+from stock_analysis.utils.helpers import (
+    asof_positions,
+    get_appropriate_date_ema,
+    get_appropriate_date_momentum,
+)
+from stock_analysis.utils.top_k import TopK
+
+rng = np.random.default_rng(7)
+index = pd.bdate_range("2010-01-01", periods=3000, name="Date")
+company_df = pd.DataFrame(
+    {
+        "Close": 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, len(index)))),
+        "Volume": rng.integers(1_000_000, 2_000_000, len(index)),
+    },
+    index=index,
+)
+
+
+def test_planned_ema_within_tolerance():
+    """test to check ema over planned window matches ema over complete history"""
+    cutoff_date = index[-400].to_pydatetime()
+    for period in (5, 13, 26, 50, 200):
+        start_date = plan_ema_start_date((period,), cutoff_date)
+        window_df = company_df[company_df.index >= start_date].copy()
+        complete = exponential_moving_average(
+            company_df.copy(), period, cutoff_date, verbosity=0
+        )
+        planned = exponential_moving_average(
+            window_df, period, cutoff_date, verbosity=0
+        )
+
+        assert len(window_df) < len(
+            company_df
+        ), f"Complete history fetched for {period}"
+        assert abs(planned - complete) / complete < 1e-3, f"Incorrect ema{period}"
+
+
+def test_fetch_plan():
+    """test to check fetch plan covers data needs of every stage"""
+    plan = (
+        FetchPlan()
+        .need(
+            ["TCS", "INFY"],
+            datetime.datetime(2021, 1, 1),
+            datetime.datetime(2022, 1, 1),
+        )
+        .need(["INFY", "WIPRO"], datetime.datetime(2020, 6, 1), quotes=True)
+    )
+    assert plan.companies == ["TCS", "INFY", "WIPRO"], "Incorrect companies"
+    assert plan.start_date == datetime.datetime(2020, 6, 1), "Incorrect start date"
+    assert plan.end_date is None, "End date not widened till today"
+    assert plan.quotes and plan.stages == 2, "Incorrect stages"
+    assert (
+        FetchPlan()
+        .need(["TCS"])
+        .need(["TCS"], datetime.datetime(2021, 1, 1))
+        .start_date
+        is None
+    ), "Complete history narrowed"
+
+
+def test_ema_series():
+    """test to check vectorized ema matches ema recurrence & keeps data unchanged"""
+    data_df = company_df.copy()
+    period, mf = 26, 2 / 27
+    ema = ema_series(data_df["Close"], period)
+
+    expected = data_df["Close"][:period].mean()
+    for close in data_df["Close"][period:]:
+        expected = close * mf + expected * (1 - mf)
+    assert ema.isna().sum() == period - 1, "Incorrect no of missing ema"
+    assert abs(ema.iloc[-1] - expected) < 1e-8, "Incorrect ema"
+    assert list(data_df.columns) == ["Close", "Volume"], "Input data modified"
+
+    cutoff_date = index[-10].to_pydatetime() + datetime.timedelta(hours=12)
+    assert (
+        exponential_moving_average(data_df, period, cutoff_date, verbosity=0)
+        == ema.iloc[-10]
+    ), "Incorrect ema on cutoff date"
+
+
+def test_ema_frame():
+    """test to check ema of many periods together matches ema of every period alone"""
+    periods = (1, 5, 13, 26, 200)
+    ema = ema_frame(company_df["Close"], periods)
+
+    assert list(ema.columns) == list(periods), "Incorrect columns"
+    for period in periods:
+        seeded = company_df["Close"][period - 1 :].copy()
+        seeded.iloc[0] = company_df["Close"][:period].mean()
+        expected = seeded.ewm(alpha=2 / (period + 1), adjust=False).mean()
+        assert np.allclose(
+            ema[period][period - 1 :], expected, rtol=1e-12
+        ), f"Incorrect ema{period}"
+        assert ema[period][: period - 1].isna().all(), f"Incorrect seed of ema{period}"
+    assert (ema[1] == company_df["Close"]).all(), "Incorrect ema1"
+
+
+def test_ema_kernels():
+    """test to check numba loop kernel (run as plain python) matches numpy kernel"""
+    close = company_df["Close"].to_numpy()[:500]
+    matrix = np.column_stack(
+        [close, close, np.where(np.arange(500) % 4, close, np.nan)]
+    )
+    periods = np.array([1, 26, 50])
+    mf = 2 / (1 + periods.astype(np.float64))
+    assert np.allclose(
+        _ema_matrix_loop(matrix, periods, mf),
+        _ema_matrix_numpy(matrix, periods, mf),
+        rtol=1e-12,
+        equal_nan=True,
+    ), "Kernels differ"
+    # NOTE - smoothing factor above `period + 1` makes decay negative (or zero at the boundary)
+    for smoothing_factor in (3, 4, 5):
+        periods = np.array([1, 2, 3, 4])
+        mf = smoothing_factor / (1 + periods.astype(np.float64))
+        assert np.allclose(
+            _ema_matrix_loop(matrix[:, [0, 2, 0, 2]], periods, mf),
+            _ema_matrix_numpy(matrix[:, [0, 2, 0, 2]], periods, mf),
+            rtol=1e-9,
+            equal_nan=True,
+        ), f"Kernels differ for smoothing factor {smoothing_factor}"
+
+
+def test_rolling_sum():
+    """test to check prefix sum rolling kernels match pandas rolling window"""
+    close = company_df["Close"]
+    for period in (1, 20, 200):
+        expected = close.rolling(period).mean()
+        assert np.allclose(
+            rolling_sma(close, period), expected, rtol=1e-9, equal_nan=True
+        ), f"Incorrect sma{period}"
+    assert np.isclose(
+        simple_moving_average(close[-200:], 200), close[-200:].mean()
+    ), "Incorrect sma"
+
+    # NOTE - window of every column spans its own available records
+    matrix = np.column_stack([close, close.where(close.index.day % 3 != 0)])
+    summed = rolling_sum(matrix, 50)
+    sparse = pd.Series(matrix[:, 1]).dropna()
+    assert np.allclose(summed[:, 0], close.rolling(50).sum(), equal_nan=True)
+    assert np.allclose(
+        summed[sparse.index, 1], sparse.rolling(50).sum(), equal_nan=True
+    ), "Missing records not skipped"
+    assert np.isnan(
+        summed[~np.isfinite(matrix[:, 1]), 1]
+    ).all(), "Missing record summed"
+
+
+def test_asof_positions():
+    """test to check as-of resolver matches latest record on or before desired dates"""
+    desired_dates = pd.date_range("2009-12-25", "2021-06-30", freq="7D")
+    positions = asof_positions(company_df.index, desired_dates)
+    for desired_date, position in zip(desired_dates, positions):
+        expected = company_df.index[company_df.index <= desired_date]
+        if len(expected) == 0:
+            assert position == -1, f"Found record before {desired_date}"
+        else:
+            assert (
+                company_df.index[position] == expected[-1]
+            ), f"Incorrect {desired_date}"
+
+    saturday = datetime.datetime(2015, 3, 7)
+    assert get_appropriate_date_ema(company_df, saturday, verbosity=0) == pd.Timestamp(
+        "2015-03-06"
+    ), "Incorrect ema date"
+    with pytest.raises(ValueError):
+        get_appropriate_date_ema(company_df, datetime.datetime(2009, 1, 1), verbosity=0)
+
+    # NOTE - month before last record (08-06-2021) is a saturday
+    date, close = get_appropriate_date_momentum(
+        company_df[:"2021-06-08"].reset_index(), "TCS", verbosity=0
+    )
+    assert date == pd.Timestamp("2021-05-07"), "Incorrect momentum date"
+    assert close == company_df.loc[date, "Close"], "Incorrect close"
+
+
+def test_top_k():
+    """test to check streaming top-k keeps the best k rows in order"""
+    scores = rng.normal(size=500)
+    rows = [{"symbol": str(idx), "score": score} for idx, score in enumerate(scores)]
+    rows.append({"symbol": "missing", "score": pd.NA})
+    top = TopK(10, "score").extend(rows)
+
+    expected = pd.DataFrame(rows[:-1]).nlargest(10, "score").reset_index(drop=True)
+    pd.testing.assert_frame_equal(top.leaderboard(), expected)
+    assert len(TopK(0, "score").extend(rows)) == 0, "Rows kept for k of 0"
@@ -0,0 +1,474 @@
+"""Offline test of strategies using replay provider
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis.config import settings
+from stock_analysis.custom_multi_indicator import CustomMultiIndicator
+from stock_analysis.data_retrieve import DataRetrieve
+from stock_analysis.executors.backend import (
+    ExecutorBackend,
+    shutdown_worker_pool,
+    start_worker_pool,
+)
+from stock_analysis.executors.parallel import UnitExecutor
+from stock_analysis.indicator import Indicator
+from stock_analysis.momentum_strategy import MomentumStrategy
+from stock_analysis.providers.replay import ReplayProvider
+from stock_analysis.storage.ema_state import EMAStateStore
+from stock_analysis.storage.quote_cache import QuoteCache
+from stock_analysis.utils.fetch_planner import FetchPlan
+
+now_strting = datetime.datetime.now().strftime("%d-%m-%Y")
+company_list = ["TCS", "INFY", "WIPRO", "HCLTECH"]
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """Write deterministic fixtures & use them for all data retrieval"""
+    rng = np.random.default_rng(42)
+    index = pd.bdate_range(end=datetime.date.today(), periods=600, name="Date")
+    for company in company_list:
+        close = 100 * np.exp(np.cumsum(rng.normal(0.001, 0.02, len(index))))
+        pd.DataFrame(
+            {
+                "Open": close,
+                "High": close * 1.01,
+                "Low": close * 0.99,
+                "Close": close,
+                "Adj Close": close,
+                "Volume": rng.integers(1_000_000, 2_000_000, len(index)),
+            },
+            index=index,
+        ).to_csv(tmp_path / f"{company}.NS.csv")
+    quote_columns = [
+        "regularMarketVolume",
+        "marketCap",
+        "bookValue",
+        "priceToBook",
+        "averageDailyVolume3Month",
+        "averageDailyVolume10Day",
+        "fiftyTwoWeekLowChange",
+        "fiftyTwoWeekLowChangePercent",
+        "fiftyTwoWeekRange",
+        "fiftyTwoWeekHighChange",
+        "fiftyTwoWeekHighChangePercent",
+        "fiftyTwoWeekLow",
+        "fiftyTwoWeekHigh",
+        "price",
+    ]
+    quotes = pd.DataFrame(
+        {
+            "symbol": [f"{company}.NS" for company in company_list],
+            "longName": [f"{company} Ltd." for company in company_list],
+            **{column: 1.0 for column in quote_columns},
+        }
+    )
+    quotes.to_csv(tmp_path / "quotes.csv", index=False)
+
+    monkeypatch.setattr(DataRetrieve, "provider", ReplayProvider(tmp_path))
+    monkeypatch.setattr(DataRetrieve, "quote_cache", QuoteCache())
+    return tmp_path
+
+
+def test_relative_momentum(replay):
+    """test to check relative momentum without network"""
+    mom = MomentumStrategy(company_name=company_list).relative_momentum(
+        top_company_count=3, save=False, verbosity=0
+    )
+
+    assert len(mom) == 3, "Incorrect no of company"
+    assert len(mom.columns) == 7, "Incorrect columns"
+    assert mom["return_yearly"].is_monotonic_decreasing, "Incorrect ranking"
+    for key, val in mom.isna().sum().to_dict().items():
+        assert val == 0, f"Found Null value in {key}"
+
+
+def test_ema_indicator(replay):
+    """test to check ema indicator without network"""
+    ema = Indicator(company_name=company_list).ema_indicator(save=False, verbosity=0)
+
+    assert len(ema) == len(company_list), "Incorrect no of company"
+    assert len(ema.columns) == 6, "Incorrect no of columns"
+    assert list(ema["company"]) == [f"{c} Ltd." for c in company_list], "Incorrect name"
+    for key, val in ema.isna().sum().to_dict().items():
+        assert val == 0, f"Found Null value in {key}"
+
+
+def test_ema_indicator_unavailable_company(replay):
+    """test to check unavailable company is dropped & numbers stay numeric"""
+    ema = Indicator(company_name=[*company_list, "UNKNOWN"]).ema_indicator(
+        save=False, verbosity=0
+    )
+
+    assert list(ema["symbol"]) == company_list, "Unavailable company not dropped"
+    assert ema["percentage_diff"].dtype == np.float64, "percentage_diff not numeric"
+
+
+def test_absolute_momentum_with_dma(replay):
+    """test to check DMA without network"""
+    dma = MomentumStrategy(company_name=company_list).absolute_momentum_with_dma()
+
+    required_column = [
+        "symbol",
+        "company",
+        f"price ({now_strting})",
+        "sma",
+        "ideal buy",
+        "ideal sell",
+        "turnover in cr.",
+        "action",
+    ]
+    assert required_column == list(dma.columns), "Either less or misplaced columns"
+    assert len(dma) == len(company_list), "Incorrect no of company"
+    for key, val in dma.isna().sum().to_dict().items():
+        assert val == 0, f"Found Null value in {key}"
+
+
+def test_dma_history(replay):
+    """test to check dma history ends with dma of end date"""
+    start_date = datetime.datetime.today() - datetime.timedelta(days=90)
+    history = UnitExecutor().unit_dma_history("TCS", start_date)
+    latest = UnitExecutor().unit_dma_absolute("TCS")
+
+    assert history.index[0] >= pd.Timestamp(start_date), "History before start date"
+    assert history.notna().all().all(), "Found Null value in history"
+    assert np.isclose(history["sma"].iloc[-1], latest["sma"]), "Incorrect sma"
+    assert history["action"].iloc[-1] == latest["action"], "Incorrect action"
+    assert UnitExecutor().unit_dma_history("UNKNOWN", start_date).empty
+
+
+def test_relative_momentum_horizons(replay):
+    """test to check returns of many horizons & ranking on their composite"""
+    strategy = MomentumStrategy(company_name=company_list)
+    momentum = strategy.relative_momentum(
+        horizons=("1W", "3M", "YTD"),
+        rank_by={"3M": 0.5, "12M": 0.5},
+        save=False,
+        verbosity=0,
+    )
+
+    for horizon in ("1W", "3M", "YTD", "12M", "composite"):
+        assert f"return_{horizon}" in momentum.columns, f"No {horizon} return"
+    assert momentum["return_composite"].is_monotonic_decreasing, "Incorrect rank"
+    assert np.allclose(
+        momentum["return_composite"],
+        0.5 * momentum["return_3M"] + 0.5 * momentum["return_12M"],
+    ), "Incorrect composite"
+
+    tcs = pd.read_csv(replay / "TCS.NS.csv", index_col="Date", parse_dates=True)
+    start = tcs.index[-1] - pd.DateOffset(months=3)
+    expected = (tcs["Close"].iloc[-1] / tcs["Close"][:start].iloc[-1] - 1) * 100
+    actual = momentum.loc[momentum["symbol"] == "TCS", "return_3M"].iloc[0]
+    assert np.isclose(actual, expected), "Incorrect 3M return"
+
+
+def test_streamed_momentum(replay, monkeypatch):
+    """test to check provisional leaderboards are published & final one is the best k"""
+    monkeypatch.setattr(settings, "stream_batch_size", 1)
+    leaderboards = []
+    momentum = MomentumStrategy(company_name=company_list).relative_momentum(
+        top_company_count=2, save=False, verbosity=0, on_progress=leaderboards.append
+    )
+
+    assert len(leaderboards) == len(company_list), "Leaderboard not published per batch"
+    assert [len(board) for board in leaderboards] == [1, 2, 2, 2], "Incorrect size"
+    pd.testing.assert_frame_equal(momentum, leaderboards[-1])
+    complete = MomentumStrategy(
+        company_name=company_list, panel=True
+    ).relative_momentum(top_company_count=len(company_list), save=False, verbosity=0)
+    assert list(momentum["symbol"]) == list(complete["symbol"][:2]), "Incorrect top k"
+
+
+def test_streamed_momentum_columns(replay):
+    """test to check streamed momentum has same columns as panel, when dates of companies differ"""
+    wipro = pd.read_csv(replay / "WIPRO.NS.csv", index_col="Date")
+    wipro.iloc[:-3].to_csv(replay / "WIPRO.NS.csv")
+    companies = [*company_list, "UNLISTED"]
+    streamed = MomentumStrategy(company_name=companies).relative_momentum(
+        top_company_count=len(companies), save=False, verbosity=0
+    )
+    panel = MomentumStrategy(company_name=companies, panel=True).relative_momentum(
+        top_company_count=len(companies), save=False, verbosity=0
+    )
+
+    assert list(streamed.columns) == list(panel.columns), "Columns differ from panel"
+    assert not any("<NA>" in column for column in streamed.columns), "NA column kept"
+    assert list(streamed["symbol"]) == list(panel["symbol"]), "Incorrect ranking"
+
+
+@pytest.mark.parametrize("mode", ["sequential", "thread", "async"])
+def test_executor_backend(replay, mode):
+    """test to check every executor backend gives same result"""
+    expected = Indicator(company_name=company_list).ema_indicator(
+        save=False, verbosity=0
+    )
+    ema = Indicator(
+        company_name=company_list, backend=ExecutorBackend(mode, workers=2)
+    ).ema_indicator(save=False, verbosity=0)
+    pd.testing.assert_frame_equal(ema, expected)
+    with pytest.raises(ValueError):
+        ExecutorBackend("gpu")
+
+
+def test_warm_worker_pool(replay, tmp_path, monkeypatch):
+    """test to check warm pool serves data prefetched after its workers were started"""
+    expected = Indicator(company_name=company_list).ema_indicator(
+        save=False, verbosity=0
+    )
+    held, handed = DataRetrieve.held.__func__, []
+
+    def record(cls, symbols=None):
+        handed.append(symbols)
+        return held(cls, symbols)
+
+    monkeypatch.setattr(DataRetrieve, "held", classmethod(record))
+    start_worker_pool(2)
+    try:
+        with DataRetrieve.prefetched([f"{company}.NS" for company in company_list]):
+            # NOTE - workers can only use data handed over by parent now
+            for fixture in tmp_path.glob("*.NS.csv"):
+                fixture.unlink()
+            ema = Indicator(
+                company_name=company_list, backend=ExecutorBackend("pool", workers=2)
+            ).ema_indicator(save=False, verbosity=0)
+            assert handed == [
+                ["TCS.NS", "INFY.NS"],
+                ["WIPRO.NS", "HCLTECH.NS"],
+            ], "Chunks not handed data of their own companies"
+            prefetched, quotes, _ = DataRetrieve.held(["TCS.NS"])
+            assert list(prefetched) == [
+                "TCS.NS"
+            ], "Records of other companies handed over"
+            assert set(quotes.index) <= {
+                "TCS.NS"
+            }, "Quotes of other companies handed over"
+    finally:
+        shutdown_worker_pool()
+    pd.testing.assert_frame_equal(ema, expected)
+
+
+def test_shared_prefetch(replay, tmp_path):
+    """test to check workers serve data from shared memory loaded by parent"""
+    expected = Indicator(company_name=company_list).ema_indicator(
+        save=False, verbosity=0
+    )
+    ema = Indicator(
+        company_name=company_list,
+        prefetch="shared",
+        backend=ExecutorBackend("multiprocessing", workers=2),
+    ).ema_indicator(save=False, verbosity=0)
+    pd.testing.assert_frame_equal(ema, expected)
+    with pytest.raises(ValueError):
+        Indicator(
+            company_name=company_list, prefetch="shared", backend="process"
+        ).ema_indicator(save=False, verbosity=0)
+
+    start_worker_pool(2)
+    try:
+        with DataRetrieve.shared([f"{company}.NS" for company in company_list]):
+            # NOTE - workers of warm pool can only attach to shared memory by name now
+            for fixture in tmp_path.glob("*.NS.csv"):
+                fixture.unlink()
+            ema = Indicator(
+                company_name=company_list, backend=ExecutorBackend("pool")
+            ).ema_indicator(save=False, verbosity=0)
+    finally:
+        shutdown_worker_pool()
+    pd.testing.assert_frame_equal(ema, expected)
+
+
+@pytest.mark.parametrize("panel", [False, True])
+def test_single_fetch_plan(replay, monkeypatch, panel):
+    """test to check composite strategy with prefetch fetches every company & quote once"""
+    provider = DataRetrieve.provider
+    requested, quoted = [], []
+
+    def history(symbols, start_date=None, end_date=None):
+        requested.extend(symbols)
+        return ReplayProvider.history(provider, symbols, start_date, end_date)
+
+    def quote(symbols):
+        quoted.extend(symbols)
+        return ReplayProvider.quote(provider, symbols)
+
+    monkeypatch.setattr(provider, "history", history)
+    monkeypatch.setattr(provider, "quote", quote)
+    momentum_ema = MomentumStrategy(
+        company_name=company_list, prefetch=True, panel=panel, backend="sequential"
+    ).relative_momentum_with_ema(top_company_count=2, save=False, verbosity=0)
+
+    assert len(momentum_ema) == 2, "Incorrect no of company"
+    assert sorted(requested) == sorted(
+        f"{company}.NS" for company in company_list
+    ), "Records fetched more than once"
+    assert len(quoted) == len(set(quoted)), "Quotes fetched more than once"
+
+    requested.clear()
+    Indicator(
+        company_name=company_list, prefetch=True, backend="sequential"
+    ).ema_detail_indicator(save=False, verbosity=0)
+    assert len(requested) == len(company_list), "Records fetched more than once"
+
+    plan = FetchPlan().need(company_list, quotes=True)
+    with UnitExecutor()._planned(plan):
+        assert not DataRetrieve._prefetched, "Records held without prefetch"
+
+
+def test_custom_indicator_graph(replay, monkeypatch):
+    """test to check custom indicators fetch every company once & match unit indicators"""
+    provider = DataRetrieve.provider
+    requested = []
+
+    def history(symbols, start_date=None, end_date=None):
+        requested.extend(symbols)
+        return ReplayProvider.history(provider, symbols, start_date, end_date)
+
+    monkeypatch.setattr(provider, "history", history)
+    indicators = ["daily moving average", "exponential moving average"]
+    custom = CustomMultiIndicator(
+        company_name=company_list, backend="sequential"
+    ).multi_choice_indicator(indicators=indicators, save=False, verbosity=0)
+
+    assert len(custom) == len(company_list), "Incorrect no of company"
+    assert list(custom.columns[[0, 1, 3, 4, 5, 6]]) == [
+        "symbol",
+        "comany",
+        "dma",
+        "dma action",
+        "ema",
+        "ema action",
+    ], "Incorrect columns"
+    assert len(requested) == len(company_list), "Records fetched more than once"
+
+    executor = UnitExecutor()
+    for row in custom.to_dict("records"):
+        dma = executor.unit_dma_absolute(row["symbol"])
+        ema = executor.unit_ema_absolute(row["symbol"], verbosity=0)
+        assert np.isclose(row["dma"], dma["sma"]), f"Incorrect dma of {row['symbol']}"
+        assert (
+            row["dma action"] == dma["action"]
+        ), f"Incorrect action of {row['symbol']}"
+        assert np.isclose(
+            row["ema"], ema["ema"], rtol=1e-3
+        ), f"Incorrect ema of {row['symbol']}"
+    with pytest.raises(ValueError):
+        CustomMultiIndicator(company_name=company_list).multi_choice_indicator(
+            indicators=["bollinger band"], save=False
+        )
+
+
+def test_ema_turnover_window(replay):
+    """test to check ema turnover is mean volume of the last `period` records, for unit & graph"""
+    path = replay / "TCS.NS.csv"
+    records = pd.read_csv(path, index_col="Date")
+    # NOTE - high volume before the last 50 records would pass turnover over complete history
+    records["Volume"] = 1_000_000_000
+    records.iloc[-50:, records.columns.get_loc("Volume")] = 1_000
+    records.to_csv(path)
+
+    ema = UnitExecutor().unit_ema_absolute("TCS", verbosity=0)
+    assert np.isclose(
+        ema["turnover in cr."], 1_000 * ema["ema"] / 10000000
+    ), "Turnover not over last period records"
+    assert ema["action"] == "Invalid", "Action given for low turnover"
+    custom = CustomMultiIndicator(
+        company_name=["TCS"], backend="sequential"
+    ).multi_choice_indicator(
+        indicators=["exponential moving average"], save=False, verbosity=0
+    )
+    assert custom["ema action"].iloc[0] == "Invalid", "Action given for low turnover"
+
+
+def test_compact_dtypes(replay, monkeypatch):
+    """test to check compact dtypes of strategy result"""
+    monkeypatch.setattr(settings, "compact_dtypes", True)
+    ema = Indicator(company_name=company_list).ema_indicator(save=False, verbosity=0)
+
+    assert ema["symbol"].dtype == "category", "Symbol is not categorical"
+    assert ema["company"].dtype == "category", "Company is not categorical"
+    assert (
+        ema.select_dtypes("number").dtypes == np.float32
+    ).all(), "Numbers are not float32"
+
+
+def test_panel_matches_unit(replay):
+    """test to check panel engine gives same result as unit executors"""
+    unit_ind = Indicator(company_name=company_list)
+    panel_ind = Indicator(company_name=company_list, panel=True)
+    pd.testing.assert_frame_equal(
+        panel_ind.ema_indicator(save=False, verbosity=0),
+        unit_ind.ema_indicator(save=False, verbosity=0),
+    )
+    pd.testing.assert_frame_equal(
+        panel_ind.ema_crossover_detail_indicator(save=False, verbosity=0),
+        unit_ind.ema_crossover_detail_indicator(save=False, verbosity=0),
+    )
+
+    unit_mom = MomentumStrategy(company_name=company_list)
+    panel_mom = MomentumStrategy(company_name=company_list, panel=True)
+    pd.testing.assert_frame_equal(
+        panel_mom.absolute_momentum_with_dma(),
+        unit_mom.absolute_momentum_with_dma(),
+        check_dtype=False,
+    )
+    pd.testing.assert_frame_equal(
+        panel_mom.relative_momentum(top_company_count=3, save=False, verbosity=0),
+        unit_mom.relative_momentum(top_company_count=3, save=False, verbosity=0),
+        check_dtype=False,
+    )
+
+
+def test_ema_history(replay):
+    """test to check ema on many cutoff dates matches ema on each cutoff date"""
+    cutoff_dates = pd.date_range(end=datetime.date.today(), periods=4, freq="7D")
+    unit_ind = Indicator(company_name=company_list)
+    history = unit_ind.ema_indicator(cutoff_date=cutoff_dates, save=False, verbosity=0)
+
+    assert list(history.columns) == [
+        "symbol",
+        "date",
+        "ema50",
+        "ema200",
+        "percentage_diff",
+    ], "Either less or misplaced columns"
+    assert len(history) == len(company_list) * len(cutoff_dates), "Missing rows"
+    cutoff_date = cutoff_dates[1].to_pydatetime()
+    single = unit_ind.ema_indicator(cutoff_date=cutoff_date, save=False, verbosity=0)
+    expected = history[history["date"] == cutoff_date]
+    assert np.allclose(
+        expected["ema50"], single[f"ema50 ({cutoff_date.strftime('%d-%m-%Y')})"]
+    ), "Incorrect ema on cutoff date"
+
+    panel_ind = Indicator(company_name=company_list, panel=True)
+    pd.testing.assert_frame_equal(
+        panel_ind.ema_indicator(cutoff_date=cutoff_dates, save=False, verbosity=0),
+        history,
+    )
+    pd.testing.assert_frame_equal(
+        panel_ind.ema_crossover_detail_indicator(
+            save=False, verbosity=0, cutoff_date=cutoff_dates
+        ),
+        unit_ind.ema_crossover_detail_indicator(
+            save=False, verbosity=0, cutoff_date=cutoff_dates
+        ),
+    )
+
+
+def test_incremental_ema(replay, monkeypatch):
+    """test to check ema indicator with ema state gives same result as without it"""
+    expected = Indicator(company_name=company_list).ema_indicator(
+        save=False, verbosity=0
+    )
+    monkeypatch.setattr(UnitExecutor, "ema_state", EMAStateStore(replay / "state"))
+    for _ in range(2):
+        ema = Indicator(company_name=company_list).ema_indicator(
+            save=False, verbosity=0
+        )
+        pd.testing.assert_frame_equal(ema, expected)
+    assert len(list((replay / "state").glob("*.json"))) == len(
+        company_list
+    ), "EMA state not persisted"